@@ -0,0 +1,55 @@
+"""Body composition benchmark over a backfilled history.
+
+Times body_composition on a synthetic history of weights and impedances in
+one batch, the way a history is recomputed, and one reading at a time, the
+way live polls compute it, for both sexes.
+
+    python -m benchmarks.body_composition --rows 100000
+"""
+from __future__ import annotations
+
+import argparse
+import timeit
+
+import numpy as np
+
+from custom_components.tuya_scale.body_composition import body_composition
+
+HEIGHT = 175.0
+AGE = 40.0
+
+
+def main() -> None:
+    """Time the batch and the per reading path and print one row per sex."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--single", type=int, default=1000, help="readings timed one at a time"
+    )
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    weight = rng.normal(78.0, 12.0, args.rows).clip(35.0, 180.0)
+    impedance = rng.normal(500.0, 60.0, args.rows).clip(250.0, 900.0)
+
+    print(f"{'sex':<6} {'rows':>7} {'batch ms':>9} {'ns/row':>7} {'single us':>10} {'speedup':>8}")
+    for male in (True, False):
+        batch = min(timeit.repeat(
+            lambda: body_composition(weight, impedance, HEIGHT, AGE, male),
+            number=1, repeat=args.repeat,
+        ))
+        sample = list(zip(weight[:args.single].tolist(), impedance[:args.single].tolist()))
+        single = min(timeit.repeat(
+            lambda: [body_composition(w, z, HEIGHT, AGE, male) for w, z in sample],
+            number=1, repeat=args.repeat,
+        )) / len(sample)
+        print(
+            f"{'male' if male else 'female':<6} {args.rows:>7} {batch * 1000:>9.2f} "
+            f"{batch / args.rows * 1e9:>7.1f} {single * 1e6:>10.2f} "
+            f"{single * args.rows / batch:>7.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Poll load benchmark against the fake Tuya cloud.
+
+Polls 1, 50 and 500 scales the way the hub does, through one shared token
+manager and at most DEFAULT_MAX_CONCURRENT_REQUESTS requests at a time, and
+reports the poll latency percentiles, the requests sent per reading, the CPU
+time per poll and the memory allocated. The fake cloud runs in the same
+process, so the CPU time includes serving the requests.
+
+    python -m benchmarks.poll_load --scales 1 50 500 --rounds 3
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+
+import aiohttp
+
+from custom_components.tuya_scale.api import TuyaScaleApiClient, TuyaScaleTokenManager
+from custom_components.tuya_scale.budget import RequestBudget
+from custom_components.tuya_scale.const import DEFAULT_MAX_CONCURRENT_REQUESTS
+from custom_components.tuya_scale.schema import DecoderTable
+from custom_components.tuya_scale.transport import CloudTransport
+from tests.fake_tuya import FakeTuyaCloud, scale_properties
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    """Return a percentile of the values, nearest rank."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+async def run(scales: int, rounds: int, latency: float, rate: float | None) -> dict:
+    """Poll every scale ``rounds`` times and return the measurements."""
+    device_ids = [f"bf{index:016x}" for index in range(scales)]
+    cloud = FakeTuyaCloud(
+        devices={device_id: scale_properties() for device_id in device_ids},
+        latency=latency,
+    )
+    await cloud.start()
+    semaphore = asyncio.Semaphore(DEFAULT_MAX_CONCURRENT_REQUESTS)
+    decoders = DecoderTable()
+    latencies: list[float] = []
+    readings = 0
+
+    async with aiohttp.ClientSession() as session:
+        client = TuyaScaleApiClient(
+            session, cloud.endpoint, cloud.access_id, cloud.access_key,
+            budget=RequestBudget(rate, burst=DEFAULT_MAX_CONCURRENT_REQUESTS) if rate else None,
+        )
+        tokens = TuyaScaleTokenManager(client)
+        transports = [CloudTransport(client, tokens, device_id) for device_id in device_ids]
+
+        async def poll(transport: CloudTransport) -> None:
+            nonlocal readings
+            start = time.perf_counter()
+            async with semaphore:
+                properties = await transport.async_get_properties()
+            for prop in properties:
+                decoders.decode(prop["code"], prop["value"], prop["time"])
+            latencies.append(time.perf_counter() - start)
+            readings += 1
+
+        tracemalloc.start()
+        cpu = time.process_time()
+        wall = time.perf_counter()
+        for _ in range(rounds):
+            await asyncio.gather(*(poll(transport) for transport in transports))
+        wall = time.perf_counter() - wall
+        cpu = time.process_time() - cpu
+        _current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    await cloud.stop()
+    return {
+        "scales": scales,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": _percentile(latencies, 95) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+        "requests_per_reading": len(cloud.requests) / readings,
+        "cpu_per_poll_ms": cpu / readings * 1000,
+        "round_s": wall / rounds,
+        "peak_kib": peak / 1024,
+    }
+
+
+def main() -> None:
+    """Run the benchmark and print one row per fleet size."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 50, 500])
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.05, help="server latency in s")
+    parser.add_argument("--rate", type=float, help="request budget in requests per second")
+    args = parser.parse_args()
+
+    print(
+        f"{'scales':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/read':>8} "
+        f"{'cpu/poll ms':>11} {'round s':>8} {'peak KiB':>9}"
+    )
+    for scales in args.scales:
+        result = asyncio.run(run(scales, args.rounds, args.latency, args.rate))
+        print(
+            f"{result['scales']:>6} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+            f"{result['p99_ms']:>8.1f} {result['requests_per_reading']:>8.3f} "
+            f"{result['cpu_per_poll_ms']:>11.3f} {result['round_s']:>8.2f} "
+            f"{result['peak_kib']:>9.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Property record memory and allocation benchmark.
+
+Keeps the processed data of 1, 100 and 500 scales in memory, once as the
+four-key dict per property with a formatted last_update that the coordinator
+used to build, once as PropertyRecord tuples, and reports the memory held
+per scale. It then times one poll of every scale and measures the memory it
+allocates, for an idle poll where nothing changed and for a weigh-in where
+every property changed. Both sides run the processing loop of the
+coordinator without its entities.
+
+    python -m benchmarks.records --scales 1 100 500
+"""
+from __future__ import annotations
+
+import argparse
+import time
+import tracemalloc
+from datetime import datetime
+
+from custom_components.tuya_scale.const import SENSOR_TYPES
+from custom_components.tuya_scale.models import PropertyRecord
+from custom_components.tuya_scale.schema import DecoderTable
+
+CODES = sorted({info["key"] for info in SENSOR_TYPES.values()})
+
+
+def shadow(timestamp: int) -> list[dict]:
+    """Return the shadow properties of a scale that reports every code."""
+    return [
+        {"code": code, "value": 500 + index, "time": timestamp, "type": "value"}
+        for index, code in enumerate(CODES)
+    ]
+
+
+def process_dicts(decoders: DecoderTable, properties: list, previous: dict) -> dict:
+    """Build the data the way the coordinator did, a dict per property."""
+    data = {}
+    for prop in properties:
+        code = prop['code']
+        timestamp = prop.get('time', 0)
+        data[code] = {
+            'value': decoders.decode(code, prop['value'], timestamp),
+            'timestamp': timestamp,
+            'type': prop.get('type', previous.get(code, {}).get('type', '')),
+            'last_update': datetime.fromtimestamp(timestamp / 1000).strftime(
+                '%Y-%m-%d %H:%M:%S'
+            ),
+        }
+    return data
+
+
+def process_records(
+    decoders: DecoderTable, properties: list, previous: dict, index: dict
+) -> dict:
+    """Build the data the way the coordinator does, sharing unchanged records."""
+    data = {}
+    for prop in properties:
+        code = prop['code']
+        value = prop['value']
+        timestamp = prop.get('time', 0)
+        if code in previous and index.get(code) == (timestamp, value):
+            data[code] = previous[code]
+            continue
+        index[code] = (timestamp, value)
+        data[code] = PropertyRecord(
+            decoders.decode(code, value, timestamp), timestamp, prop.get('type', '')
+        )
+    return data
+
+
+def measure(poll, fleet: list) -> tuple[float, float]:
+    """Return the ms and KiB one poll of every scale takes."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    for index, scale in enumerate(fleet):
+        fleet[index] = poll(scale)
+    elapsed = time.perf_counter() - start
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed * 1000, peak / 1024
+
+
+def run(scales: int) -> dict:
+    """Measure both representations for a fleet of scales."""
+    decoders = DecoderTable()
+    first = shadow(1700000000000)
+    weigh_in = shadow(1700000060000)
+    result = {"scales": scales}
+
+    def dict_poll(properties):
+        return lambda data: process_dicts(decoders, properties, data)
+
+    def record_build():
+        # The property index is held by the coordinator along with the data
+        index = {}
+        return process_records(decoders, first, {}, index), index
+
+    def record_poll(properties):
+        return lambda scale: (
+            process_records(decoders, properties, scale[0], scale[1]), scale[1]
+        )
+
+    for name, build, poll in (
+        ("dict", lambda: process_dicts(decoders, first, {}), dict_poll),
+        ("record", record_build, record_poll),
+    ):
+        tracemalloc.start()
+        fleet = [build() for _ in range(scales)]
+        held, _peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result[f"{name}_kib_per_scale"] = held / 1024 / scales
+        result[f"{name}_idle"] = measure(poll(first), fleet)
+        result[f"{name}_weigh_in"] = measure(poll(weigh_in), fleet)
+    return result
+
+
+def main() -> None:
+    """Run the benchmark and print one row per fleet size and representation."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 100, 500])
+    args = parser.parse_args()
+
+    print(
+        f"{'scales':>6} {'data':<7} {'KiB/scale':>9} {'idle ms':>8} {'idle KiB':>9} "
+        f"{'weigh-in ms':>11} {'weigh-in KiB':>12}"
+    )
+    for scales in args.scales:
+        result = run(scales)
+        for name in ("dict", "record"):
+            idle_ms, idle_kib = result[f"{name}_idle"]
+            weigh_ms, weigh_kib = result[f"{name}_weigh_in"]
+            print(
+                f"{scales:>6} {name:<7} {result[f'{name}_kib_per_scale']:>9.2f} "
+                f"{idle_ms:>8.2f} {idle_kib:>9.1f} {weigh_ms:>11.2f} {weigh_kib:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
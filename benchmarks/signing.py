@@ -0,0 +1,79 @@
+"""Request signing microbenchmark.
+
+Compares TuyaScaleSigner, which keys the HMAC once and caches the string to
+sign of body-less requests, with keying a new HMAC for every request the way
+the client used to, for a shadow properties GET, a report log GET with a
+query and a POST with a JSON body.
+
+    python -m benchmarks.signing --number 100000
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import hmac
+import json
+import timeit
+
+from custom_components.tuya_scale.api import TuyaScaleSigner, build_path
+from custom_components.tuya_scale.const import REPORT_LOGS_PATH, DEVICE_DATA_PATH
+from tests.fake_tuya import ACCESS_ID, ACCESS_KEY, DEVICE_ID
+
+ACCESS_TOKEN = "0123456789abcdef0123456789abcdef"
+TIMESTAMP = "1700000000000"
+
+
+def naive_sign(method: str, path: str, access_token: str, body: bytes | None = None) -> str:
+    """Sign a request from scratch, keying a new HMAC every time."""
+    content_hash = hashlib.sha256(body or b"").hexdigest()
+    str_to_sign = f"{method}\n{content_hash}\n\n{path}"
+    message = f"{ACCESS_ID}{access_token}{TIMESTAMP}{str_to_sign}"
+    return hmac.new(
+        ACCESS_KEY.encode('utf-8'), message.encode('utf-8'), hashlib.sha256
+    ).hexdigest().upper()
+
+
+def main() -> None:
+    """Time both signers on each request shape and print one row per shape."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    signer = TuyaScaleSigner(ACCESS_ID, ACCESS_KEY)
+    body = json.dumps({"commands": [{"code": "unit", "value": "kg"}]}).encode('utf-8')
+    requests = {
+        "shadow GET": ("GET", DEVICE_DATA_PATH.format(device_id=DEVICE_ID), None),
+        "report log GET": (
+            "GET",
+            build_path(
+                REPORT_LOGS_PATH.format(device_id=DEVICE_ID),
+                {"codes": "weight,body_r", "end_time": 1700000000000, "size": 100,
+                 "start_time": 1690000000000},
+            ),
+            None,
+        ),
+        "POST with body": ("POST", f"/v1.0/devices/{DEVICE_ID}/commands", body),
+    }
+
+    print(f"{'request':<16} {'naive us':>9} {'signer us':>10} {'speedup':>8}")
+    for name, (method, path, payload) in requests.items():
+        assert signer.sign(TIMESTAMP, method, path, ACCESS_TOKEN, payload) == naive_sign(
+            method, path, ACCESS_TOKEN, payload
+        )
+        naive = min(timeit.repeat(
+            lambda: naive_sign(method, path, ACCESS_TOKEN, payload),
+            number=args.number, repeat=args.repeat,
+        ))
+        prekeyed = min(timeit.repeat(
+            lambda: signer.sign(TIMESTAMP, method, path, ACCESS_TOKEN, payload),
+            number=args.number, repeat=args.repeat,
+        ))
+        print(
+            f"{name:<16} {naive / args.number * 1e6:>9.2f} "
+            f"{prekeyed / args.number * 1e6:>10.2f} {naive / prekeyed:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,18 +2,51 @@
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.const import Platform
+from homeassistant.helpers.storage import Store
 
-from .const import DOMAIN, PLATFORMS
+from .const import (
+    DOMAIN,
+    PLATFORMS,
+    CONF_BACKFILL,
+    CONF_DEVICE_ID,
+    DEFAULT_BACKFILL,
+    STORAGE_VERSION,
+)
 from .coordinator import TuyaScaleDataUpdateCoordinator
+from .history import TuyaScaleBackfill, remove_store, store_path
+from .hub import async_get_hub, async_release_hub
+from .services import async_setup_services
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Tuya Scale from a config entry."""
-    coordinator = TuyaScaleDataUpdateCoordinator(hass, entry)
-    await coordinator.async_config_entry_first_refresh()
-    
-    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
-    
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    hub = async_get_hub(hass, entry)
+    coordinator = TuyaScaleDataUpdateCoordinator(hass, entry, hub)
+    try:
+        # With cached data the entities are set up right away and the hub
+        # refreshes them in the background, otherwise wait for the first poll
+        restored = await coordinator.async_restore()
+        if not restored:
+            await coordinator.async_config_entry_first_refresh()
+
+        hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
+
+        if entry.options.get(CONF_BACKFILL, DEFAULT_BACKFILL):
+            coordinator.backfill = TuyaScaleBackfill(hass, coordinator)
+            await coordinator.backfill.async_setup()
+
+        await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    except BaseException:
+        # A failed setup leaves nothing polling and no hub nobody uses
+        hass.data.get(DOMAIN, {}).pop(entry.entry_id, None)
+        coordinator.async_stop()
+        if coordinator.backfill is not None:
+            await coordinator.backfill.async_unload()
+        async_release_hub(hass, coordinator)
+        raise
+
+    # Polls start once the entry is set up
+    hub.async_add_coordinator(coordinator, refresh=restored)
+    async_setup_services(hass)
     
     # Yapılandırma güncellemelerini dinlemek için listener ekle
     entry.async_on_unload(entry.add_update_listener(async_update_options))
@@ -21,13 +54,25 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return True
 
 async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Update options."""
-    await hass.config_entries.async_reload(entry.entry_id)
+    """Apply changed options, reload only when they cannot be applied live."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    if not coordinator.async_update_options(entry):
+        await hass.config_entries.async_reload(entry.entry_id)
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        async_release_hub(hass, coordinator)
+        coordinator.async_stop()
+        if coordinator.backfill is not None:
+            await coordinator.backfill.async_unload()
 
     return unload_ok
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the cached data and measurement history of a deleted entry."""
+    device_id = entry.data[CONF_DEVICE_ID]
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{device_id}").async_remove()
+    await hass.async_add_executor_job(remove_store, store_path(hass, device_id))
@@ -0,0 +1,416 @@
+"""Async client for the Tuya OpenAPI."""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import time
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Any
+
+import aiohttp
+
+from .breaker import STATE_HALF_OPEN, CircuitBreaker
+from .budget import RequestBudget
+from .metrics import PHASE_HTTP, PHASE_PARSE, PHASE_SIGN, TuyaScaleMetrics
+from .tracing import REDACTED, PayloadLogger
+from .const import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+    ERROR_AUTH,
+    ERROR_CODES_AUTH,
+    ERROR_CODES_RATE_LIMIT,
+    ERROR_CONN,
+    ERROR_RATE_LIMIT,
+    ERROR_TIMEOUT,
+    TOKEN_PATH,
+    TOKEN_REFRESH_MARGIN,
+    TOKEN_REFRESH_PATH,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+SIGN_METHOD = "HMAC-SHA256"
+EMPTY_BODY_SHA256 = hashlib.sha256(b"").hexdigest()
+# The refresh token is the last segment of its path
+TOKEN_REFRESH_PREFIX = TOKEN_REFRESH_PATH.partition("{")[0]
+
+
+class TuyaScaleApiError(Exception):
+    """Base error raised by the Tuya Scale API client."""
+
+
+class TuyaScaleConnectionError(TuyaScaleApiError):
+    """Error to indicate the API could not be reached."""
+
+
+class TuyaScaleAuthError(TuyaScaleApiError):
+    """Error to indicate the credentials were rejected."""
+
+
+class TuyaScaleRateLimitError(TuyaScaleConnectionError):
+    """Error to indicate the project exceeded its request quota."""
+
+
+class TuyaScaleCircuitOpenError(TuyaScaleConnectionError):
+    """Error to indicate requests to the region are suspended."""
+
+
+def redact_path(path: str) -> str:
+    """Return a request path fit for the log, without a refresh token."""
+    if path.startswith(TOKEN_REFRESH_PREFIX):
+        return f"{TOKEN_REFRESH_PREFIX}{REDACTED}"
+    return path
+
+
+@lru_cache(maxsize=256)
+def _string_to_sign(method: str, path: str) -> str:
+    """Return the string to sign of a request without a body."""
+    return f"{method}\n{EMPTY_BODY_SHA256}\n\n{path}"
+
+
+def client_timeout(connect_timeout: float, read_timeout: float) -> aiohttp.ClientTimeout:
+    """Return the timeout of a request, bounding connecting and each read."""
+    return aiohttp.ClientTimeout(
+        total=None,
+        sock_connect=connect_timeout,
+        sock_read=read_timeout,
+    )
+
+
+def build_path(path: str, params: dict[str, Any] | None = None) -> str:
+    """Return a path with its query parameters sorted as Tuya signs them.
+
+    Tuya signs the query unencoded, the way the HTTP client sends it, so a
+    comma separated list must not be escaped to %2C.
+    """
+    if not params:
+        return path
+    return f"{path}?{'&'.join(f'{key}={params[key]}' for key in sorted(params))}"
+
+
+class TuyaScaleSigner:
+    """Sign Tuya OpenAPI requests of one project.
+
+    The HMAC is keyed once and copied for every request, and the string to
+    sign of a body-less request is built once per method and path.
+    """
+
+    __slots__ = ("access_id", "_hmac")
+
+    def __init__(self, access_id: str, access_key: str) -> None:
+        """Initialize the signer."""
+        self.access_id = access_id
+        self._hmac = hmac.new(access_key.encode('utf-8'), digestmod=hashlib.sha256)
+
+    def sign(
+        self,
+        t: str,
+        method: str,
+        path: str,
+        access_token: str | None = None,
+        body: bytes | None = None,
+    ) -> str:
+        """Return the signature of a request, ``path`` including its query."""
+        if body:
+            str_to_sign = f"{method}\n{hashlib.sha256(body).hexdigest()}\n\n{path}"
+        else:
+            str_to_sign = _string_to_sign(method, path)
+        mac = self._hmac.copy()
+        mac.update(f"{self.access_id}{access_token or ''}{t}{str_to_sign}".encode('utf-8'))
+        return mac.hexdigest().upper()
+
+
+class TuyaScaleApiClient:
+    """Signed requests against one Tuya OpenAPI region endpoint.
+
+    The client does not own its HTTP session: it is handed Home Assistant's
+    shared aiohttp session, which keeps connections to each region host alive
+    between polls instead of paying a new TLS handshake every time.
+
+    An optional circuit breaker, shared by every client of the region, stops
+    requests while the region keeps failing. An optional request budget,
+    shared by every client of the project, paces the requests to the
+    project's rate quota and pauses them while the project is rate limited.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        endpoint: str,
+        access_id: str,
+        access_key: str,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        breaker: CircuitBreaker | None = None,
+        budget: RequestBudget | None = None,
+    ) -> None:
+        """Initialize the client."""
+        self._session = session
+        self.breaker = breaker
+        self.budget = budget
+        self.endpoint = endpoint
+        self.access_id = access_id
+        self.access_key = access_key
+        self.signer = TuyaScaleSigner(access_id, access_key)
+        self._timeout = client_timeout(connect_timeout, read_timeout)
+
+    async def async_get(
+        self,
+        path: str,
+        access_token: str | None = None,
+        metrics: TuyaScaleMetrics | None = None,
+        params: dict[str, Any] | None = None,
+        timeout: aiohttp.ClientTimeout | None = None,
+        payload_log: PayloadLogger | None = None,
+    ) -> tuple[int, dict]:
+        """Send a signed GET request and return the HTTP status and JSON body."""
+        return await self.async_request(
+            "GET", path, access_token, metrics, params=params, timeout=timeout,
+            payload_log=payload_log,
+        )
+
+    async def async_request(
+        self,
+        method: str,
+        path: str,
+        access_token: str | None = None,
+        metrics: TuyaScaleMetrics | None = None,
+        params: dict[str, Any] | None = None,
+        json_body: Any = None,
+        timeout: aiohttp.ClientTimeout | None = None,
+        payload_log: PayloadLogger | None = None,
+    ) -> tuple[int, dict]:
+        """Send a signed request and return the HTTP status and JSON body.
+
+        Query ``params`` are sorted into the signed path and ``json_body`` is
+        serialized once, so the signed and the sent bytes are the same.
+        When ``metrics`` is given, the signing, HTTP and parsing phases and
+        the received bytes are recorded into it. A ``timeout`` replaces the
+        client's own for this request, so entries sharing the client keep
+        their configured timeouts. The response body is only logged through
+        ``payload_log``, sampled or while a trace is running.
+        """
+        budget = self.budget
+        if budget is not None and budget.retry_in > 0:
+            raise TuyaScaleRateLimitError(
+                f"{ERROR_RATE_LIMIT}: requests paused for {budget.retry_in:.0f} s"
+            )
+        breaker = self.breaker
+        if breaker is not None and not breaker.allow_request():
+            raise TuyaScaleCircuitOpenError(
+                f"{ERROR_CONN}: requests suspended for {breaker.retry_in:.0f} s"
+            )
+
+        # A half-open probe is released however the request ends, otherwise
+        # a cancelled probe would keep the region suspended for good
+        probe = breaker is not None and breaker.state == STATE_HALF_OPEN
+        try:
+            return await self._async_send(
+                method, path, access_token, metrics, params, json_body, timeout,
+                payload_log,
+            )
+        finally:
+            if probe:
+                breaker.release_probe()
+
+    async def _async_send(
+        self,
+        method: str,
+        path: str,
+        access_token: str | None,
+        metrics: TuyaScaleMetrics | None,
+        params: dict[str, Any] | None,
+        json_body: Any,
+        timeout: aiohttp.ClientTimeout | None,
+        payload_log: PayloadLogger | None,
+    ) -> tuple[int, dict]:
+        """Send a request the breaker let through and record its outcome."""
+        breaker = self.breaker
+        budget = self.budget
+        if budget is not None:
+            await budget.async_acquire()
+
+        start = time.perf_counter_ns()
+        path = build_path(path, params)
+        data = None
+        if json_body is not None:
+            data = json.dumps(json_body, separators=(',', ':')).encode('utf-8')
+        t = str(int(time.time() * 1000))
+        headers = {
+            'client_id': self.access_id,
+            'sign': self.signer.sign(t, method, path, access_token, data),
+            't': t,
+            'sign_method': SIGN_METHOD,
+        }
+        if access_token:
+            headers['access_token'] = access_token
+        if data is not None:
+            headers['Content-Type'] = 'application/json'
+
+        url = f"{self.endpoint}{path}"
+        logged_path = redact_path(path)
+        _LOGGER.debug("Making API request to %s%s", self.endpoint, logged_path)
+
+        try:
+            signed = time.perf_counter_ns()
+            async with self._session.request(
+                method, url, headers=headers, data=data, timeout=timeout or self._timeout
+            ) as response:
+                body = await response.read()
+                retry_after = _parse_retry_after(response.headers.get('Retry-After'))
+            received = time.perf_counter_ns()
+            try:
+                result = json.loads(body)
+            except ValueError:
+                result = {}
+            _LOGGER.debug("API response (%s) of %s", response.status, logged_path)
+            if payload_log is not None:
+                payload_log.log("API response", result)
+        except asyncio.TimeoutError as err:
+            if breaker is not None:
+                breaker.record_failure()
+            raise TuyaScaleConnectionError(ERROR_TIMEOUT) from err
+        except aiohttp.ClientError as err:
+            if breaker is not None:
+                breaker.record_failure()
+            raise TuyaScaleConnectionError(f"{ERROR_CONN}: {err}") from err
+
+        if metrics is not None:
+            metrics.observe(PHASE_SIGN, signed - start)
+            metrics.observe(PHASE_HTTP, received - signed)
+            metrics.observe(PHASE_PARSE, time.perf_counter_ns() - received)
+            metrics.bytes_received += len(body)
+            if response.status == 401:
+                metrics.unauthorized += 1
+
+        rate_limited = response.status == 429 or (
+            isinstance(result, dict) and result.get('code') in ERROR_CODES_RATE_LIMIT
+        )
+        # A rate limit pauses the project only, the region is answering
+        if budget is not None:
+            if rate_limited:
+                budget.record_rate_limit(retry_after)
+            else:
+                budget.record_success()
+        if breaker is not None:
+            if response.status >= 500:
+                breaker.record_failure(retry_after)
+            else:
+                breaker.record_success()
+        if rate_limited:
+            raise TuyaScaleRateLimitError(ERROR_RATE_LIMIT)
+
+        return response.status, result or {}
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    """Return the seconds of a Retry-After header, given as delay or date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TuyaScaleTokenManager:
+    """Keep one access token per Tuya project and region.
+
+    The token is refreshed with the refresh-token grant shortly before it
+    expires, so requests normally never see a 401. Concurrent callers wait
+    on the same lock and reuse the token minted by whoever got there first.
+    """
+
+    def __init__(self, client: TuyaScaleApiClient) -> None:
+        """Initialize the token manager."""
+        self.client = client
+        self._lock = asyncio.Lock()
+        self._access_token: str | None = None
+        self._refresh_token: str | None = None
+        self._expires_at = 0.0
+        self.tokens_minted = 0
+
+    @property
+    def _is_fresh(self) -> bool:
+        """Return True if the current token is not close to expiring."""
+        return (
+            self._access_token is not None
+            and time.monotonic() < self._expires_at - TOKEN_REFRESH_MARGIN
+        )
+
+    async def async_get_access_token(self) -> str:
+        """Return a valid access token, refreshing it if needed."""
+        if self._is_fresh:
+            return self._access_token
+
+        async with self._lock:
+            # Another caller may have refreshed while we were waiting
+            if not self._is_fresh:
+                await self._async_refresh()
+            return self._access_token
+
+    def invalidate(self, access_token: str) -> None:
+        """Forget a token the API rejected.
+
+        Only the token the caller actually used is dropped, so a late 401 for
+        an old token does not throw away one that was just minted.
+        """
+        if access_token == self._access_token:
+            self._access_token = None
+            self._expires_at = 0.0
+
+    async def _async_refresh(self) -> None:
+        """Refresh the token, minting a new one if the refresh grant fails."""
+        if self._refresh_token:
+            try:
+                await self._async_request_token(
+                    TOKEN_REFRESH_PATH.format(refresh_token=self._refresh_token)
+                )
+                return
+            except TuyaScaleConnectionError:
+                raise
+            except TuyaScaleApiError:
+                _LOGGER.debug("Refresh token rejected, requesting a new token")
+                self._refresh_token = None
+
+        await self._async_request_token(TOKEN_PATH)
+
+    async def _async_request_token(self, path: str) -> None:
+        """Request a token and store it with its expiry.
+
+        Only a Tuya credential error code means the credentials were
+        rejected. A server error is a connection error and anything else a
+        plain API error, so neither starts a reauthentication.
+        """
+        requested_at = time.monotonic()
+        status, result = await self.client.async_get(path)
+
+        if status != 200 or not result.get('success', False):
+            _LOGGER.error(
+                "Token request failed\n"
+                "Status code: %s\n"
+                "Response: %s",
+                status, result.get('msg')
+            )
+            if status >= 500:
+                raise TuyaScaleConnectionError(f"{ERROR_CONN}: HTTP error {status}")
+            if status == 200 and result.get('code') in ERROR_CODES_AUTH:
+                raise TuyaScaleAuthError(ERROR_AUTH)
+            raise TuyaScaleApiError(
+                f"Token request failed ({status}): {result.get('msg', '')}"
+            )
+
+        token = result['result']
+        self.tokens_minted += 1
+        self._access_token = token['access_token']
+        self._refresh_token = token.get('refresh_token')
+        self._expires_at = requested_at + token.get('expire_time', 0)
+        _LOGGER.debug("Got access token valid for %s s", token.get('expire_time'))
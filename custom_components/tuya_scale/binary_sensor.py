@@ -3,6 +3,7 @@ from homeassistant.components.binary_sensor import (
     BinarySensorEntity,
     BinarySensorDeviceClass,
 )
+from homeassistant.core import callback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import (
@@ -36,6 +37,7 @@ class TuyaScaleBinarySensor(CoordinatorEntity, BinarySensorEntity):
         """Initialize the binary sensor."""
         super().__init__(coordinator)
         self._key = key
+        self._last_available = None
         self._attr_name = name
         self._attr_device_class = device_class
         self._attr_icon = icon
@@ -53,4 +55,13 @@ class TuyaScaleBinarySensor(CoordinatorEntity, BinarySensorEntity):
         """Return true if the binary sensor is on."""
         if self.coordinator.data is None:
             return None
-        return self.coordinator.data.get(self._key, False)
+        record = self.coordinator.data.get(self._key)
+        return bool(record.value) if record is not None else False
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only when this entity's property or availability changed."""
+        available = self.available
+        if self._key in self.coordinator.changed_codes or available != self._last_available:
+            self._last_available = available
+            self.async_write_ha_state()
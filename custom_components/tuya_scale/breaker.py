@@ -0,0 +1,121 @@
+"""Circuit breaker guarding the requests to one Tuya region."""
+from __future__ import annotations
+
+import random
+import time
+
+from .const import (
+    BREAKER_BASE_BACKOFF,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_MAX_BACKOFF,
+)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+def jittered_backoff(attempt: int, base: float, maximum: float) -> float:
+    """Return an exponential delay with equal jitter for an attempt from 0.
+
+    Half of the delay is fixed and half is random, so clients that failed
+    together do not retry together while the delay still grows.
+    """
+    delay = min(maximum, base * 2 ** attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class CircuitBreaker:
+    """Stop sending requests to a region that keeps failing.
+
+    After ``threshold`` consecutive failures the breaker opens and requests
+    are refused until a jittered, exponentially growing backoff has passed,
+    or longer if the server asked for it with Retry-After. Then a single
+    probe request is let through: its success closes the breaker, its
+    failure opens it again for longer, and a probe that ends without an
+    answer, cancelled for example, lets the next request probe instead.
+    """
+
+    def __init__(
+        self,
+        threshold: int = BREAKER_FAILURE_THRESHOLD,
+        base_backoff: float = BREAKER_BASE_BACKOFF,
+        max_backoff: float = BREAKER_MAX_BACKOFF,
+    ) -> None:
+        """Initialize a closed breaker."""
+        self._threshold = threshold
+        self._base_backoff = base_backoff
+        self._max_backoff = max_backoff
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.opened = 0
+        self._open_until = 0.0
+        self._probing = False
+
+    @property
+    def retry_in(self) -> float:
+        """Return the seconds until requests are let through again."""
+        if self.state != STATE_OPEN:
+            return 0.0
+        return max(0.0, self._open_until - time.monotonic())
+
+    def allow_request(self) -> bool:
+        """Return True if a request may be sent now."""
+        if self.state == STATE_CLOSED:
+            return True
+        if self.state == STATE_OPEN:
+            if time.monotonic() < self._open_until:
+                return False
+            self.state = STATE_HALF_OPEN
+            self._probing = False
+        # Half open, only one probe at a time
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    @property
+    def probing(self) -> bool:
+        """Return True while a half-open probe is in flight."""
+        return self._probing
+
+    def release_probe(self) -> None:
+        """Let another request probe after one that got no answer."""
+        self._probing = False
+
+    def record_success(self) -> None:
+        """Close the breaker after a request the server answered."""
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.opened = 0
+        self._probing = False
+
+    def record_failure(self, retry_after: float | None = None) -> None:
+        """Count a failed request, opening the breaker if needed.
+
+        A ``retry_after`` from the server opens the breaker right away.
+        """
+        self.failures += 1
+        self._probing = False
+        if (
+            retry_after is None
+            and self.state == STATE_CLOSED
+            and self.failures < self._threshold
+        ):
+            return
+
+        backoff = jittered_backoff(self.opened, self._base_backoff, self._max_backoff)
+        if retry_after is not None:
+            backoff = max(backoff, retry_after)
+        self.opened += 1
+        self.state = STATE_OPEN
+        self._open_until = time.monotonic() + backoff
+
+    def as_dict(self) -> dict:
+        """Return the breaker's state as a dictionary."""
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "opened": self.opened,
+            "retry_in": self.retry_in,
+        }
@@ -0,0 +1,105 @@
+"""Request budget shared by every user of a Tuya project."""
+from __future__ import annotations
+
+import asyncio
+import time
+
+from .breaker import jittered_backoff
+from .const import (
+    RATE_LIMIT_BASE_BACKOFF,
+    RATE_LIMIT_MAX_BACKOFF,
+    REQUEST_BURST,
+    REQUEST_RATE,
+)
+
+
+class RequestBudget:
+    """Token bucket limiting the requests sent on behalf of one access ID.
+
+    Up to ``burst`` requests go out at once, after that one request per
+    ``1 / rate`` seconds. Callers queue on a fair lock, so the one that waited
+    longest is served first, and the time spent waiting is recorded.
+
+    When the server rate limits the project, its requests are paused for a
+    jittered backoff that grows with every consecutive rate limit, or for
+    as long as the server asked. The pause only affects this project, the
+    region's circuit breaker is left to server and transport errors.
+    """
+
+    def __init__(self, rate: float = REQUEST_RATE, burst: int = REQUEST_BURST) -> None:
+        """Initialize a full bucket."""
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.waiting = 0
+        self.throttled = 0
+        self.throttle_delay = 0.0
+        self.last_delay = 0.0
+        self.rate_limited = 0
+        self._backoffs = 0
+        self._paused_until = 0.0
+
+    @property
+    def retry_in(self) -> float:
+        """Return the seconds until the project may send requests again."""
+        return max(0.0, self._paused_until - time.monotonic())
+
+    def record_rate_limit(self, retry_after: float | None = None) -> None:
+        """Pause the project's requests after the server rate limited it."""
+        delay = jittered_backoff(
+            self._backoffs, RATE_LIMIT_BASE_BACKOFF, RATE_LIMIT_MAX_BACKOFF
+        )
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        self._backoffs += 1
+        self.rate_limited += 1
+        self._paused_until = time.monotonic() + delay
+
+    def record_success(self) -> None:
+        """Reset the backoff after a request that was not rate limited."""
+        self._backoffs = 0
+
+    def _refill(self) -> None:
+        """Add the tokens earned since the last refill."""
+        now = time.monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    async def async_acquire(self) -> None:
+        """Wait until a request may be sent."""
+        start = time.monotonic()
+        throttled = self._lock.locked()
+        self.waiting += 1
+        try:
+            async with self._lock:
+                self._refill()
+                if self._tokens < 1:
+                    throttled = True
+                    await asyncio.sleep((1 - self._tokens) / self._rate)
+                    self._refill()
+                self._tokens -= 1
+        finally:
+            self.waiting -= 1
+
+        if throttled:
+            delay = time.monotonic() - start
+            self.throttled += 1
+            self.throttle_delay += delay
+            self.last_delay = delay
+
+    def as_dict(self) -> dict:
+        """Return the budget's state as a dictionary."""
+        self._refill()
+        return {
+            "rate": self._rate,
+            "burst": self._burst,
+            "available": self._tokens,
+            "waiting": self.waiting,
+            "throttled": self.throttled,
+            "throttle_delay": self.throttle_delay,
+            "last_delay": self.last_delay,
+            "rate_limited": self.rate_limited,
+            "retry_in": self.retry_in,
+        }
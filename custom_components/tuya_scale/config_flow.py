@@ -1,35 +1,77 @@
 """Config flow for Tuya Scale integration."""
 from __future__ import annotations
 
+import asyncio
 import logging
+import uuid
 import voluptuous as vol
 
 from homeassistant import config_entries
+from homeassistant.const import CONF_HOST, CONF_NAME
 from homeassistant.core import HomeAssistant
-from homeassistant.data_entry_flow import FlowResult
+from homeassistant.data_entry_flow import FlowResult, FlowResultType
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import selector
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from .const import (
     DOMAIN,
     CONF_ACCESS_ID,
     CONF_ACCESS_KEY,
     CONF_DEVICE_ID,
+    CONF_DEVICES,
     CONF_REGION,
     CONF_SCAN_INTERVAL,
+    CONF_CONNECT_TIMEOUT,
+    CONF_READ_TIMEOUT,
+    CONF_ADAPTIVE_POLLING,
+    CONF_MAX_SCAN_INTERVAL,
     DEFAULT_SCAN_INTERVAL,
+    DEFAULT_ADAPTIVE_POLLING,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    CONF_PUSH_MODE,
+    DEFAULT_PUSH_MODE,
+    CONF_LOCAL_KEY,
+    LOCAL_KEY_LENGTH,
+    CONF_BACKFILL,
+    DEFAULT_BACKFILL,
+    CONF_OUTLIER_FILTER,
+    DEFAULT_OUTLIER_FILTER,
+    CONF_HEIGHT,
+    CONF_AGE,
+    CONF_SEX,
+    SEX_MALE,
+    SEX_FEMALE,
+    CONF_PROFILES,
+    CONF_PROFILE_ID,
+    CONF_WEIGHT,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
     REGIONS,
     DEFAULT_REGION,
+    DEVICE_LIST_PAGE_SIZE,
+    DEVICE_LIST_PATH,
+    ONBOARDING_CONCURRENCY,
+    SCALE_CATEGORIES,
 )
-from .coordinator import TuyaScaleDataUpdateCoordinator
+from .api import (
+    TuyaScaleApiClient,
+    TuyaScaleApiError,
+    TuyaScaleAuthError,
+    TuyaScaleTokenManager,
+)
+from .hub import async_get_token_manager
+from .transport import CloudTransport
 
 _LOGGER = logging.getLogger(__name__)
 
-STEP_USER_DATA_SCHEMA = vol.Schema(
+# Source of the flows the project flow starts for each chosen scale
+SOURCE_PROJECT_DEVICE = "project_device"
+
+STEP_PROJECT_DATA_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_ACCESS_ID): str,
         vol.Required(CONF_ACCESS_KEY): str,
-        vol.Required(CONF_DEVICE_ID): str,
         vol.Required(CONF_REGION, default=DEFAULT_REGION): selector.SelectSelector(
             selector.SelectSelectorConfig(
                 options=list(REGIONS.keys()),
@@ -50,27 +92,78 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
     }
 )
 
-async def validate_input(hass: HomeAssistant, data: dict) -> dict:
-    """Validate the user input allows us to connect."""
-    # MockConfigEntry'yi options ile birlikte oluştur
-    mock_config = type('MockConfigEntry', (), {
-        'data': data,
-        'options': {
-            CONF_SCAN_INTERVAL: data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
-        }
-    })()
-
-    coordinator = TuyaScaleDataUpdateCoordinator(
-        hass,
-        mock_config
+STEP_USER_DATA_SCHEMA = STEP_PROJECT_DATA_SCHEMA.extend(
+    {vol.Required(CONF_DEVICE_ID): str}
+)
+
+
+async def async_get_project_tokens(hass: HomeAssistant, data: dict) -> TuyaScaleTokenManager:
+    """Authenticate against a project and return its shared token manager.
+
+    The manager is the one the entries of the project use afterwards, so
+    the token minted here is not minted again when they are set up.
+    """
+    client = TuyaScaleApiClient(
+        async_get_clientsession(hass),
+        REGIONS[data[CONF_REGION]],
+        data[CONF_ACCESS_ID],
+        data[CONF_ACCESS_KEY],
     )
+    tokens = async_get_token_manager(hass, data[CONF_REGION], client)
+    try:
+        await tokens.async_get_access_token()
+    except TuyaScaleAuthError as err:
+        raise InvalidAuth from err
+    except TuyaScaleApiError as err:
+        raise CannotConnect from err
+    return tokens
+
 
+async def async_validate_device(tokens: TuyaScaleTokenManager, device_id: str) -> None:
+    """Check that a device's properties can be read."""
     try:
-        await coordinator.async_refresh()
-    except Exception as err:
-        _LOGGER.error("Validation error: %s", err)
+        await CloudTransport(tokens.client, tokens, device_id).async_get_properties()
+    except TuyaScaleApiError as err:
+        _LOGGER.error("Validation of %s failed: %s", device_id, err)
         raise CannotConnect from err
 
+
+async def async_discover_scales(tokens: TuyaScaleTokenManager) -> dict[str, str]:
+    """Return the id and name of every scale of a project, page by page."""
+    devices = {}
+    others = {}
+    row_key = None
+    while True:
+        params = {"size": DEVICE_LIST_PAGE_SIZE}
+        if row_key:
+            params["last_row_key"] = row_key
+        access_token = await tokens.async_get_access_token()
+        status, result = await tokens.client.async_get(
+            DEVICE_LIST_PATH, access_token, params=params
+        )
+        if status != 200 or not result.get("success", False):
+            _LOGGER.error("Device list request failed (%s): %s", status, result.get("msg"))
+            raise CannotConnect
+
+        page = result.get("result", {})
+        for device in page.get("devices", []):
+            name = f"{device.get('name') or device['id']} ({device['id']})"
+            if device.get("category") in SCALE_CATEGORIES:
+                devices[device["id"]] = name
+            else:
+                others[device["id"]] = name
+        row_key = page.get("last_row_key")
+        if not page.get("has_more") or not row_key:
+            break
+
+    # Unknown scale models are offered too when no device matched
+    return devices or others
+
+
+async def validate_input(hass: HomeAssistant, data: dict) -> dict:
+    """Validate the user input allows us to connect."""
+    tokens = await async_get_project_tokens(hass, data)
+    await async_validate_device(tokens, data[CONF_DEVICE_ID])
     return {"title": f"Tuya Scale ({data[CONF_DEVICE_ID]})"}
 
 class TuyaScaleOptionsFlow(config_entries.OptionsFlow):
@@ -82,16 +175,37 @@ class TuyaScaleOptionsFlow(config_entries.OptionsFlow):
 
     async def async_step_init(self, user_input=None):
         """Manage the options."""
+        return self.async_show_menu(
+            step_id="init",
+            menu_options=["settings", "add_profile", "remove_profile"],
+        )
+
+    async def async_step_settings(self, user_input=None):
+        """Manage the polling, connection and body composition settings."""
+        errors = {}
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            # The local key is the AES-128 key of the LAN protocol
+            local_key = user_input.get(CONF_LOCAL_KEY)
+            if local_key and len(local_key.encode("utf-8")) != LOCAL_KEY_LENGTH:
+                errors[CONF_LOCAL_KEY] = "invalid_local_key"
+            else:
+                # Kişi profilleri bu formda değil, onları koru
+                data = {
+                    key: value
+                    for key, value in self.config_entry.options.items()
+                    if key == CONF_PROFILES
+                }
+                data.update(user_input)
+                return self.async_create_entry(title="", data=data)
 
+        options = {**self.config_entry.options, **(user_input or {})}
         return self.async_show_form(
-            step_id="init",
+            step_id="settings",
             data_schema=vol.Schema(
                 {
                     vol.Optional(
                         CONF_SCAN_INTERVAL,
-                        default=self.config_entry.options.get(
+                        default=options.get(
                             CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL
                         )
                     ): selector.NumberSelector(
@@ -102,6 +216,206 @@ class TuyaScaleOptionsFlow(config_entries.OptionsFlow):
                             mode=selector.NumberSelectorMode.BOX
                         )
                     ),
+                    vol.Optional(
+                        CONF_ADAPTIVE_POLLING,
+                        default=options.get(
+                            CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING
+                        )
+                    ): selector.BooleanSelector(),
+                    vol.Optional(
+                        CONF_MAX_SCAN_INTERVAL,
+                        default=options.get(
+                            CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL
+                        )
+                    ): selector.NumberSelector(
+                        selector.NumberSelectorConfig(
+                            min=1,
+                            max=240,
+                            step=1,
+                            mode=selector.NumberSelectorMode.BOX
+                        )
+                    ),
+                    vol.Optional(
+                        CONF_PUSH_MODE,
+                        default=options.get(
+                            CONF_PUSH_MODE, DEFAULT_PUSH_MODE
+                        )
+                    ): selector.BooleanSelector(),
+                    vol.Optional(
+                        CONF_BACKFILL,
+                        default=options.get(
+                            CONF_BACKFILL, DEFAULT_BACKFILL
+                        )
+                    ): selector.BooleanSelector(),
+                    vol.Optional(
+                        CONF_OUTLIER_FILTER,
+                        default=options.get(
+                            CONF_OUTLIER_FILTER, DEFAULT_OUTLIER_FILTER
+                        )
+                    ): selector.BooleanSelector(),
+                    vol.Optional(
+                        CONF_HEIGHT,
+                        description={
+                            "suggested_value": options.get(CONF_HEIGHT)
+                        }
+                    ): selector.NumberSelector(
+                        selector.NumberSelectorConfig(
+                            min=50,
+                            max=250,
+                            step=1,
+                            unit_of_measurement="cm",
+                            mode=selector.NumberSelectorMode.BOX
+                        )
+                    ),
+                    vol.Optional(
+                        CONF_AGE,
+                        description={
+                            "suggested_value": options.get(CONF_AGE)
+                        }
+                    ): selector.NumberSelector(
+                        selector.NumberSelectorConfig(
+                            min=6,
+                            max=120,
+                            step=1,
+                            mode=selector.NumberSelectorMode.BOX
+                        )
+                    ),
+                    vol.Optional(
+                        CONF_SEX,
+                        default=options.get(CONF_SEX, SEX_MALE)
+                    ): selector.SelectSelector(
+                        selector.SelectSelectorConfig(
+                            options=[SEX_MALE, SEX_FEMALE],
+                            mode=selector.SelectSelectorMode.DROPDOWN
+                        )
+                    ),
+                    vol.Optional(
+                        CONF_HOST,
+                        description={
+                            "suggested_value": options.get(CONF_HOST)
+                        }
+                    ): str,
+                    vol.Optional(
+                        CONF_LOCAL_KEY,
+                        description={
+                            "suggested_value": options.get(CONF_LOCAL_KEY)
+                        }
+                    ): str,
+                    vol.Optional(
+                        CONF_CONNECT_TIMEOUT,
+                        default=options.get(
+                            CONF_CONNECT_TIMEOUT, DEFAULT_CONNECT_TIMEOUT
+                        )
+                    ): selector.NumberSelector(
+                        selector.NumberSelectorConfig(
+                            min=1,
+                            max=60,
+                            step=1,
+                            mode=selector.NumberSelectorMode.BOX
+                        )
+                    ),
+                    vol.Optional(
+                        CONF_READ_TIMEOUT,
+                        default=options.get(
+                            CONF_READ_TIMEOUT, DEFAULT_READ_TIMEOUT
+                        )
+                    ): selector.NumberSelector(
+                        selector.NumberSelectorConfig(
+                            min=1,
+                            max=120,
+                            step=1,
+                            mode=selector.NumberSelectorMode.BOX
+                        )
+                    ),
+                }
+            ),
+            errors=errors,
+        )
+
+    async def async_step_add_profile(self, user_input=None):
+        """Add a person sharing the scale."""
+        if user_input is not None:
+            profiles = list(self.config_entry.options.get(CONF_PROFILES, []))
+            profiles.append({CONF_PROFILE_ID: uuid.uuid4().hex[:8], **user_input})
+            return self.async_create_entry(
+                title="", data={**self.config_entry.options, CONF_PROFILES: profiles}
+            )
+
+        return self.async_show_form(
+            step_id="add_profile",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(CONF_NAME): str,
+                    vol.Required(CONF_WEIGHT): selector.NumberSelector(
+                        selector.NumberSelectorConfig(
+                            min=2,
+                            max=300,
+                            step=0.1,
+                            unit_of_measurement="kg",
+                            mode=selector.NumberSelectorMode.BOX
+                        )
+                    ),
+                    vol.Optional(CONF_HEIGHT): selector.NumberSelector(
+                        selector.NumberSelectorConfig(
+                            min=50,
+                            max=250,
+                            step=1,
+                            unit_of_measurement="cm",
+                            mode=selector.NumberSelectorMode.BOX
+                        )
+                    ),
+                    vol.Optional(CONF_AGE): selector.NumberSelector(
+                        selector.NumberSelectorConfig(
+                            min=6,
+                            max=120,
+                            step=1,
+                            mode=selector.NumberSelectorMode.BOX
+                        )
+                    ),
+                    vol.Optional(CONF_SEX, default=SEX_MALE): selector.SelectSelector(
+                        selector.SelectSelectorConfig(
+                            options=[SEX_MALE, SEX_FEMALE],
+                            mode=selector.SelectSelectorMode.DROPDOWN
+                        )
+                    ),
+                }
+            ),
+        )
+
+    async def async_step_remove_profile(self, user_input=None):
+        """Remove people sharing the scale."""
+        profiles = self.config_entry.options.get(CONF_PROFILES, [])
+
+        if user_input is not None:
+            removed = set(user_input[CONF_PROFILES])
+            return self.async_create_entry(
+                title="",
+                data={
+                    **self.config_entry.options,
+                    CONF_PROFILES: [
+                        profile for profile in profiles
+                        if profile[CONF_PROFILE_ID] not in removed
+                    ],
+                },
+            )
+
+        return self.async_show_form(
+            step_id="remove_profile",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(CONF_PROFILES, default=[]): selector.SelectSelector(
+                        selector.SelectSelectorConfig(
+                            options=[
+                                selector.SelectOptionDict(
+                                    value=profile[CONF_PROFILE_ID],
+                                    label=profile[CONF_NAME],
+                                )
+                                for profile in profiles
+                            ],
+                            multiple=True,
+                            mode=selector.SelectSelectorMode.LIST
+                        )
+                    ),
                 }
             ),
         )
@@ -111,10 +425,22 @@ class TuyaScaleConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    def __init__(self) -> None:
+        """Initialize the config flow."""
+        self._project: dict | None = None
+        self._tokens: TuyaScaleTokenManager | None = None
+        self._devices: dict[str, str] = {}
+
     async def async_step_user(
         self, user_input: dict[str, any] | None = None
     ) -> FlowResult:
-        """Handle the initial step."""
+        """Choose between adding one scale and every scale of a project."""
+        return self.async_show_menu(step_id="user", menu_options=["device", "project"])
+
+    async def async_step_device(
+        self, user_input: dict[str, any] | None = None
+    ) -> FlowResult:
+        """Add a single scale."""
         errors = {}
 
         if user_input is not None:
@@ -133,9 +459,112 @@ class TuyaScaleConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 return self.async_create_entry(title=info["title"], data=user_input)
 
         return self.async_show_form(
-            step_id="user", data_schema=STEP_USER_DATA_SCHEMA, errors=errors
+            step_id="device", data_schema=STEP_USER_DATA_SCHEMA, errors=errors
         )
 
+    async def async_step_project(
+        self, user_input: dict[str, any] | None = None
+    ) -> FlowResult:
+        """Authenticate once and discover every scale of a project."""
+        errors = {}
+
+        if user_input is not None:
+            try:
+                self._tokens = await async_get_project_tokens(self.hass, user_input)
+                devices = await async_discover_scales(self._tokens)
+            except CannotConnect:
+                errors["base"] = "cannot_connect"
+            except InvalidAuth:
+                errors["base"] = "invalid_auth"
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Unexpected exception")
+                errors["base"] = "unknown"
+            else:
+                configured = self._async_current_ids()
+                self._devices = {
+                    device_id: name
+                    for device_id, name in devices.items()
+                    if device_id not in configured
+                }
+                if not self._devices:
+                    return self.async_abort(reason="no_devices")
+                self._project = user_input
+                return await self.async_step_select_devices()
+
+        return self.async_show_form(
+            step_id="project", data_schema=STEP_PROJECT_DATA_SCHEMA, errors=errors
+        )
+
+    async def async_step_select_devices(
+        self, user_input: dict[str, any] | None = None
+    ) -> FlowResult:
+        """Add one entry for each chosen scale and report the skipped ones.
+
+        Every scale gets a flow of its own that validates it and creates its
+        entry, the scales that fail validation are listed in the result.
+        """
+        errors = {}
+
+        if user_input is not None:
+            device_ids = user_input[CONF_DEVICES]
+            semaphore = asyncio.Semaphore(ONBOARDING_CONCURRENCY)
+
+            async def async_add(device_id: str) -> bool:
+                async with semaphore:
+                    result = await self.hass.config_entries.flow.async_init(
+                        DOMAIN,
+                        context={"source": SOURCE_PROJECT_DEVICE},
+                        data={**self._project, CONF_DEVICE_ID: device_id},
+                    )
+                return result["type"] == FlowResultType.CREATE_ENTRY
+
+            results = await asyncio.gather(*(async_add(d) for d in device_ids))
+            skipped = [self._devices[d] for d, added in zip(device_ids, results) if not added]
+            if len(skipped) < len(device_ids):
+                if not skipped:
+                    return self.async_abort(reason="devices_added")
+                return self.async_abort(
+                    reason="devices_skipped",
+                    description_placeholders={"skipped": ", ".join(skipped)},
+                )
+            errors["base"] = "cannot_connect"
+
+        return self.async_show_form(
+            step_id="select_devices",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_DEVICES, default=list(self._devices)
+                    ): selector.SelectSelector(
+                        selector.SelectSelectorConfig(
+                            options=[
+                                selector.SelectOptionDict(value=device_id, label=name)
+                                for device_id, name in self._devices.items()
+                            ],
+                            multiple=True,
+                            mode=selector.SelectSelectorMode.LIST
+                        )
+                    ),
+                }
+            ),
+            errors=errors,
+        )
+
+    async def async_step_project_device(self, device_data: dict[str, any]) -> FlowResult:
+        """Validate and add a scale chosen in the project flow."""
+        await self.async_set_unique_id(device_data[CONF_DEVICE_ID])
+        self._abort_if_unique_id_configured()
+
+        try:
+            info = await validate_input(self.hass, device_data)
+        except (CannotConnect, InvalidAuth):
+            return self.async_abort(reason="cannot_connect")
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Unexpected exception")
+            return self.async_abort(reason="unknown")
+
+        return self.async_create_entry(title=info["title"], data=device_data)
+
     @staticmethod
     @config_entries.HANDLERS.register(DOMAIN)
     def async_get_options_flow(config_entry):
@@ -1,22 +1,176 @@
 """Constants for the Tuya Scale integration."""
 from datetime import timedelta
 from homeassistant.const import (
+    PERCENTAGE,
     Platform,
+    UnitOfInformation,
     UnitOfMass,
+    UnitOfTime,
 )
 
 DOMAIN = "tuya_scale"
+DATA_HUBS = f"{DOMAIN}_hubs"
+DATA_TOKENS = f"{DOMAIN}_tokens"
+DATA_BREAKERS = f"{DOMAIN}_breakers"
+DATA_BUDGETS = f"{DOMAIN}_budgets"
 PLATFORMS = [Platform.SENSOR]
 # Eski SCAN_INTERVAL sabitini kaldırıp yerine aşağıdaki iki satırı ekliyoruz
 DEFAULT_SCAN_INTERVAL = 1  # Varsayılan değer (dakika cinsinden)
 CONF_SCAN_INTERVAL = "scan_interval"  # Yeni yapılandırma sabiti
 
+# Adaptive polling
+CONF_ADAPTIVE_POLLING = "adaptive_polling"
+CONF_MAX_SCAN_INTERVAL = "max_scan_interval"
+DEFAULT_ADAPTIVE_POLLING = False
+DEFAULT_MAX_SCAN_INTERVAL = 30  # minutes
+ADAPTIVE_BURST_INTERVAL = 10  # seconds between polls right after a weigh-in
+ADAPTIVE_BURST_DURATION = 60  # seconds of fast polling after a weigh-in
+ADAPTIVE_HABIT_DECAY = 0.95  # weight kept by older weigh-ins per new one
+ADAPTIVE_HABIT_MIN_MEASUREMENTS = 3
+ADAPTIVE_HABIT_SHARE = 0.15  # share of weigh-ins that makes an hour habitual
+
+# Push mode
+CONF_PUSH_MODE = "push_mode"
+DEFAULT_PUSH_MODE = False
+PUSH_RECONCILE_INTERVAL = 30 * 60  # seconds between polls while push is connected
+PUSH_RECONNECT_MIN = 5  # seconds
+PUSH_RECONNECT_MAX = 300  # seconds
+
+# Local LAN transport
+CONF_LOCAL_KEY = "local_key"
+LOCAL_PORT = 6668
+LOCAL_TIMEOUT = 5  # seconds
+LOCAL_KEY_LENGTH = 16  # bytes
+LOCAL_RETRY_INTERVAL = 5 * 60  # seconds to stay on the cloud after a local failure
+
+# History backfill
+CONF_BACKFILL = "backfill"
+DEFAULT_BACKFILL = False
+BACKFILL_INTERVAL = 6 * 3600  # seconds between backfill runs
+BACKFILL_MAX_AGE = 7 * 24 * 3600  # seconds of history fetched on the first run
+BACKFILL_PAGE_SIZE = 100
+
+# Body composition profile
+CONF_HEIGHT = "height"  # cm
+CONF_AGE = "age"  # years
+CONF_SEX = "sex"
+SEX_MALE = "male"
+SEX_FEMALE = "female"
+BODY_COMPOSITION_CODES = (
+    "body_fat",
+    "muscle_mass",
+    "body_water",
+    "bone_mass",
+    "visceral_fat",
+    "bmr",
+    "metabolic_age",
+)
+
+# People sharing the scale
+CONF_PROFILES = "profiles"
+CONF_PROFILE_ID = "id"
+CONF_WEIGHT = "weight"  # usual weight in kg, seeds the matcher
+MATCH_WINDOW = 20  # recent measurements kept per person
+MATCH_MIN_WEIGHT_STD = 1.5  # kg
+MATCH_MIN_IMPEDANCE_STD = 25.0  # ohm
+ASSIGNMENT_HISTORY = 50  # measurements that can still be reassigned
+
+# Debug logging
+LOG_SAMPLE_EVERY = 10  # polls per logged payload outside a trace
+LOG_MAX_PAYLOAD = 2048  # characters of a payload written to the log
+TRACE_MAX_POLLS = 100
+TRACE_CAPTURE_SIZE = 50  # payloads of a trace kept for the diagnostics
+
+# Weight trends
+TREND_WINDOWS = (7, 30, 90)  # days of the rolling statistics
+TREND_PROCESS_NOISE = 0.01  # kg² the true weight drifts per day
+TREND_MEASUREMENT_NOISE = 0.5  # kg² of day to day fluctuation
+
+# Outlier rejection
+CONF_OUTLIER_FILTER = "outlier_filter"
+DEFAULT_OUTLIER_FILTER = True
+HAMPEL_WINDOW = 15  # recent weigh-ins of a person the median and MAD are taken over
+HAMPEL_MIN_SAMPLES = 5  # weigh-ins before a weight can be rejected
+HAMPEL_THRESHOLD = 4.0  # scaled MADs a weight may differ from the median
+HAMPEL_MIN_DEVIATION = 1.0  # kg, lower bound of the scaled MAD
+HAMPEL_SHIFT_COUNT = 3  # agreeing rejected weigh-ins that make a new level
+IMPEDANCE_MIN = 100  # Ω, plausible impedance range of a human body
+IMPEDANCE_MAX = 1500  # Ω
+
+# Weigh-in sessions
+EVENT_MEASUREMENT = f"{DOMAIN}_measurement"
+SESSION_WINDOW = 30  # seconds an incomplete weigh-in waits for its properties
+
+# Services
+SERVICE_REASSIGN_MEASUREMENT = "reassign_measurement"
+SERVICE_TRACE_POLLS = "trace_polls"
+ATTR_DEVICE_ID = "device_id"
+ATTR_PROFILE = "profile"
+ATTR_TIMESTAMP = "timestamp"
+ATTR_POLLS = "polls"
+
+# Last known state cache
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 30  # seconds changes are collected before a write
+
+# HTTP timeouts (seconds)
+CONF_CONNECT_TIMEOUT = "connect_timeout"
+CONF_READ_TIMEOUT = "read_timeout"
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_READ_TIMEOUT = 20
+
+# Upper bound of simultaneous requests per Tuya project and region
+DEFAULT_MAX_CONCURRENT_REQUESTS = 5
+
+# Request budget of a Tuya project, shared by all its entries and regions
+REQUEST_RATE = 5  # requests per second
+REQUEST_BURST = 10  # requests sent at once before the rate applies
+RATE_LIMIT_BASE_BACKOFF = 30  # seconds the project first pauses when rate limited
+RATE_LIMIT_MAX_BACKOFF = 30 * 60  # seconds
+STAGGER_STARTUP = 30  # seconds the first polls after a start are spread over
+
+# Circuit breaker and retries of the requests to a region
+BREAKER_FAILURE_THRESHOLD = 5  # consecutive failures that open the breaker
+BREAKER_BASE_BACKOFF = 30  # seconds the breaker first stays open
+BREAKER_MAX_BACKOFF = 30 * 60  # seconds
+RETRY_BASE_DELAY = 2  # seconds before the first retry of a failed poll
+RETRY_MAX_DELAY = 30  # seconds
+STALE_MAX_AGE = 6 * 3600  # seconds the last data is served while polls fail
+
 # Configuration
 CONF_ACCESS_ID = "access_id"
 CONF_ACCESS_KEY = "access_key"
 CONF_DEVICE_ID = "device_id"
 CONF_REGION = "region"
 
+# Options applied to a running entry, changing any other one reloads it
+LIVE_OPTIONS = frozenset({
+    CONF_SCAN_INTERVAL,
+    CONF_ADAPTIVE_POLLING,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_PUSH_MODE,
+    CONF_OUTLIER_FILTER,
+    CONF_HEIGHT,
+    CONF_AGE,
+    CONF_SEX,
+    CONF_CONNECT_TIMEOUT,
+    CONF_READ_TIMEOUT,
+})
+
+# Value of an option that is not set, so saving the defaults changes nothing
+OPTION_DEFAULTS = {
+    CONF_SCAN_INTERVAL: DEFAULT_SCAN_INTERVAL,
+    CONF_ADAPTIVE_POLLING: DEFAULT_ADAPTIVE_POLLING,
+    CONF_MAX_SCAN_INTERVAL: DEFAULT_MAX_SCAN_INTERVAL,
+    CONF_PUSH_MODE: DEFAULT_PUSH_MODE,
+    CONF_BACKFILL: DEFAULT_BACKFILL,
+    CONF_OUTLIER_FILTER: DEFAULT_OUTLIER_FILTER,
+    CONF_SEX: SEX_MALE,
+    CONF_CONNECT_TIMEOUT: DEFAULT_CONNECT_TIMEOUT,
+    CONF_READ_TIMEOUT: DEFAULT_READ_TIMEOUT,
+    CONF_PROFILES: [],
+}
+
 # API Region
 DEFAULT_REGION = "EU"
 REGIONS = {
@@ -26,9 +180,46 @@ REGIONS = {
     "IN": "https://openapi.tuyain.com"
 }
 
+# Tuya message service (push) endpoints
+MQ_ENDPOINTS = {
+    "EU": "wss://mqe.tuyaeu.com:8285/",
+    "US": "wss://mqe.tuyaus.com:8285/",
+    "CN": "wss://mqe.tuyacn.com:8285/",
+    "IN": "wss://mqe.tuyain.com:8285/"
+}
+PUSH_TOPIC_PATH = (
+    "ws/v2/consumer/persistent/{access_id}/out/event/{access_id}-sub"
+    "?ackTimeoutMillis=3000&subscriptionType=Failover"
+)
+
 # API Paths
 TOKEN_PATH = "/v1.0/token?grant_type=1"
+TOKEN_REFRESH_PATH = "/v1.0/token/{refresh_token}"
 DEVICE_DATA_PATH = "/v2.0/cloud/thing/{device_id}/shadow/properties"
+REPORT_LOGS_PATH = "/v2.0/cloud/thing/{device_id}/report-logs"
+SPECIFICATION_PATH = "/v1.2/iot-03/devices/{device_id}/specification"
+DEVICE_LIST_PATH = "/v1.0/iot-01/associated-users/devices"
+
+# Onboarding every scale of a project
+CONF_DEVICES = "devices"
+SCALE_CATEGORIES = ("tzc1",)  # Tuya category of body fat scales
+DEVICE_LIST_PAGE_SIZE = 100
+ONBOARDING_CONCURRENCY = 5  # devices validated at the same time
+
+# Seconds before a failed specification request is tried again
+SCHEMA_RETRY_INTERVAL = 3600
+
+# Refresh the access token this many seconds before it expires
+TOKEN_REFRESH_MARGIN = 300
+
+# Tuya error code for an invalid or expired access token
+ERROR_CODE_TOKEN_INVALID = 1010
+
+# Tuya error codes of rejected credentials, signatures and tokens
+ERROR_CODES_AUTH = range(1000, 2000)
+
+# Tuya error codes for a project that sends too many requests
+ERROR_CODES_RATE_LIMIT = (40000309,)
 
 # Device Info
 DEFAULT_NAME = "Tuya Smart Scale"
@@ -37,11 +228,13 @@ DEFAULT_MODEL = "Smart Scale"
 
 # Measurement Units
 UNIT_RESISTANCE = "Ω"
+UNIT_KILOCALORIES = "kcal"
 
 # Error Messages
 ERROR_AUTH = "Authentication failed"
 ERROR_CONN = "Failed to connect"
 ERROR_TIMEOUT = "Connection timeout"
+ERROR_RATE_LIMIT = "Request quota exceeded"
 
 # Current values
 CURRENT_USER = "Korkuttum"
@@ -52,7 +245,8 @@ SENSOR_TYPES = {
     "weight": {
         "key": "weight",
         "name": "Weight",
-        "unit": UnitOfMass.GRAMS,
+        "unit": UnitOfMass.KILOGRAMS,
+        "suggested_unit": UnitOfMass.GRAMS,
         "icon": "mdi:scale-bathroom",
         "device_class": "weight",
         "state_class": "measurement",
@@ -98,6 +292,56 @@ SENSOR_TYPES = {
         "icon": "mdi:omega",
         "state_class": "measurement",
     },
+    "body_fat": {
+        "key": "body_fat",
+        "name": "Body Fat",
+        "unit": PERCENTAGE,
+        "icon": "mdi:water-percent",
+        "state_class": "measurement",
+    },
+    "muscle_mass": {
+        "key": "muscle_mass",
+        "name": "Muscle Mass",
+        "unit": UnitOfMass.KILOGRAMS,
+        "icon": "mdi:arm-flex",
+        "device_class": "weight",
+        "state_class": "measurement",
+    },
+    "body_water": {
+        "key": "body_water",
+        "name": "Body Water",
+        "unit": PERCENTAGE,
+        "icon": "mdi:water",
+        "state_class": "measurement",
+    },
+    "bone_mass": {
+        "key": "bone_mass",
+        "name": "Bone Mass",
+        "unit": UnitOfMass.KILOGRAMS,
+        "icon": "mdi:bone",
+        "device_class": "weight",
+        "state_class": "measurement",
+    },
+    "visceral_fat": {
+        "key": "visceral_fat",
+        "name": "Visceral Fat",
+        "icon": "mdi:human",
+        "state_class": "measurement",
+    },
+    "bmr": {
+        "key": "bmr",
+        "name": "Basal Metabolic Rate",
+        "unit": UNIT_KILOCALORIES,
+        "icon": "mdi:fire",
+        "state_class": "measurement",
+    },
+    "metabolic_age": {
+        "key": "metabolic_age",
+        "name": "Metabolic Age",
+        "unit": UnitOfTime.YEARS,
+        "icon": "mdi:calendar-account",
+        "state_class": "measurement",
+    },
     "battery": {
         "key": "battery",
         "name": "Battery Status",
@@ -105,3 +349,73 @@ SENSOR_TYPES = {
         "device_class": "battery",
     },
 }
+
+# Diagnostic Sensor Types
+DIAGNOSTIC_SENSOR_TYPES = {
+    "poll_duration": {
+        "key": "poll_duration",
+        "name": "Last Poll Duration",
+        "unit": UnitOfTime.MILLISECONDS,
+        "icon": "mdi:timer-outline",
+        "state_class": "measurement",
+    },
+    "tokens_minted": {
+        "key": "tokens_minted",
+        "name": "Tokens Minted",
+        "icon": "mdi:key-chain",
+        "state_class": "total_increasing",
+    },
+    "retries": {
+        "key": "retries",
+        "name": "Poll Retries",
+        "icon": "mdi:refresh",
+        "state_class": "total_increasing",
+    },
+    "unauthorized": {
+        "key": "unauthorized",
+        "name": "Unauthorized Responses",
+        "icon": "mdi:lock-alert",
+        "state_class": "total_increasing",
+    },
+    "bytes_received": {
+        "key": "bytes_received",
+        "name": "Bytes Received",
+        "unit": UnitOfInformation.BYTES,
+        "icon": "mdi:download-network",
+        "state_class": "total_increasing",
+    },
+    "rejected_readings": {
+        "key": "rejected_readings",
+        "name": "Rejected Readings",
+        "icon": "mdi:filter-remove-outline",
+        "state_class": "total_increasing",
+    },
+    "last_error": {
+        "key": "last_error",
+        "name": "Last Error",
+        "icon": "mdi:alert-circle-outline",
+    },
+}
+
+# Weight trend sensors, keyed by the suffix of their data key
+TREND_SENSOR_TYPES = {
+    "trend": {
+        "name": "Weight Trend",
+        "icon": "mdi:chart-bell-curve-cumulative",
+        "enabled": True,
+    },
+    "change_7d": {
+        "name": "Weekly Weight Change",
+        "icon": "mdi:trending-up",
+        "enabled": True,
+    },
+    **{
+        f"{stat}_{days}d": {
+            "name": f"{days} Day {label} Weight",
+            "icon": "mdi:chart-line",
+            "enabled": stat == "mean",
+        }
+        for days in TREND_WINDOWS
+        for stat, label in (("mean", "Mean"), ("min", "Minimum"), ("max", "Maximum"))
+    },
+}
@@ -2,280 +2,728 @@
 from __future__ import annotations
 import logging
 import time
-import hmac
-import hashlib
-import requests
-import json
 import asyncio
-from datetime import datetime, timedelta
+from collections.abc import Callable
+from datetime import timedelta
 
-from homeassistant.core import HomeAssistant
+from typing import TYPE_CHECKING
+
+from homeassistant.const import CONF_HOST, CONF_NAME
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
     UpdateFailed,
 )
-from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.exceptions import ConfigEntryAuthFailed, HomeAssistantError
 from homeassistant.config_entries import ConfigEntry
 
 from .const import (
     DOMAIN,
+    LIVE_OPTIONS,
+    OPTION_DEFAULTS,
     DEFAULT_SCAN_INTERVAL,
     CONF_SCAN_INTERVAL,
+    CONF_ADAPTIVE_POLLING,
+    CONF_MAX_SCAN_INTERVAL,
+    DEFAULT_ADAPTIVE_POLLING,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    CONF_PUSH_MODE,
+    DEFAULT_PUSH_MODE,
+    PUSH_RECONCILE_INTERVAL,
+    RETRY_BASE_DELAY,
+    SCHEMA_RETRY_INTERVAL,
+    RETRY_MAX_DELAY,
+    STALE_MAX_AGE,
+    STORAGE_SAVE_DELAY,
+    STORAGE_VERSION,
     REGIONS,
-    TOKEN_PATH,
-    DEVICE_DATA_PATH,
     CONF_ACCESS_ID,
     CONF_ACCESS_KEY,
     CONF_DEVICE_ID,
     CONF_REGION,
+    CONF_CONNECT_TIMEOUT,
+    CONF_READ_TIMEOUT,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
     ERROR_AUTH,
-    ERROR_CONN,
+    CONF_LOCAL_KEY,
+    LOCAL_RETRY_INTERVAL,
+    CONF_HEIGHT,
+    CONF_AGE,
+    CONF_SEX,
+    SEX_MALE,
+    BODY_COMPOSITION_CODES,
+    CONF_PROFILES,
+    CONF_OUTLIER_FILTER,
+    DEFAULT_OUTLIER_FILTER,
+    EVENT_MEASUREMENT,
+    SESSION_WINDOW,
+)
+from .api import (
+    TuyaScaleApiError,
+    TuyaScaleAuthError,
+    TuyaScaleCircuitOpenError,
+    TuyaScaleConnectionError,
+    TuyaScaleRateLimitError,
+    client_timeout,
 )
+from .breaker import jittered_backoff
+from .transport import CloudTransport, LocalTransport, TuyaScaleTransport
+from .body_composition import body_composition
+from .metrics import PHASE_POLL, PHASE_PROCESS, TuyaScaleMetrics
+from .models import PropertyRecord
+from .outliers import FILTERED_CODES, OutlierFilter
+from .profiles import PersonTracker, person_key
+from .schema import DecoderTable, async_fetch_decoders
+from .session import SESSION_CODES, MeasurementSession, SessionAssembler
+from .trends import TrendTracker
+from .scheduler import AdaptivePollScheduler
+from .tracing import LazyJson, PayloadLogger
 
-_LOGGER = logging.getLogger(__name__)
+if TYPE_CHECKING:
+    from .hub import TuyaScaleHub
 
-def make_api_request(url: str, headers: dict) -> requests.Response:
-    """Make API request."""
-    _LOGGER.debug("Making API request to %s with headers %s", url, headers)
-    return requests.get(url, headers=headers)
+_LOGGER = logging.getLogger(__name__)
 
 class TuyaScaleDataUpdateCoordinator(DataUpdateCoordinator):
     """Class to manage fetching Tuya Scale data."""
 
-    def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry) -> None:
-        """Initialize the coordinator."""
-        # Tarama aralığını yapılandırmadan al
-        scan_interval = timedelta(
-            minutes=config_entry.options.get(
-                CONF_SCAN_INTERVAL,
-                config_entry.data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
-            )
-        )
+    def __init__(
+        self, hass: HomeAssistant, config_entry: ConfigEntry, hub: TuyaScaleHub
+    ) -> None:
+        """Initialize the coordinator.
 
+        Updates are not scheduled by the coordinator itself: the hub shared by
+        all entries of the same Tuya project and region drives the refreshes.
+        """
         super().__init__(
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=scan_interval,
+            update_interval=None,
             update_method=self._async_update_with_retry
         )
-        
+
+        self.hub = hub
+        self._entry_data = dict(config_entry.data)
+        self._scheduler = None
+        self._apply_options(config_entry)
         self.access_id = config_entry.data[CONF_ACCESS_ID]
         self.access_key = config_entry.data[CONF_ACCESS_KEY]
         self.device_id = config_entry.data[CONF_DEVICE_ID]
         self.region = config_entry.data[CONF_REGION]
         self.api_endpoint = REGIONS[self.region]
-        self.access_token = None
-        self._retry_count = 0
+        self.client = hub.client
+
+        # Transports in order of preference, the cloud is always the fallback
+        self.metrics = TuyaScaleMetrics()
+        self.payload_log = PayloadLogger(_LOGGER)
+        cloud = CloudTransport(
+            hub.client, hub.tokens, self.device_id, self.metrics, self.request_timeout,
+            self.payload_log,
+        )
+        self.transports: list[TuyaScaleTransport] = [cloud]
+        host = config_entry.options.get(CONF_HOST)
+        local_key = config_entry.options.get(CONF_LOCAL_KEY)
+        if host and local_key:
+            self.transports.insert(
+                0,
+                LocalTransport(
+                    host, self.device_id, local_key, cloud.dp_codes,
+                    last_seen=self._last_seen,
+                ),
+            )
+        self.active_transport: str | None = None
+        # Property decoders, compiled from the device's DP specification
+        self.decoders = DecoderTable()
+        self._schema_retry_at = 0.0
+        self.backfill = None
+
+        # Measurements of a shared scale are split between its users
+        self.persons = None
+        if config_entry.options.get(CONF_PROFILES):
+            self.persons = PersonTracker(config_entry.options[CONF_PROFILES])
+
+        # Weight codes with trend statistics and the name prefix of their sensors
+        self.trend_sources = {'weight': ''}
+        if self.persons is not None:
+            for profile_id, profile in self.persons.profiles.items():
+                self.trend_sources[person_key('weight', profile_id)] = f"{profile[CONF_NAME]} "
+        self.trends = TrendTracker(list(self.trend_sources))
+        # Implausible weights and impedances are kept out of derived values
+        self.outliers = OutlierFilter()
+        self._local_retry_at = 0.0
         self._max_retries = 3
+        # (time, raw value) of every property seen in the last poll
+        self._property_index: dict[str, tuple] = {}
+        self.changed_codes: set[str] = set()
+        # Properties of a weigh-in are published together
+        self._sessions = SessionAssembler()
+        self._unsub_session: CALLBACK_TYPE | None = None
+        # Every property code reported so far, entities exist for these
+        self.known_codes: set[str] = set()
+        # Codes the platforms are told about with the next listener update
+        self._new_codes: set[str] = set()
+        # Codes decoded again with a new schema, written with the next update
+        self._redecoded: set[str] = set()
+        self._code_listeners: list[Callable[[set[str]], None]] = []
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{self.device_id}")
+        # Last data is served marked as stale while the cloud is unreachable
+        self.stale = False
+        self._last_success: float | None = None
 
-    def _calculate_sign(self, t: str, path: str, access_token: str = None) -> str:
-        """Calculate signature for API requests."""
-        # String to sign
-        str_to_sign = []
-        str_to_sign.append("GET")
-        str_to_sign.append(hashlib.sha256(''.encode('utf8')).hexdigest())
-        str_to_sign.append("")  # Empty headers
-        str_to_sign.append(path)
-        str_to_sign = '\n'.join(str_to_sign)
-        
-        # Message
-        message = self.access_id
-        if access_token:
-            message += access_token
-        message += t + str_to_sign
-        
-        # Calculate signature
-        signature = hmac.new(
-            self.access_key.encode('utf-8'),
-            message.encode('utf-8'),
-            hashlib.sha256
-        ).hexdigest().upper()
-        
-        _LOGGER.debug(
-            "Signature calculation:\n"
-            "String to sign: %s\n"
-            "Message: %s\n"
-            "Signature: %s",
-            str_to_sign, message, signature
+    def _apply_options(self, config_entry: ConfigEntry) -> None:
+        """Read the options that can change while the entry is running."""
+        options = config_entry.options
+        self._options = dict(options)
+        # Tarama aralığını yapılandırmadan al
+        self._scan_interval = timedelta(
+            minutes=options.get(
+                CONF_SCAN_INTERVAL,
+                config_entry.data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
+            )
+        ).total_seconds()
+        self.push_mode = options.get(CONF_PUSH_MODE, DEFAULT_PUSH_MODE)
+        self.outlier_filter = options.get(CONF_OUTLIER_FILTER, DEFAULT_OUTLIER_FILTER)
+        # Passed with each request, the hub's client is shared by other entries
+        self.request_timeout = client_timeout(
+            options.get(CONF_CONNECT_TIMEOUT, DEFAULT_CONNECT_TIMEOUT),
+            options.get(CONF_READ_TIMEOUT, DEFAULT_READ_TIMEOUT),
         )
-        
-        return signature
 
-    async def _get_token(self) -> bool:
-        """Get access token from Tuya API."""
-        try:
-            t = str(int(time.time() * 1000))
-            sign = self._calculate_sign(t, TOKEN_PATH)
-            
-            headers = {
-                'client_id': self.access_id,
-                'sign': sign,
-                't': t,
-                'sign_method': 'HMAC-SHA256'
+        if options.get(CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING):
+            max_interval = timedelta(
+                minutes=options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL)
+            ).total_seconds()
+            if self._scheduler is None:
+                self._scheduler = AdaptivePollScheduler(self._scan_interval, max_interval)
+            else:
+                self._scheduler.set_bounds(self._scan_interval, max_interval)
+        else:
+            self._scheduler = None
+
+        # Body composition needs the height, age and sex of the person
+        self.profile = None
+        if options.get(CONF_HEIGHT) and options.get(CONF_AGE):
+            self.profile = {
+                'height': options[CONF_HEIGHT],
+                'age': options[CONF_AGE],
+                'male': options.get(CONF_SEX, SEX_MALE) == SEX_MALE,
             }
-            
-            url = f"{self.api_endpoint}{TOKEN_PATH}"
-            
-            _LOGGER.debug(
-                "Getting token\n"
-                "URL: %s\n"
-                "Headers: %s",
-                url, json.dumps(headers, indent=2)
-            )
-            
-            response = await self.hass.async_add_executor_job(
-                make_api_request,
-                url,
-                headers
+
+    @callback
+    def async_update_options(self, config_entry: ConfigEntry) -> bool:
+        """Apply changed options live, return False if the entry must reload.
+
+        Polling, push, timeout and body composition options take effect
+        without touching the entities, the access token or the cached data.
+        Credentials, the device, its local connection, the people sharing
+        the scale and the backfill change entities or connections, so they
+        still need a reload. Options are compared by the value they take
+        effect with, so saving an option at its default changes nothing.
+        """
+        defaults = {
+            **OPTION_DEFAULTS,
+            CONF_SCAN_INTERVAL: config_entry.data.get(
+                CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL
+            ),
+        }
+        changed = {
+            key
+            for key in config_entry.options.keys() | self._options.keys()
+            if config_entry.options.get(key, defaults.get(key))
+            != self._options.get(key, defaults.get(key))
+        }
+        if dict(config_entry.data) != self._entry_data or changed - LIVE_OPTIONS:
+            return False
+        if not changed:
+            return True
+
+        _LOGGER.debug("Applying changed options of %s: %s", self.device_id, sorted(changed))
+        self._apply_options(config_entry)
+        cloud = next(t for t in self.transports if t.name == "cloud")
+        cloud.timeout = self.request_timeout
+        self.hub.async_update_coordinator(self)
+        return True
+
+    async def async_restore(self) -> bool:
+        """Restore the last known data, return True if there was any.
+
+        The restored data counts as fresh as it was when it was saved, so it
+        is served as stale if the cloud cannot be reached after a restart.
+        """
+        if (stored := await self._store.async_load()) is None:
+            return False
+
+        self.known_codes = set(stored['known_codes'])
+        self.decoders = DecoderTable.from_list(stored.get('schema', []))
+        self.trends = TrendTracker(list(self.trend_sources), stored.get('trends'))
+        self.outliers = OutlierFilter(stored.get('outliers'))
+        if self.persons is not None:
+            self.persons = PersonTracker(
+                list(self.persons.profiles.values()), stored.get('persons')
             )
-            
-            _LOGGER.debug("Token response: %s", response.text)
-            
-            if response.status_code != 200:
-                _LOGGER.error(
-                    "Token request failed\n"
-                    "Status code: %s\n"
-                    "Response: %s",
-                    response.status_code, response.text
+        self._property_index = {
+            code: tuple(item) for code, item in stored['property_index'].items()
+        }
+        for transport in self.transports:
+            if transport.name == "cloud":
+                transport.dp_codes.update(
+                    (int(dp_id), code) for dp_id, code in stored['dp_codes'].items()
                 )
-                raise ConfigEntryAuthFailed(ERROR_AUTH)
-            
-            result = response.json()
-            if not result.get('success', False):
-                _LOGGER.error("Token request error: %s", result.get('msg'))
-                raise ConfigEntryAuthFailed(ERROR_AUTH)
-            
-            self.access_token = result['result']['access_token']
-            _LOGGER.debug("Got access token: %s", self.access_token)
-            return True
-            
-        except requests.RequestException as err:
-            _LOGGER.error("Connection error during token request: %s", str(err))
-            raise UpdateFailed(ERROR_CONN)
+        if stored['last_success'] is not None:
+            self._last_success = time.monotonic() - (time.time() - stored['last_success'])
+        self.data = {
+            code: PropertyRecord(*record) for code, record in stored['data'].items()
+        }
+        return True
+
+    @callback
+    def _data_to_store(self) -> dict:
+        """Return the data to persist."""
+        cloud = next(t for t in self.transports if t.name == "cloud")
+        return {
+            'data': {code: list(record) for code, record in self.data.items()},
+            'property_index': self._property_index,
+            'known_codes': sorted(self.known_codes),
+            'dp_codes': cloud.dp_codes,
+            'schema': self.decoders.as_list(),
+            'trends': self.trends.as_dict(),
+            'outliers': self.outliers.as_dict(),
+            'persons': self.persons.as_dict() if self.persons is not None else None,
+            'last_success': (
+                time.time() - (time.monotonic() - self._last_success)
+                if self._last_success is not None
+                else None
+            ),
+        }
+
+    @callback
+    def async_add_code_listener(
+        self, code_callback: Callable[[set[str]], None]
+    ) -> CALLBACK_TYPE:
+        """Call back with property codes seen for the first time.
+
+        The platforms add the entities of new codes from it, so a property
+        that first shows up with a later weigh-in gets its sensor without a
+        reload. Returns a function removing the listener.
+        """
+        self._code_listeners.append(code_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._code_listeners.remove(code_callback)
+
+        return remove_listener
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update all listeners and schedule saving data that changed."""
+        # New entities are added before the existing ones are written
+        if self._new_codes:
+            new_codes, self._new_codes = self._new_codes, set()
+            for code_callback in list(self._code_listeners):
+                code_callback(new_codes)
+        super().async_update_listeners()
+        if self.changed_codes and self.data is not None:
+            self._store.async_delay_save(self._data_to_store, STORAGE_SAVE_DELAY)
+
+    @property
+    def poll_interval(self) -> float:
+        """Return the number of seconds until the hub should poll again."""
+        # Pushed reports keep the data current, polls only reconcile it
+        if self.push_mode and self.hub.push_connected:
+            interval = PUSH_RECONCILE_INTERVAL
+        elif self._scheduler is not None:
+            interval = self._scheduler.interval
+        else:
+            interval = self._scan_interval
+        # Do not wake up before the region's breaker lets requests through
+        # or the project's rate limit pause is over
+        breaker = self.hub.client.breaker
+        if breaker is not None:
+            interval = max(interval, breaker.retry_in)
+        budget = self.hub.client.budget
+        if budget is not None:
+            interval = max(interval, budget.retry_in)
+        return interval
 
     async def _async_update_with_retry(self):
-        """Update data with retry mechanism."""
+        """Update data with retry mechanism, recording the poll's metrics."""
+        self.metrics.polls += 1
+        self.payload_log.begin_poll()
+        start = time.perf_counter_ns()
         try:
-            self._retry_count = 0
-            return await self._async_update_data()
-        except UpdateFailed as err:
-            self._retry_count += 1
-            _LOGGER.warning(
-                "Update failed (attempt %s of %s): %s",
-                self._retry_count,
-                self._max_retries,
-                str(err)
-            )
-            
-            if self._retry_count < self._max_retries:
-                self.access_token = None
-                await asyncio.sleep(2)  # Short wait before retry
-                return await self._async_update_data()
-            else:
+            return await self._async_update_with_retry_inner()
+        except Exception as err:
+            self.metrics.failures += 1
+            self.metrics.last_error = str(err)
+            raise
+        finally:
+            self.metrics.observe(PHASE_POLL, time.perf_counter_ns() - start)
+
+    async def _async_update_with_retry_inner(self):
+        """Update data with retry mechanism.
+
+        Failed polls are retried after a jittered exponential backoff, unless
+        the region's circuit breaker refuses requests or the project is rate
+        limited. When the cloud stays unreachable the last data is returned
+        marked as stale, for up to STALE_MAX_AGE, instead of making every
+        entity unavailable.
+        """
+        # Failed polls change no property, only availability
+        self.changed_codes = set()
+        for attempt in range(self._max_retries):
+            try:
+                data = await self._async_poll_once()
+            except UpdateFailed as err:
+                last_error = err
+                if isinstance(
+                    err.__cause__, (TuyaScaleCircuitOpenError, TuyaScaleRateLimitError)
+                ) or attempt + 1 == self._max_retries:
+                    break
+                self.metrics.retries += 1
+                _LOGGER.warning(
+                    "Update failed (attempt %s of %s): %s",
+                    attempt + 1,
+                    self._max_retries,
+                    str(err)
+                )
+                await asyncio.sleep(
+                    jittered_backoff(attempt, RETRY_BASE_DELAY, RETRY_MAX_DELAY)
+                )
+                continue
+            self._last_success = time.monotonic()
+            self._set_stale(False, data)
+            return data
+
+        if (
+            isinstance(last_error.__cause__, TuyaScaleConnectionError)
+            and self.data is not None
+            and self._last_success is not None
+            and time.monotonic() - self._last_success < STALE_MAX_AGE
+        ):
+            _LOGGER.debug("Serving stale data of %s: %s", self.device_id, last_error)
+            self.metrics.failures += 1
+            self.metrics.last_error = str(last_error)
+            self._set_stale(True, self.data)
+            return self.data
+        raise last_error
+
+    def _set_stale(self, stale: bool, data: dict) -> None:
+        """Flag the data as stale or fresh, updating every entity on a change."""
+        if stale != self.stale:
+            self.stale = stale
+            self.changed_codes = self.changed_codes | set(data)
+
+    async def _async_fetch_properties(self) -> tuple[list, bool]:
+        """Read the properties through the first transport that answers.
+
+        Returns the properties and whether they are a partial update. After a
+        local failure the local transport is skipped for a while, since a
+        sleeping scale would otherwise add a timeout to every poll.
+        """
+        now = time.monotonic()
+        last_error = None
+        for transport in self.transports:
+            if transport.name == "local" and now < self._local_retry_at:
+                continue
+            try:
+                properties = await transport.async_get_properties()
+            except TuyaScaleAuthError:
                 raise
+            except TuyaScaleApiError as err:
+                _LOGGER.debug("%s transport failed: %s", transport.name, err)
+                last_error = err
+                if transport.name == "local":
+                    self._local_retry_at = now + LOCAL_RETRY_INTERVAL
+                continue
+            self.active_transport = transport.name
+            return properties, transport.partial
+
+        raise last_error
 
-    async def _async_update_data(self):
+    def _last_seen(self, code: str) -> tuple | None:
+        """Return the time and raw value of a code last seen by any transport."""
+        return self._property_index.get(code)
+
+    @property
+    def transport_stats(self) -> dict:
+        """Return request counters and latency for every transport."""
+        return {t.name: t.stats.as_dict() for t in self.transports}
+
+    async def _async_poll_once(self):
         """Fetch data from Tuya API."""
         try:
-            if not self.access_token:
-                await self._get_token()
-
-            t = str(int(time.time() * 1000))
-            path = DEVICE_DATA_PATH.format(device_id=self.device_id)
-            sign = self._calculate_sign(t, path, self.access_token)
-            
-            headers = {
-                'client_id': self.access_id,
-                'access_token': self.access_token,
-                'sign': sign,
-                't': t,
-                'sign_method': 'HMAC-SHA256',
-            }
-            
-            url = f"{self.api_endpoint}{path}"
-            
-            _LOGGER.debug(
-                "Getting device data\n"
-                "URL: %s\n"
-                "Headers: %s",
-                url, json.dumps(headers, indent=2)
-            )
-            
-            response = await self.hass.async_add_executor_job(
-                make_api_request,
-                url,
-                headers
-            )
-            
-            _LOGGER.debug("Device data response: %s", response.text)
-            
-            if response.status_code == 401:
-                _LOGGER.info("Token expired, refreshing...")
-                self.access_token = None
-                await self.async_refresh()
-                return self.data
-            
-            if response.status_code != 200:
-                raise UpdateFailed(f"HTTP error {response.status_code}")
-            
-            result = response.json()
-            if not result.get('success', False):
-                msg = result.get('msg', '')
-                if 'token' in msg.lower():
-                    _LOGGER.info("Token invalid, refreshing...")
-                    self.access_token = None
-                    await self.async_refresh()
-                    return self.data
-                raise UpdateFailed(f"API error: {msg}")
-            
-            data = {}
-            properties = result.get('result', {}).get('properties', [])
-            
-            _LOGGER.debug("All properties received: %s", json.dumps(properties, indent=2))
-            
-            for prop in properties:
-                code = prop['code']
-                value = prop['value']
-                timestamp = prop.get('time', 0)
-                value_type = prop.get('type', '')
-                
-                _LOGGER.debug(
-                    "Processing property:\n"
-                    "Code: %s\n"
-                    "Value: %s\n"
-                    "Type: %s\n"
-                    "Timestamp: %s",
-                    code, value, value_type, timestamp
-                )
-                
-                # Özel değer dönüşümleri
-                if code == 'weight':
-                    value = value / 1000  # Convert to kg
-                elif code == 'battery':
-                    value = bool(value)  # Convert to boolean
-                elif code == 'time' and value_type == 'string':
-                    # Eğer time değeri boşsa, timestamp'i kullan
-                    if not value:
-                        value = datetime.fromtimestamp(timestamp / 1000).strftime('%Y-%m-%d %H:%M:%S')
-                
-                data[code] = {
-                    'value': value,
-                    'timestamp': timestamp,
-                    'type': value_type,
-                    'last_update': datetime.fromtimestamp(timestamp / 1000).strftime('%Y-%m-%d %H:%M:%S')
-                }
-                
-                _LOGGER.debug("Processed data for %s: %s", code, data[code])
-            
-            _LOGGER.debug("Final processed data: %s", json.dumps(data, indent=2))
-            return data
-            
-        except requests.RequestException as err:
+            await self._async_load_schema()
+            properties, partial = await self._async_fetch_properties()
+            return self._process_properties(properties, merge=partial)
+
+        except TuyaScaleAuthError as err:
+            raise ConfigEntryAuthFailed(ERROR_AUTH) from err
+        except TuyaScaleApiError as err:
             _LOGGER.error("Connection error: %s", str(err))
-            self.access_token = None
-            raise UpdateFailed(f"{ERROR_CONN}: {str(err)}")
+            raise UpdateFailed(str(err)) from err
         except Exception as err:
             _LOGGER.error("Unexpected error: %s", str(err))
-            self.access_token = None
             raise UpdateFailed(f"Unexpected error: {str(err)}")
+
+    async def _async_load_schema(self) -> None:
+        """Load the device's DP specification once, retrying later on failure."""
+        if self.decoders.from_specification or time.monotonic() < self._schema_retry_at:
+            return
+        try:
+            decoders = await async_fetch_decoders(
+                self.hub.client, self.hub.tokens, self.device_id, self.request_timeout
+            )
+        except TuyaScaleApiError as err:
+            _LOGGER.debug("Specification of %s not available: %s", self.device_id, err)
+            self._schema_retry_at = time.monotonic() + SCHEMA_RETRY_INTERVAL
+            return
+        if not decoders.from_specification:
+            self._schema_retry_at = time.monotonic() + SCHEMA_RETRY_INTERVAL
+            return
+        self.decoders = decoders
+        # Decode the current values again with the new table. They keep
+        # their times, so they are no new readings, only their sensors
+        # are written.
+        if self.data:
+            data = dict(self.data)
+            for code, (timestamp, value) in self._property_index.items():
+                if code in data:
+                    data[code] = data[code]._replace(
+                        value=decoders.decode(code, value, timestamp)
+                    )
+            self._redecoded |= {code for code in data if data[code] != self.data[code]}
+            self.data = data
+        # Known codes of the specification may get a sensor now
+        self._new_codes |= decoders.spec_codes & self.known_codes
+
+    def _filter_outliers(
+        self, data: dict, previous: dict, changed_codes: set[str]
+    ) -> set[str]:
+        """Judge the new readings, return the codes derived values must skip.
+
+        Rejected readings stay in the data, their sensors and the weigh-in
+        event show them marked as rejected. Only the body composition, the
+        people and the trends leave them out, together with the impedances
+        of a weigh-in whose weight was rejected.
+        """
+        if not self.outlier_filter:
+            return set()
+
+        for code in changed_codes & FILTERED_CODES:
+            record = data.get(code)
+            if record is None or not isinstance(record.value, (int, float)):
+                continue
+            # A reading decoded again is no new reading
+            if code in previous and previous[code].timestamp == record.timestamp:
+                continue
+            # A shared scale judges a weight against the person it matches,
+            # a scale without people against its own recent weights
+            stream = None
+            if code == 'weight' and record.value:
+                stream = (
+                    self.persons.matcher.match(record.value)
+                    if self.persons is not None
+                    else code
+                )
+            if not self.outliers.accept(code, record.value, record.timestamp, stream):
+                _LOGGER.debug("Rejected implausible %s reading: %s", code, record.value)
+
+        skipped = {
+            code
+            for code in FILTERED_CODES
+            if code in data and self.outliers.is_rejected(code, data[code].timestamp)
+        }
+        if 'weight' in skipped:
+            weighed_at = data['weight'].timestamp
+            skipped.update(
+                code
+                for code in FILTERED_CODES
+                if code in data and data[code].timestamp >= weighed_at
+            )
+        return skipped
+
+    def _update_body_composition(
+        self, data: dict, previous: dict, changed_codes: set[str]
+    ) -> None:
+        """Add body composition estimates derived from weight and impedance."""
+        if self.profile is None:
+            return
+
+        weight = data.get('weight')
+        impedance = data.get('BR')
+
+        # Nothing to recompute, keep the previous estimates. An impedance
+        # older than the weight belongs to an earlier weigh-in, and without
+        # a weight the last one was rejected as implausible.
+        if not changed_codes & {'weight', 'BR'} or weight is None or (
+            impedance and impedance.timestamp < weight.timestamp
+        ):
+            for code in BODY_COMPOSITION_CODES:
+                if code in previous:
+                    data[code] = previous[code]
+            return
+
+        # Impedance is 0 when nobody stood barefoot on the electrodes
+        if not weight or not impedance or not weight.value or not impedance.value:
+            return
+
+        timestamp = max(weight.timestamp, impedance.timestamp)
+        result = body_composition(
+            [weight.value], [impedance.value], **self.profile
+        )
+        for code, values in result.items():
+            data[code] = PropertyRecord(round(float(values[0]), 1), timestamp, 'derived')
+            changed_codes.add(code)
+
+    @callback
+    def async_reassign_measurement(self, profile: str, timestamp: int | None) -> None:
+        """Move a measurement to another person and update their sensors."""
+        profile_id = self.persons.find_profile(profile) if self.persons else None
+        if profile_id is None:
+            raise HomeAssistantError(f"Unknown profile: {profile}")
+
+        data = dict(self.data or {})
+        changed_codes = set()
+        if not self.persons.reassign(profile_id, timestamp, data, changed_codes):
+            raise HomeAssistantError(f"No measurement to reassign at {timestamp}")
+
+        self.changed_codes = changed_codes
+        self.async_set_updated_data(data)
+
+    def _assemble_session(self, data: dict, changed_codes: set[str]) -> set[str]:
+        """Hold back a weigh-in's properties until all of them arrived."""
+        release, completed = self._sessions.feed(
+            data, changed_codes, self.known_codes & SESSION_CODES
+        )
+        for session in completed:
+            self._fire_measurement(session)
+
+        if self._sessions.session is None:
+            if self._unsub_session is not None:
+                self._unsub_session()
+                self._unsub_session = None
+        elif self._unsub_session is None:
+            self._unsub_session = async_call_later(
+                self.hass, SESSION_WINDOW, self._async_expire_session
+            )
+        return release
+
+    @callback
+    def _async_expire_session(self, _now) -> None:
+        """Publish a weigh-in whose properties did not all arrive in time."""
+        self._unsub_session = None
+        if (session := self._sessions.expire()) is None:
+            return
+        self._fire_measurement(session)
+        self.changed_codes = session.deferred
+        self.async_update_listeners()
+
+    @callback
+    def async_stop(self) -> None:
+        """Cancel the timer of an open weigh-in."""
+        if self._unsub_session is not None:
+            self._unsub_session()
+            self._unsub_session = None
+
+    def _fire_measurement(self, session: MeasurementSession) -> None:
+        """Fire the event of a completed weigh-in."""
+        rejected = sorted(
+            code
+            for code, record in session.values.items()
+            if self.outliers.is_rejected(code, record.timestamp)
+        )
+        self.hass.bus.async_fire(
+            EVENT_MEASUREMENT,
+            {"device_id": self.device_id, **session.as_event_data(), "rejected": rejected},
+        )
+
+    @callback
+    def async_trace_polls(self, polls: int) -> None:
+        """Log and capture every payload of the next polls."""
+        _LOGGER.info("Tracing the next %s polls of %s", polls, self.device_id)
+        self.payload_log.start_trace(polls)
+
+    @callback
+    def async_handle_push(self, properties: list) -> None:
+        """Merge properties reported by the push subscriber into the data."""
+        _LOGGER.debug("Pushed properties for %s: %s", self.device_id, LazyJson(properties))
+        self.async_set_updated_data(self._process_properties(properties, merge=True))
+
+    def _process_properties(self, properties: list, merge: bool = False) -> dict:
+        """Convert shadow properties into coordinator data.
+
+        A poll returns the full shadow and replaces the data, while a push
+        only carries the reported codes and is merged into it.
+        """
+        start = time.perf_counter_ns()
+        previous = self.data or {}
+        data = dict(previous) if merge else {}
+        property_index = dict(self._property_index) if merge else {}
+        changed_codes = set()
+
+        self.payload_log.log("All properties received", properties)
+
+        for prop in properties:
+            code = prop['code']
+            value = prop['value']
+            timestamp = prop.get('time', 0)
+
+            # Unchanged properties keep their processed entry as is
+            if code in previous and self._property_index.get(code) == (timestamp, value):
+                property_index[code] = (timestamp, value)
+                data[code] = previous[code]
+                continue
+            property_index[code] = (timestamp, value)
+            changed_codes.add(code)
+
+            if 'type' in prop:
+                value_type = prop['type']
+            else:
+                value_type = previous[code].type if code in previous else ''
+            data[code] = PropertyRecord(
+                self.decoders.decode(code, value, timestamp), timestamp, value_type
+            )
+
+        self.payload_log.log("Final processed data", data)
+
+        # Derived values are computed without the rejected readings
+        skipped = self._filter_outliers(data, previous, changed_codes)
+        skipped_records = {code: data.pop(code) for code in skipped}
+        accepted_codes = changed_codes - skipped
+        self._update_body_composition(data, previous, accepted_codes)
+        if self.persons is not None:
+            self.persons.update(data, previous, accepted_codes)
+        self.trends.update(data, previous, accepted_codes)
+        data.update(skipped_records)
+        changed_codes |= accepted_codes
+
+        # Codes that disappeared from the shadow changed as well
+        if not merge:
+            changed_codes.update(previous.keys() - data.keys())
+        self._property_index = property_index
+        new_codes = {code for code in changed_codes if code in data} - self.known_codes
+        if new_codes:
+            _LOGGER.debug("New properties: %s", new_codes)
+            self.known_codes |= new_codes
+            self._new_codes |= new_codes
+        # The first data is no weigh-in, only what the scale reported last
+        if previous:
+            changed_codes = self._assemble_session(data, changed_codes)
+        self.changed_codes = changed_codes | self._redecoded
+        self._redecoded = set()
+        _LOGGER.debug("Changed properties: %s", changed_codes)
+
+        if self._scheduler is not None and data:
+            count = data.get('weightcount')
+            self._scheduler.observe(
+                count.value if count is not None else None,
+                max(record.timestamp for record in data.values()),
+            )
+
+        self.metrics.observe(PHASE_PROCESS, time.perf_counter_ns() - start)
+        return data
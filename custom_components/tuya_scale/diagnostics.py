@@ -0,0 +1,68 @@
+"""Diagnostics support for Tuya Scale."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_HOST
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_ACCESS_ID, CONF_ACCESS_KEY, CONF_LOCAL_KEY, DOMAIN
+
+TO_REDACT = {
+    CONF_ACCESS_ID,
+    CONF_ACCESS_KEY,
+    CONF_LOCAL_KEY,
+    CONF_HOST,
+    "access_token",
+    "refresh_token",
+    "uid",
+}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+
+    return async_redact_data(
+        {
+            "entry": {
+                "data": dict(entry.data),
+                "options": dict(entry.options),
+            },
+            "last_update_success": coordinator.last_update_success,
+            "poll_interval": coordinator.poll_interval,
+            "stale": coordinator.stale,
+            "breaker": (
+                coordinator.hub.client.breaker.as_dict()
+                if coordinator.hub.client.breaker is not None
+                else None
+            ),
+            "scheduler": {
+                "queue_depth": coordinator.hub.queue_depth,
+                "budget": (
+                    coordinator.hub.client.budget.as_dict()
+                    if coordinator.hub.client.budget is not None
+                    else None
+                ),
+            },
+            "push_connected": coordinator.hub.push_connected,
+            "active_transport": coordinator.active_transport,
+            "tokens_minted": coordinator.hub.tokens.tokens_minted,
+            "metrics": coordinator.metrics.as_dict(),
+            "transports": coordinator.transport_stats,
+            "schema": [s.as_dict() for s in coordinator.decoders.schema.values()],
+            "outliers": {
+                "rejected": coordinator.outliers.rejected,
+                "last_rejected": coordinator.outliers.last_rejected,
+            },
+            "trace": list(coordinator.payload_log.captures),
+            "data": {
+                code: record._asdict() for code, record in (coordinator.data or {}).items()
+            },
+        },
+        TO_REDACT,
+    )
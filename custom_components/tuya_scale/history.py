@@ -0,0 +1,361 @@
+"""Measurement history backfill for the Tuya Scale integration."""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+import sqlite3
+import time
+from collections.abc import AsyncIterator, Callable
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import STORAGE_DIR
+from homeassistant.util import dt as dt_util
+
+from .api import TuyaScaleApiError
+from .const import (
+    BACKFILL_INTERVAL,
+    BACKFILL_MAX_AGE,
+    BACKFILL_PAGE_SIZE,
+    BODY_COMPOSITION_CODES,
+    DOMAIN,
+    REPORT_LOGS_PATH,
+    SENSOR_TYPES,
+)
+from .outliers import OutlierFilter
+
+if TYPE_CHECKING:
+    from .schema import DecoderTable
+    from .coordinator import TuyaScaleDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+HOUR_MS = 3600 * 1000
+
+# Reported codes whose history is kept, with their unit of measurement
+BACKFILL_CODES = {
+    info["key"]: info.get("unit")
+    for info in SENSOR_TYPES.values()
+    if info.get("state_class") == "measurement"
+    and info["key"] not in BODY_COMPOSITION_CODES
+}
+
+
+def store_path(hass: HomeAssistant, device_id: str) -> str:
+    """Return the path of a scale's measurement database."""
+    return hass.config.path(STORAGE_DIR, f"{DOMAIN}.{device_id}.db")
+
+
+def remove_store(path: str) -> None:
+    """Delete a measurement database and its rollback journal."""
+    for file in (path, f"{path}-journal"):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(file)
+
+
+class MeasurementStore:
+    """Append-only SQLite store of one scale's measurements.
+
+    Rows are keyed by (time, code), so the primary key doubles as the time
+    index and re-imported pages are ignored. The backfill cursor lives in the
+    same database and is written in the same transaction as the rows.
+    All methods block and must run in the executor.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initialize the store."""
+        self._path = path
+        self._conn: sqlite3.Connection | None = None
+
+    def open(self) -> None:
+        """Open the database, creating the schema if needed."""
+        self._conn = sqlite3.connect(self._path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS measurements (
+                ts INTEGER NOT NULL,
+                code TEXT NOT NULL,
+                value REAL NOT NULL,
+                PRIMARY KEY (ts, code)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            ) WITHOUT ROWID;
+            """
+        )
+
+    def close(self) -> None:
+        """Close the database."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def get_meta(self) -> dict[str, str]:
+        """Return the stored cursor values."""
+        return dict(self._conn.execute("SELECT key, value FROM meta"))
+
+    def append(self, rows: list[tuple[int, str, float]], meta: dict[str, str]) -> None:
+        """Store rows and update cursor values atomically."""
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO measurements (ts, code, value) VALUES (?, ?, ?)",
+                rows,
+            )
+            self._set_meta(meta)
+
+    def update_meta(self, meta: dict[str, str | None]) -> None:
+        """Update cursor values, removing those set to None."""
+        with self._conn:
+            self._set_meta(meta)
+
+    def _set_meta(self, meta: dict[str, str | None]) -> None:
+        """Write cursor values inside the current transaction."""
+        for key, value in meta.items():
+            if value is None:
+                self._conn.execute("DELETE FROM meta WHERE key = ?", (key,))
+            else:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                    (key, str(value)),
+                )
+
+    def hourly(self, code: str, start: int, end: int) -> list[tuple[int, float, float, float]]:
+        """Return (hour, mean, min, max) of a code for whole hours in a range."""
+        return self._conn.execute(
+            """
+            SELECT (ts / ?) * ? AS hour, AVG(value), MIN(value), MAX(value)
+            FROM measurements
+            WHERE code = ? AND ts >= ? AND ts < ?
+            GROUP BY hour
+            ORDER BY hour
+            """,
+            (HOUR_MS, HOUR_MS, code, start, end),
+        ).fetchall()
+
+
+class TuyaScaleBackfill:
+    """Recover measurements made between polls or while Home Assistant was down.
+
+    Pages of the device report log are streamed into the measurement store
+    one at a time, and the hours each page touched are imported into the
+    long-term statistics. A run that is interrupted resumes from the page
+    cursor persisted with the rows. Implausible readings are dropped by an
+    outlier filter of their own, so the log does not disturb the live one,
+    with weights judged against the person they match like live ones.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, coordinator: TuyaScaleDataUpdateCoordinator
+    ) -> None:
+        """Initialize the backfill."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self._store = MeasurementStore(store_path(hass, coordinator.device_id))
+        self._path = REPORT_LOGS_PATH.format(device_id=coordinator.device_id)
+        self._lock = asyncio.Lock()
+        self._outliers = OutlierFilter()
+        self._unsub_interval: CALLBACK_TYPE | None = None
+        self._task: asyncio.Task | None = None
+
+    async def async_setup(self) -> None:
+        """Open the store and schedule backfill runs."""
+        await self.hass.async_add_executor_job(self._store.open)
+        self._unsub_interval = async_track_time_interval(
+            self.hass, self._async_handle_interval, timedelta(seconds=BACKFILL_INTERVAL)
+        )
+        self._async_start_run()
+
+    async def async_unload(self) -> None:
+        """Stop scheduled runs, cancel a running one and close the store.
+
+        A cancelled run resumes from its persisted page cursor next time.
+        """
+        if self._unsub_interval is not None:
+            self._unsub_interval()
+            self._unsub_interval = None
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        async with self._lock:
+            await self.hass.async_add_executor_job(self._store.close)
+
+    @callback
+    def _async_start_run(self) -> None:
+        """Start a run in the background unless one is running."""
+        if self._task is None or self._task.done():
+            self._task = self.hass.async_create_background_task(
+                self.async_run(), f"{DOMAIN} {self.coordinator.device_id} backfill"
+            )
+
+    @callback
+    def _async_handle_interval(self, _now) -> None:
+        """Run the backfill on its interval."""
+        self._async_start_run()
+
+    async def async_run(self) -> None:
+        """Import every measurement reported since the last run."""
+        if self._lock.locked():
+            return
+
+        async with self._lock:
+            meta = await self.hass.async_add_executor_job(self._store.get_meta)
+            now = int(time.time() * 1000)
+
+            # Resume an interrupted run, otherwise continue after the last one
+            if "run_end" in meta:
+                start, end = int(meta["run_start"]), int(meta["run_end"])
+                row_key = meta.get("row_key")
+            else:
+                start = int(meta.get("cursor", now - BACKFILL_MAX_AGE * 1000))
+                end, row_key = now, None
+                await self.hass.async_add_executor_job(
+                    self._store.update_meta, {"run_start": start, "run_end": end}
+                )
+
+            outliers = self._outliers if self.coordinator.outlier_filter else None
+            persons = self.coordinator.persons
+            match = persons.matcher.match if persons is not None else None
+            imported = 0
+            try:
+                async for logs, next_row_key in self._async_iter_pages(start, end, row_key):
+                    rows = _to_rows(logs, self.coordinator.decoders, outliers, match)
+                    await self.hass.async_add_executor_job(
+                        self._store.append, rows, {"row_key": next_row_key}
+                    )
+                    await self._async_import_statistics(rows)
+                    imported += len(rows)
+            except TuyaScaleApiError as err:
+                _LOGGER.warning(
+                    "Backfill of %s interrupted, will resume later: %s",
+                    self.coordinator.device_id, err
+                )
+                return
+
+            await self.hass.async_add_executor_job(
+                self._store.update_meta,
+                {"cursor": end, "run_start": None, "run_end": None, "row_key": None},
+            )
+            _LOGGER.debug(
+                "Backfilled %s measurements of %s", imported, self.coordinator.device_id
+            )
+
+    async def _async_iter_pages(
+        self, start: int, end: int, row_key: str | None
+    ) -> AsyncIterator[tuple[list, str | None]]:
+        """Yield the report log page by page with the key of the next page."""
+        client = self.coordinator.hub.client
+        tokens = self.coordinator.hub.tokens
+
+        while True:
+            params = {
+                "codes": ",".join(BACKFILL_CODES),
+                "end_time": end,
+                "size": BACKFILL_PAGE_SIZE,
+                "start_time": start,
+            }
+            if row_key:
+                params["last_row_key"] = row_key
+
+            access_token = await tokens.async_get_access_token()
+            status, result = await client.async_get(
+                self._path, access_token, params=params,
+                timeout=self.coordinator.request_timeout,
+            )
+            if status != 200 or not result.get("success", False):
+                if status == 401:
+                    tokens.invalidate(access_token)
+                raise TuyaScaleApiError(
+                    f"Report log request failed ({status}): {result.get('msg', '')}"
+                )
+
+            page = result.get("result", {})
+            row_key = page.get("last_row_key") if page.get("has_more") else None
+            yield page.get("logs", []), row_key
+            if not row_key:
+                return
+
+    async def _async_import_statistics(self, rows: list[tuple[int, str, float]]) -> None:
+        """Import the hourly statistics of every hour a page touched."""
+        if not rows or "recorder" not in self.hass.config.components:
+            return
+
+        # pylint: disable-next=import-outside-toplevel
+        from homeassistant.components.recorder.statistics import (
+            async_add_external_statistics,
+        )
+
+        for code, unit in BACKFILL_CODES.items():
+            times = [ts for ts, row_code, _ in rows if row_code == code]
+            if not times:
+                continue
+            start = min(times) // HOUR_MS * HOUR_MS
+            end = max(times) // HOUR_MS * HOUR_MS + HOUR_MS
+            hours = await self.hass.async_add_executor_job(
+                self._store.hourly, code, start, end
+            )
+            statistic_id = f"{DOMAIN}:{self.coordinator.device_id}_{code}".lower()
+            async_add_external_statistics(
+                self.hass,
+                {
+                    "has_mean": True,
+                    "has_sum": False,
+                    "name": f"{self.coordinator.device_id} {code}",
+                    "source": DOMAIN,
+                    "statistic_id": statistic_id,
+                    "unit_of_measurement": unit,
+                },
+                [
+                    {
+                        "start": dt_util.utc_from_timestamp(hour / 1000),
+                        "mean": mean,
+                        "min": minimum,
+                        "max": maximum,
+                    }
+                    for hour, mean, minimum, maximum in hours
+                ],
+            )
+
+
+def _to_rows(
+    logs: list,
+    decoders: DecoderTable,
+    outliers: OutlierFilter | None = None,
+    match: Callable[[float], str | None] | None = None,
+) -> list[tuple[int, str, float]]:
+    """Convert report log entries into decoded numeric store rows.
+
+    With an outlier filter the rows are judged oldest first and implausible
+    readings are left out. ``match`` returns the person of a weight, without
+    it weights are judged against the scale's own recent weights.
+    """
+    rows = []
+    for log in logs:
+        try:
+            ts, code = int(log["event_time"]), log["code"]
+            rows.append((ts, code, float(decoders.decode(code, float(log["value"]), ts))))
+        except (KeyError, TypeError, ValueError):
+            continue
+    rows.sort()
+    if outliers is None:
+        return rows
+    return [
+        (ts, code, value)
+        for ts, code, value in rows
+        if outliers.accept(code, value, ts, _stream(code, value, match))
+    ]
+
+
+def _stream(
+    code: str, value: float, match: Callable[[float], str | None] | None
+) -> str | None:
+    """Return the outlier stream of a reading, as the coordinator chooses it."""
+    if code != "weight":
+        return None
+    return match(value) if match is not None else code
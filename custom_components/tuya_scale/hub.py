@@ -0,0 +1,319 @@
+"""Shared polling hub for the Tuya Scale integration."""
+from __future__ import annotations
+
+import asyncio
+import binascii
+import logging
+import time
+from typing import TYPE_CHECKING
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_call_later
+
+from .api import TuyaScaleApiClient, TuyaScaleTokenManager
+from .breaker import CircuitBreaker
+from .budget import RequestBudget
+from .push import TuyaMessageQueueSource, TuyaScalePushSource
+from .const import (
+    CONF_ACCESS_ID,
+    CONF_ACCESS_KEY,
+    CONF_REGION,
+    DATA_BREAKERS,
+    DATA_BUDGETS,
+    DATA_HUBS,
+    DATA_TOKENS,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    MQ_ENDPOINTS,
+    REGIONS,
+    STAGGER_STARTUP,
+)
+
+if TYPE_CHECKING:
+    from .coordinator import TuyaScaleDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class TuyaScaleHub:
+    """Poll every scale of one Tuya project and region from a single timer.
+
+    Config entries sharing an access ID and region register their
+    coordinators here instead of running their own update timers. On each
+    tick the hub starts a refresh task for every coordinator that is due and
+    not refreshing yet, so a slow device never holds back the others. The
+    tasks share a semaphore so a large fleet never floods the project's rate
+    quota.
+
+    Each device polls at its own fixed phase of the interval, derived from
+    its ID, so entries set up or reloaded together do not poll in the same
+    second, and every request draws from the project's request budget.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        access_id: str,
+        access_key: str,
+        region: str,
+    ) -> None:
+        """Initialize the hub."""
+        self.hass = hass
+        self.access_id = access_id
+        self.region = region
+        self.client = TuyaScaleApiClient(
+            async_get_clientsession(hass),
+            REGIONS[region],
+            access_id,
+            access_key,
+            breaker=async_get_breaker(hass, region),
+            budget=async_get_budget(hass, access_id),
+        )
+        self.tokens = async_get_token_manager(hass, region, self.client)
+        # A manager created by a config flow keeps its token, but its
+        # requests now go through the breaker and budget of the hub
+        self.tokens.client = self.client
+        self._coordinators: dict[str, TuyaScaleDataUpdateCoordinator] = {}
+        self._next_poll: dict[str, float] = {}
+        self._semaphore = asyncio.Semaphore(DEFAULT_MAX_CONCURRENT_REQUESTS)
+        self._unsub_timer: CALLBACK_TYPE | None = None
+        # Refresh in flight of each device, a device is not due while it runs
+        self._polls: dict[str, asyncio.Task] = {}
+        self._queued = 0
+        self._push_source: TuyaScalePushSource | None = None
+        self._push_task: asyncio.Task | None = None
+
+    @property
+    def key(self) -> tuple[str, str]:
+        """Return the registry key of this hub."""
+        return (self.access_id, self.region)
+
+    @callback
+    def async_add_coordinator(
+        self, coordinator: TuyaScaleDataUpdateCoordinator, refresh: bool = False
+    ) -> None:
+        """Start polling a coordinator's device, soon if ``refresh``.
+
+        The first poll is delayed by the device's phase, a fraction of the
+        startup window when refreshing, of the poll interval otherwise.
+        """
+        self._coordinators[coordinator.device_id] = coordinator
+        phase = (binascii.crc32(coordinator.device_id.encode()) % 1000) / 1000
+        self._next_poll[coordinator.device_id] = time.monotonic() + phase * (
+            STAGGER_STARTUP if refresh else coordinator.poll_interval
+        )
+        self._async_update_push()
+        self._async_schedule()
+
+    @callback
+    def async_update_coordinator(
+        self, coordinator: TuyaScaleDataUpdateCoordinator
+    ) -> None:
+        """Apply a coordinator's changed poll interval and push mode.
+
+        A shorter interval brings the next poll forward, a longer one applies
+        from the poll after the one already scheduled.
+        """
+        if coordinator.device_id not in self._next_poll:
+            return
+        self._next_poll[coordinator.device_id] = min(
+            self._next_poll[coordinator.device_id],
+            time.monotonic() + coordinator.poll_interval,
+        )
+        self._async_update_push()
+        self._async_schedule()
+
+    @callback
+    def async_remove_coordinator(
+        self, coordinator: TuyaScaleDataUpdateCoordinator
+    ) -> None:
+        """Stop polling a coordinator's device, cancelling a running refresh."""
+        self._coordinators.pop(coordinator.device_id, None)
+        self._next_poll.pop(coordinator.device_id, None)
+        if (task := self._polls.pop(coordinator.device_id, None)) is not None:
+            task.cancel()
+        self._async_update_push()
+        self._async_schedule()
+
+    @property
+    def push_connected(self) -> bool:
+        """Return True while pushed reports are being received."""
+        return self._push_source is not None and self._push_source.connected
+
+    @callback
+    def _async_update_push(self) -> None:
+        """Run the push subscriber only while an entry asks for it."""
+        wanted = any(c.push_mode for c in self._coordinators.values())
+
+        if wanted and self._push_task is None:
+            self._push_source = TuyaMessageQueueSource(
+                async_get_clientsession(self.hass),
+                MQ_ENDPOINTS[self.region],
+                self.client.access_id,
+                self.client.access_key,
+                self._async_handle_push,
+                self._async_handle_push_connection,
+            )
+            self._push_task = self.hass.async_create_background_task(
+                self._push_source.async_run(),
+                f"{self.access_id} {self.region} push subscriber",
+            )
+        elif not wanted and self._push_task is not None:
+            self._push_task.cancel()
+            self._push_task = None
+            self._push_source = None
+
+    @callback
+    def _async_handle_push(self, device_id: str, properties: list) -> None:
+        """Hand pushed properties to the coordinator of their device."""
+        coordinator = self._coordinators.get(device_id)
+        if coordinator is not None and coordinator.push_mode:
+            coordinator.async_handle_push(properties)
+
+    @callback
+    def _async_handle_push_connection(self, connected: bool) -> None:
+        """Catch up by polling right away whenever the push feed drops."""
+        _LOGGER.debug("Push subscriber for region %s connected: %s", self.region, connected)
+        if connected:
+            return
+        now = time.monotonic()
+        for device_id, coordinator in self._coordinators.items():
+            if coordinator.push_mode:
+                self._next_poll[device_id] = now
+        self._async_schedule()
+
+    @property
+    def queue_depth(self) -> int:
+        """Return the number of due devices waiting for a free request slot."""
+        return self._queued
+
+    @property
+    def is_empty(self) -> bool:
+        """Return True when no coordinator is registered anymore."""
+        return not self._coordinators
+
+    @callback
+    def _async_schedule(self) -> None:
+        """Arm the timer for the earliest due device."""
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+
+        # A refreshing device is scheduled again when its refresh is done
+        waiting = [
+            due for device_id, due in self._next_poll.items() if device_id not in self._polls
+        ]
+        if not waiting:
+            return
+
+        delay = max(0.0, min(waiting) - time.monotonic())
+        self._unsub_timer = async_call_later(self.hass, delay, self._async_tick)
+
+    @callback
+    def _async_tick(self, _now) -> None:
+        """Start refreshing every coordinator that is due."""
+        self._unsub_timer = None
+        now = time.monotonic()
+        due = [
+            coordinator
+            for device_id, coordinator in self._coordinators.items()
+            if device_id not in self._polls and self._next_poll[device_id] <= now
+        ]
+        _LOGGER.debug(
+            "Polling %s of %s scales for region %s",
+            len(due), len(self._coordinators), self.region
+        )
+        for coordinator in due:
+            self._polls[coordinator.device_id] = self.hass.async_create_task(
+                self._async_poll(coordinator), f"{coordinator.device_id} poll"
+            )
+        self._async_schedule()
+
+    async def _async_poll(self, coordinator: TuyaScaleDataUpdateCoordinator) -> None:
+        """Refresh one coordinator within the concurrency limit."""
+        try:
+            self._queued += 1
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self._queued -= 1
+            try:
+                await coordinator.async_refresh()
+            finally:
+                self._semaphore.release()
+        finally:
+            device_id = coordinator.device_id
+            if self._polls.get(device_id) is asyncio.current_task():
+                del self._polls[device_id]
+            if device_id in self._next_poll:
+                self._next_poll[device_id] = time.monotonic() + coordinator.poll_interval
+                self._async_schedule()
+
+
+@callback
+def async_get_token_manager(
+    hass: HomeAssistant, region: str, client: TuyaScaleApiClient
+) -> TuyaScaleTokenManager:
+    """Return the token manager shared by every user of a project and region.
+
+    Managers outlive hubs so that a token minted while validating a config
+    flow or before a reload is reused instead of minting a new one.
+    """
+    managers: dict[tuple[str, str], TuyaScaleTokenManager] = hass.data.setdefault(
+        DATA_TOKENS, {}
+    )
+    key = (client.access_id, region)
+    manager = managers.get(key)
+
+    # A changed access key invalidates whatever the old manager holds
+    if manager is None or manager.client.access_key != client.access_key:
+        manager = managers[key] = TuyaScaleTokenManager(client)
+
+    return manager
+
+
+@callback
+def async_get_budget(hass: HomeAssistant, access_id: str) -> RequestBudget:
+    """Return the request budget shared by every region of a project."""
+    budgets: dict[str, RequestBudget] = hass.data.setdefault(DATA_BUDGETS, {})
+    if (budget := budgets.get(access_id)) is None:
+        budget = budgets[access_id] = RequestBudget()
+    return budget
+
+
+@callback
+def async_get_breaker(hass: HomeAssistant, region: str) -> CircuitBreaker:
+    """Return the circuit breaker shared by every project of a region."""
+    breakers: dict[str, CircuitBreaker] = hass.data.setdefault(DATA_BREAKERS, {})
+    if (breaker := breakers.get(region)) is None:
+        breaker = breakers[region] = CircuitBreaker()
+    return breaker
+
+
+@callback
+def async_get_hub(hass: HomeAssistant, entry: ConfigEntry) -> TuyaScaleHub:
+    """Return the hub for an entry's project and region, creating it if needed."""
+    hubs: dict[tuple[str, str], TuyaScaleHub] = hass.data.setdefault(DATA_HUBS, {})
+    key = (entry.data[CONF_ACCESS_ID], entry.data[CONF_REGION])
+
+    if (hub := hubs.get(key)) is None:
+        hub = hubs[key] = TuyaScaleHub(
+            hass,
+            entry.data[CONF_ACCESS_ID],
+            entry.data[CONF_ACCESS_KEY],
+            entry.data[CONF_REGION],
+        )
+
+    return hub
+
+
+@callback
+def async_release_hub(
+    hass: HomeAssistant, coordinator: TuyaScaleDataUpdateCoordinator
+) -> None:
+    """Unregister a coordinator and drop its hub once no entry uses it."""
+    hub = coordinator.hub
+    hub.async_remove_coordinator(coordinator)
+    if hub.is_empty:
+        hass.data.get(DATA_HUBS, {}).pop(hub.key, None)
@@ -0,0 +1,118 @@
+"""Low-overhead request instrumentation for the Tuya Scale integration."""
+from __future__ import annotations
+
+from bisect import bisect_left
+
+# Upper bounds of the histogram buckets in nanoseconds, the last one is open
+BUCKET_BOUNDS_NS = (
+    100_000,
+    1_000_000,
+    5_000_000,
+    25_000_000,
+    100_000_000,
+    250_000_000,
+    500_000_000,
+    1_000_000_000,
+    2_500_000_000,
+    10_000_000_000,
+)
+
+PHASE_TOKEN = "token"
+PHASE_SIGN = "sign"
+PHASE_HTTP = "http"
+PHASE_PARSE = "parse"
+PHASE_PROCESS = "process"
+PHASE_POLL = "poll"
+PHASES = (PHASE_TOKEN, PHASE_SIGN, PHASE_HTTP, PHASE_PARSE, PHASE_PROCESS, PHASE_POLL)
+
+
+class PhaseHistogram:
+    """Durations of one phase in fixed exponential buckets.
+
+    Recording is a bisect and a few integer additions; percentiles are only
+    derived from the buckets when somebody reads them.
+    """
+
+    __slots__ = ("counts", "count", "total_ns", "max_ns", "last_ns")
+
+    def __init__(self) -> None:
+        """Initialize an empty histogram."""
+        self.counts = [0] * (len(BUCKET_BOUNDS_NS) + 1)
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.last_ns = 0
+
+    def observe(self, duration_ns: int) -> None:
+        """Record one duration."""
+        self.counts[bisect_left(BUCKET_BOUNDS_NS, duration_ns)] += 1
+        self.count += 1
+        self.total_ns += duration_ns
+        self.last_ns = duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+
+    def percentile(self, fraction: float) -> float | None:
+        """Return the upper bound in ms of the bucket holding a percentile."""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                if index < len(BUCKET_BOUNDS_NS):
+                    return BUCKET_BOUNDS_NS[index] / 1e6
+                break
+        return self.max_ns / 1e6
+
+    def as_dict(self) -> dict:
+        """Return a summary in milliseconds."""
+        return {
+            "count": self.count,
+            "last_ms": self.last_ns / 1e6,
+            "mean_ms": self.total_ns / self.count / 1e6 if self.count else None,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "max_ms": self.max_ns / 1e6,
+        }
+
+
+class TuyaScaleMetrics:
+    """Phase histograms and counters of one scale's requests."""
+
+    __slots__ = (
+        "phases",
+        "polls",
+        "failures",
+        "retries",
+        "unauthorized",
+        "bytes_received",
+        "last_error",
+    )
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+        self.phases = {phase: PhaseHistogram() for phase in PHASES}
+        self.polls = 0
+        self.failures = 0
+        self.retries = 0
+        self.unauthorized = 0
+        self.bytes_received = 0
+        self.last_error: str | None = None
+
+    def observe(self, phase: str, duration_ns: int) -> None:
+        """Record the duration of a phase."""
+        self.phases[phase].observe(duration_ns)
+
+    def as_dict(self) -> dict:
+        """Return every metric as a dictionary."""
+        return {
+            "polls": self.polls,
+            "failures": self.failures,
+            "retries": self.retries,
+            "unauthorized": self.unauthorized,
+            "bytes_received": self.bytes_received,
+            "last_error": self.last_error,
+            "phases": {name: hist.as_dict() for name, hist in self.phases.items()},
+        }
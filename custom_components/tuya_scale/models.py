@@ -0,0 +1,23 @@
+"""Data records of the Tuya Scale integration."""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, NamedTuple
+
+
+class PropertyRecord(NamedTuple):
+    """Processed value of one property.
+
+    The coordinator data maps each code to one of these. Being a tuple it
+    costs a single small allocation per changed property, unchanged ones
+    are shared between polls, and it is stored as a JSON list.
+    """
+
+    value: Any
+    timestamp: int
+    type: str = ''
+
+    @property
+    def last_update(self) -> str:
+        """Return the time of the value, formatted only when it is read."""
+        return datetime.fromtimestamp(self.timestamp / 1000).strftime('%Y-%m-%d %H:%M:%S')
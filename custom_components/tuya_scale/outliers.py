@@ -0,0 +1,210 @@
+"""Rejection of implausible weigh-in readings for the Tuya Scale integration."""
+from __future__ import annotations
+
+import math
+from bisect import bisect_left, insort
+from collections import deque
+
+from .const import (
+    HAMPEL_MIN_DEVIATION,
+    HAMPEL_MIN_SAMPLES,
+    HAMPEL_SHIFT_COUNT,
+    HAMPEL_THRESHOLD,
+    HAMPEL_WINDOW,
+    IMPEDANCE_MAX,
+    IMPEDANCE_MIN,
+)
+
+# Scales the MAD to the standard deviation of normally distributed values
+MAD_SCALE = 1.4826
+
+# Impedance properties, checked against physically plausible bounds
+IMPEDANCE_CODES = frozenset({"BR", "LResistance", "RHR", "LLR", "RLR"})
+FILTERED_CODES = IMPEDANCE_CODES | {"weight"}
+
+
+class HampelWindow:
+    """Median and median absolute deviation of the last ``size`` values.
+
+    The values are kept sorted as well as in arrival order. The median is
+    read by index and the MAD is the k-th smallest of two sorted runs of
+    deviations, the values below and above the median, found by binary
+    search in O(log size) without building the deviations.
+    """
+
+    __slots__ = ("size", "_values", "_sorted", "_run")
+
+    def __init__(self, size: int = HAMPEL_WINDOW) -> None:
+        """Initialize an empty window."""
+        self.size = size
+        self._values: deque[float] = deque()
+        self._sorted: list[float] = []
+        # Consecutive rejected values, a level shift if they agree
+        self._run: list[float] = []
+
+    @property
+    def count(self) -> int:
+        """Return the number of values in the window."""
+        return len(self._values)
+
+    def add(self, value: float) -> None:
+        """Add a value, dropping the oldest one if the window is full."""
+        if len(self._values) == self.size:
+            old = self._values.popleft()
+            del self._sorted[bisect_left(self._sorted, old)]
+        self._values.append(value)
+        insort(self._sorted, value)
+
+    @property
+    def median(self) -> float | None:
+        """Return the median of the window."""
+        values, count = self._sorted, len(self._sorted)
+        if not count:
+            return None
+        middle = count // 2
+        if count % 2:
+            return values[middle]
+        return (values[middle - 1] + values[middle]) / 2
+
+    def mad(self, median: float) -> float:
+        """Return the median absolute deviation from ``median``."""
+        count = len(self._sorted)
+        middle = count // 2
+        if count % 2:
+            return self._kth_deviation(median, middle)
+        return (
+            self._kth_deviation(median, middle - 1) + self._kth_deviation(median, middle)
+        ) / 2
+
+    def _kth_deviation(self, median: float, k: int) -> float:
+        """Return the k-th smallest absolute deviation from ``median``.
+
+        Below the split the deviations ``median - values[split - 1 - i]`` and
+        above it ``values[split + j] - median`` both grow with the index, so
+        this is the k-th smallest element of two sorted arrays.
+        """
+        values = self._sorted
+        split = bisect_left(values, median)
+        below, above = split, len(values) - split
+
+        def lower(i: int) -> float:
+            return median - values[split - 1 - i]
+
+        def upper(j: int) -> float:
+            return values[split + j] - median
+
+        # Find how many of the k + 1 smallest deviations lie below the split
+        low, high = max(0, k + 1 - above), min(k + 1, below)
+        while low < high:
+            taken = (low + high) // 2
+            if lower(taken) < upper(k - taken):
+                low = taken + 1
+            else:
+                high = taken
+        taken = low
+        return max(
+            lower(taken - 1) if taken else -math.inf,
+            upper(k - taken) if taken <= k else -math.inf,
+        )
+
+    def accept(self, value: float) -> bool:
+        """Return False if a value is an outlier of the window.
+
+        Only accepted values enter the window. When HAMPEL_SHIFT_COUNT
+        rejected values in a row agree with each other the weight really
+        changed: the window restarts from them and the value is accepted.
+        """
+        if len(self._values) < HAMPEL_MIN_SAMPLES:
+            self.add(value)
+            return True
+
+        median = self.median
+        limit = HAMPEL_THRESHOLD * max(MAD_SCALE * self.mad(median), HAMPEL_MIN_DEVIATION)
+        if abs(value - median) <= limit:
+            self._run.clear()
+            self.add(value)
+            return True
+
+        self._run.append(value)
+        if len(self._run) >= HAMPEL_SHIFT_COUNT:
+            run = self._run[-HAMPEL_SHIFT_COUNT:]
+            if max(run) - min(run) <= limit:
+                self._values.clear()
+                self._sorted.clear()
+                self._run.clear()
+                for shifted in run:
+                    self.add(shifted)
+                return True
+        return False
+
+    def as_dict(self) -> dict:
+        """Return the state to persist."""
+        return {"values": list(self._values), "run": list(self._run)}
+
+    @classmethod
+    def from_dict(cls, stored: dict) -> HampelWindow:
+        """Restore a persisted window."""
+        window = cls()
+        for value in stored["values"]:
+            window.add(value)
+        window._run = list(stored["run"])[-HAMPEL_SHIFT_COUNT:]
+        return window
+
+
+class OutlierFilter:
+    """Mark the weight and impedance readings of a scale as plausible or not.
+
+    Weights are compared by a Hampel filter with the recent weights of their
+    stream: the person they were matched to on a shared scale, the scale
+    itself otherwise. A weight that matches none of the people sharing the
+    scale is never judged. Impedances outside the range of a human
+    body come from feet not touching the electrodes properly. A zero
+    reading means nothing was measured and passes.
+    """
+
+    def __init__(self, stored: dict | None = None) -> None:
+        """Initialize the filter, restoring its windows if given."""
+        stored = stored or {}
+        self.windows: dict[str, HampelWindow] = {
+            stream: HampelWindow.from_dict(window)
+            for stream, window in stored.get("windows", {}).items()
+            if isinstance(window, dict)
+        }
+        self.rejected = stored.get("rejected", 0)
+        # Last rejected (value, timestamp) of each code
+        self.last_rejected: dict[str, tuple[float, int]] = {
+            code: tuple(item) for code, item in stored.get("last_rejected", {}).items()
+        }
+
+    def accept(self, code: str, value: float, timestamp: int, stream: str | None = None) -> bool:
+        """Return True if a reading of a property is plausible.
+
+        ``stream`` is the person a weight was matched to, without one the
+        weight is accepted as is.
+        """
+        if code in IMPEDANCE_CODES:
+            accepted = not value or IMPEDANCE_MIN <= value <= IMPEDANCE_MAX
+        elif code == "weight" and value and stream is not None:
+            if (window := self.windows.get(stream)) is None:
+                window = self.windows[stream] = HampelWindow()
+            accepted = window.accept(value)
+        else:
+            return True
+
+        if not accepted:
+            self.rejected += 1
+            self.last_rejected[code] = (value, timestamp)
+        return accepted
+
+    def is_rejected(self, code: str, timestamp: int) -> bool:
+        """Return True if the reading of a code at a time was rejected."""
+        rejected = self.last_rejected.get(code)
+        return rejected is not None and rejected[1] == timestamp
+
+    def as_dict(self) -> dict:
+        """Return the state to persist."""
+        return {
+            "windows": {stream: window.as_dict() for stream, window in self.windows.items()},
+            "rejected": self.rejected,
+            "last_rejected": self.last_rejected,
+        }
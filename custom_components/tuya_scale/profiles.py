@@ -0,0 +1,274 @@
+"""Attribution of shared-scale measurements to the people using it."""
+from __future__ import annotations
+
+import math
+from collections import deque
+
+from homeassistant.const import CONF_NAME
+
+from .body_composition import body_composition
+from .models import PropertyRecord
+from .const import (
+    ASSIGNMENT_HISTORY,
+    BODY_COMPOSITION_CODES,
+    CONF_AGE,
+    CONF_HEIGHT,
+    CONF_PROFILE_ID,
+    CONF_SEX,
+    CONF_WEIGHT,
+    MATCH_MIN_IMPEDANCE_STD,
+    MATCH_MIN_WEIGHT_STD,
+    MATCH_WINDOW,
+    SEX_MALE,
+)
+
+PERSON_CODES = ("weight",) + BODY_COMPOSITION_CODES
+
+
+def person_key(code: str, profile_id: str) -> str:
+    """Return the data key of a person's value."""
+    return f"{code}_{profile_id}"
+
+
+class RollingStats:
+    """Mean and variance of the last values added, updated in O(1).
+
+    Values can also be taken out again, which keeps the statistics exact
+    when a measurement is moved to another person.
+    """
+
+    def __init__(self, size: int) -> None:
+        """Initialize empty statistics over at most ``size`` values."""
+        self._size = size
+        self._values: deque[float] = deque()
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    @property
+    def std(self) -> float:
+        """Return the sample standard deviation."""
+        if self.count < 2:
+            return 0.0
+        return math.sqrt(self._m2 / (self.count - 1))
+
+    def add(self, value: float) -> None:
+        """Add a value, dropping the oldest one if the window is full."""
+        if len(self._values) == self._size:
+            self._exclude(self._values.popleft())
+        self._values.append(value)
+        self._include(value)
+
+    def as_list(self) -> list[float]:
+        """Return the values in the window, oldest first, to persist."""
+        return list(self._values)
+
+    def remove(self, value: float) -> bool:
+        """Remove a value from the window, return False if it is not in it."""
+        try:
+            self._values.remove(value)
+        except ValueError:
+            return False
+        self._exclude(value)
+        return True
+
+    def _include(self, value: float) -> None:
+        """Welford update for an added value."""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    def _exclude(self, value: float) -> None:
+        """Reverse Welford update for a removed value."""
+        if self.count <= 1:
+            self.count, self.mean, self._m2 = 0, 0.0, 0.0
+            return
+        mean = (self.mean * self.count - value) / (self.count - 1)
+        self._m2 = max(0.0, self._m2 - (value - mean) * (value - self.mean))
+        self.mean = mean
+        self.count -= 1
+
+
+class ProfileMatcher:
+    """Find the person whose recent measurements best explain a new one.
+
+    Each person keeps rolling statistics of weight and impedance. A new
+    measurement goes to the person with the smallest squared z-score, which
+    costs one comparison per person and never rescans the history.
+    """
+
+    def __init__(self, profiles: list[dict], stored: dict | None = None) -> None:
+        """Initialize the matcher, restoring its statistics if given.
+
+        A person without stored statistics is seeded with their usual weight.
+        """
+        stored = stored or {}
+        self._stats: dict[str, tuple[RollingStats, RollingStats]] = {}
+        for profile in profiles:
+            weights, impedances = RollingStats(MATCH_WINDOW), RollingStats(MATCH_WINDOW)
+            if (values := stored.get(profile[CONF_PROFILE_ID])) is not None:
+                for weight in values['weights']:
+                    weights.add(weight)
+                for impedance in values['impedances']:
+                    impedances.add(impedance)
+            elif profile.get(CONF_WEIGHT):
+                weights.add(float(profile[CONF_WEIGHT]))
+            self._stats[profile[CONF_PROFILE_ID]] = (weights, impedances)
+
+    def match(self, weight: float, impedance: float | None = None) -> str | None:
+        """Return the id of the best matching person."""
+        best, best_score = None, math.inf
+        for profile_id, (weights, impedances) in self._stats.items():
+            if not weights.count:
+                continue
+            score = ((weight - weights.mean) / max(weights.std, MATCH_MIN_WEIGHT_STD)) ** 2
+            if impedance and impedances.count:
+                score += (
+                    (impedance - impedances.mean)
+                    / max(impedances.std, MATCH_MIN_IMPEDANCE_STD)
+                ) ** 2
+            if score < best_score:
+                best, best_score = profile_id, score
+        return best
+
+    def add(self, profile_id: str, weight: float | None, impedance: float | None) -> None:
+        """Add a measurement to a person's statistics."""
+        weights, impedances = self._stats[profile_id]
+        if weight:
+            weights.add(weight)
+        if impedance:
+            impedances.add(impedance)
+
+    def remove(self, profile_id: str, weight: float | None, impedance: float | None) -> None:
+        """Take a measurement out of a person's statistics."""
+        weights, impedances = self._stats[profile_id]
+        if weight:
+            weights.remove(weight)
+        if impedance:
+            impedances.remove(impedance)
+
+    def as_dict(self) -> dict:
+        """Return the statistics to persist."""
+        return {
+            profile_id: {'weights': weights.as_list(), 'impedances': impedances.as_list()}
+            for profile_id, (weights, impedances) in self._stats.items()
+        }
+
+
+class PersonTracker:
+    """Split the scale's measurements into one set of values per person."""
+
+    def __init__(self, profiles: list[dict], stored: dict | None = None) -> None:
+        """Initialize the tracker, restoring its state if given.
+
+        State of people removed since it was saved is dropped.
+        """
+        stored = stored or {}
+        self.profiles = {profile[CONF_PROFILE_ID]: profile for profile in profiles}
+        self.matcher = ProfileMatcher(profiles, stored.get('matcher'))
+        self._history: deque[dict] = deque(
+            (m for m in stored.get('history', []) if m['profile'] in self.profiles),
+            maxlen=ASSIGNMENT_HISTORY,
+        )
+        self.keys = {
+            person_key(code, profile_id)
+            for profile_id in self.profiles
+            for code in PERSON_CODES
+        }
+
+    def find_profile(self, name_or_id: str) -> str | None:
+        """Return the id of a profile given its id or name."""
+        for profile_id, profile in self.profiles.items():
+            if name_or_id in (profile_id, profile[CONF_NAME]):
+                return profile_id
+        return None
+
+    def update(self, data: dict, previous: dict, changed_codes: set[str]) -> None:
+        """Attribute a new measurement and add each person's values to data."""
+        for key in self.keys:
+            if key in previous:
+                data[key] = previous[key]
+
+        weight = data.get('weight')
+        impedance = data.get('BR')
+
+        if 'weight' in changed_codes and weight and weight.value:
+            # Impedance belongs to this weigh-in only if it is not older
+            ohms = None
+            if impedance and impedance.value and impedance.timestamp >= weight.timestamp:
+                ohms = impedance.value
+            profile_id = self.matcher.match(weight.value, ohms)
+            if profile_id is None:
+                return
+            self.matcher.add(profile_id, weight.value, ohms)
+            self._history.append({
+                'timestamp': weight.timestamp,
+                'profile': profile_id,
+                'weight': weight.value,
+                'impedance': ohms,
+            })
+            self._publish(profile_id, data, changed_codes)
+
+        elif 'BR' in changed_codes and impedance and impedance.value and self._history:
+            # Impedance often arrives a few seconds after the weight
+            latest = self._history[-1]
+            if latest['impedance'] is None and impedance.timestamp >= latest['timestamp']:
+                latest['impedance'] = impedance.value
+                self.matcher.add(latest['profile'], None, impedance.value)
+                self._publish(latest['profile'], data, changed_codes)
+
+    def reassign(
+        self, profile_id: str, timestamp: int | None, data: dict, changed_codes: set[str]
+    ) -> bool:
+        """Move a measurement to another person, the latest one by default."""
+        for measurement in reversed(self._history):
+            if timestamp is None or measurement['timestamp'] == timestamp:
+                break
+        else:
+            return False
+
+        old_profile = measurement['profile']
+        if old_profile == profile_id:
+            return True
+
+        self.matcher.remove(old_profile, measurement['weight'], measurement['impedance'])
+        self.matcher.add(profile_id, measurement['weight'], measurement['impedance'])
+        measurement['profile'] = profile_id
+        self._publish(old_profile, data, changed_codes)
+        self._publish(profile_id, data, changed_codes)
+        return True
+
+    def as_dict(self) -> dict:
+        """Return the state to persist."""
+        return {'matcher': self.matcher.as_dict(), 'history': list(self._history)}
+
+    def _publish(self, profile_id: str, data: dict, changed_codes: set[str]) -> None:
+        """Write a person's latest measurement and estimates into data."""
+        keys = [person_key(code, profile_id) for code in PERSON_CODES]
+        changed_codes.update(keys)
+        for key in keys:
+            data.pop(key, None)
+
+        latest = next(
+            (m for m in reversed(self._history) if m['profile'] == profile_id), None
+        )
+        if latest is None:
+            return
+
+        values = {'weight': latest['weight']}
+        profile = self.profiles[profile_id]
+        if latest['impedance'] and profile.get(CONF_HEIGHT) and profile.get(CONF_AGE):
+            result = body_composition(
+                [latest['weight']],
+                [latest['impedance']],
+                height=profile[CONF_HEIGHT],
+                age=profile[CONF_AGE],
+                male=profile.get(CONF_SEX, SEX_MALE) == SEX_MALE,
+            )
+            values.update((code, round(float(v[0]), 1)) for code, v in result.items())
+
+        for code, value in values.items():
+            data[person_key(code, profile_id)] = PropertyRecord(
+                value, latest['timestamp'], 'derived'
+            )
@@ -0,0 +1,93 @@
+"""Adaptive poll scheduling for the Tuya Scale integration."""
+from __future__ import annotations
+
+import time
+
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    ADAPTIVE_BURST_DURATION,
+    ADAPTIVE_BURST_INTERVAL,
+    ADAPTIVE_HABIT_DECAY,
+    ADAPTIVE_HABIT_MIN_MEASUREMENTS,
+    ADAPTIVE_HABIT_SHARE,
+)
+
+# Keeps 2 ** idle_polls from growing without bound on a scale nobody uses
+MAX_BACKOFF_EXPONENT = 16
+
+
+class AdaptivePollScheduler:
+    """Choose the delay until the next poll from recent weigh-in activity.
+
+    A new measurement starts a short burst of fast polls, because the
+    impedance properties of a weigh-in arrive a few seconds after the weight.
+    Once the burst is over the interval doubles on every idle poll, from the
+    configured scan interval up to the ceiling. During hours in which the
+    scale is usually used the interval stays at the scan interval.
+    """
+
+    def __init__(self, min_interval: float, max_interval: float) -> None:
+        """Initialize the scheduler with intervals in seconds."""
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self._last_count = None
+        self._last_measured_at = None
+        self._burst_until = 0.0
+        self._idle_polls = 0
+        self._habit_hours = [0.0] * 24
+
+    def observe(self, weight_count, measured_at: int) -> bool:
+        """Record a poll result and return True if it holds a new measurement.
+
+        ``measured_at`` is the newest property timestamp in milliseconds.
+        """
+        is_new = self._last_measured_at is not None and (
+            weight_count != self._last_count
+            or measured_at > self._last_measured_at
+        )
+        self._last_count = weight_count
+        self._last_measured_at = max(measured_at, self._last_measured_at or 0)
+
+        if is_new:
+            self._burst_until = time.monotonic() + ADAPTIVE_BURST_DURATION
+            self._idle_polls = 0
+            self._record_habit(measured_at)
+        elif not self._in_burst:
+            self._idle_polls = min(self._idle_polls + 1, MAX_BACKOFF_EXPONENT)
+
+        return is_new
+
+    def set_bounds(self, min_interval: float, max_interval: float) -> None:
+        """Change the intervals, keeping the learned activity."""
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+
+    @property
+    def interval(self) -> float:
+        """Return the number of seconds until the next poll."""
+        if self._in_burst:
+            return min(ADAPTIVE_BURST_INTERVAL, self.min_interval)
+        if self._is_habit_hour(dt_util.now().hour):
+            return self.min_interval
+        return min(self.max_interval, self.min_interval * 2 ** self._idle_polls)
+
+    @property
+    def _in_burst(self) -> bool:
+        """Return True while fast polling after a new measurement."""
+        return time.monotonic() < self._burst_until
+
+    def _record_habit(self, measured_at: int) -> None:
+        """Add a measurement to the decaying histogram of weigh-in hours."""
+        hour = dt_util.as_local(dt_util.utc_from_timestamp(measured_at / 1000)).hour
+        self._habit_hours = [
+            weight * ADAPTIVE_HABIT_DECAY for weight in self._habit_hours
+        ]
+        self._habit_hours[hour] += 1.0
+
+    def _is_habit_hour(self, hour: int) -> bool:
+        """Return True if a large share of recent weigh-ins fell in this hour."""
+        total = sum(self._habit_hours)
+        if total < ADAPTIVE_HABIT_MIN_MEASUREMENTS:
+            return False
+        return self._habit_hours[hour] / total >= ADAPTIVE_HABIT_SHARE
@@ -0,0 +1,170 @@
+"""Data point schema of a Tuya scale and the decoders compiled from it."""
+from __future__ import annotations
+
+import json
+import logging
+from collections.abc import Callable
+from datetime import datetime
+from typing import Any
+
+import aiohttp
+from homeassistant.const import UnitOfMass
+
+from .api import TuyaScaleApiClient, TuyaScaleApiError, TuyaScaleTokenManager
+from .const import SPECIFICATION_PATH
+
+_LOGGER = logging.getLogger(__name__)
+
+# Factors to kilograms, weight is always decoded to kg
+MASS_UNITS = {
+    "g": 0.001,
+    "kg": 1.0,
+    "lb": 0.45359237,
+}
+
+
+class DpSchema:
+    """Type, unit and scale of one data point."""
+
+    __slots__ = ("code", "type", "unit", "scale")
+
+    def __init__(self, code: str, dp_type: str, unit: str | None = None, scale: int = 0) -> None:
+        """Initialize the schema."""
+        self.code = code
+        self.type = dp_type
+        self.unit = unit
+        self.scale = scale
+
+    @classmethod
+    def from_status(cls, status: dict) -> DpSchema:
+        """Create the schema of a status entry of the specification."""
+        values = status.get("values") or {}
+        if isinstance(values, str):
+            try:
+                values = json.loads(values)
+            except ValueError:
+                values = {}
+        return cls(
+            status["code"],
+            status.get("type", ""),
+            values.get("unit") or None,
+            int(values.get("scale") or 0),
+        )
+
+    def as_dict(self) -> dict:
+        """Return the schema as a dictionary."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _time_or_timestamp(value: Any, timestamp: int) -> Any:
+    """Return the reported time, or the property's time if it is empty."""
+    if value:
+        return value
+    return datetime.fromtimestamp(timestamp / 1000).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _compile(schema: DpSchema) -> Callable[[Any, int], Any] | None:
+    """Return the decoder of one data point, None if values are kept as is."""
+    if schema.code == "time" and schema.type.lower() == "string":
+        return _time_or_timestamp
+    if schema.type == "Boolean":
+        return lambda value, _timestamp: bool(value)
+    if schema.type != "Integer":
+        return None
+
+    # Rounded to the digits of the scale, the factor is no exact binary number
+    factor = 10.0 ** -schema.scale
+    digits = max(schema.scale, 0)
+    if schema.code == "weight":
+        factor *= MASS_UNITS.get(schema.unit or "g", MASS_UNITS["g"])
+        digits += 3
+    if factor == 1.0:
+        return None
+    return lambda value, _timestamp: round(value * factor, digits)
+
+
+# Schema assumed until the device's specification is known
+DEFAULT_SCHEMA = {
+    "weight": DpSchema("weight", "Integer", UnitOfMass.GRAMS),
+    "battery": DpSchema("battery", "Boolean"),
+    "time": DpSchema("time", "String"),
+}
+
+
+class DecoderTable:
+    """Decoders of a device's properties, compiled once from its schema.
+
+    Decoding a property is one dictionary lookup and at most one call, and
+    every conversion happens here only: the weight leaves it in kilograms.
+    """
+
+    def __init__(self, schema: dict[str, DpSchema] | None = None) -> None:
+        """Initialize the table, with the default schema if none is given."""
+        self.schema = dict(DEFAULT_SCHEMA)
+        if schema:
+            self.schema.update(schema)
+        self._decoders = {
+            code: decoder
+            for code, dp_schema in self.schema.items()
+            if (decoder := _compile(dp_schema)) is not None
+        }
+        self.from_specification = bool(schema)
+        # Codes of the device's specification, they all get a sensor
+        self.spec_codes = set(schema) if schema else set()
+
+    def decode(self, code: str, value: Any, timestamp: int) -> Any:
+        """Return the decoded value of a property."""
+        decoder = self._decoders.get(code)
+        if decoder is None or value is None:
+            return value
+        return decoder(value, timestamp)
+
+    def unit(self, code: str) -> str | None:
+        """Return the unit of a decoded property."""
+        if code == "weight":
+            return UnitOfMass.KILOGRAMS
+        dp_schema = self.schema.get(code)
+        return dp_schema.unit if dp_schema is not None else None
+
+    def is_numeric(self, code: str) -> bool:
+        """Return True if a property is a number."""
+        dp_schema = self.schema.get(code)
+        return dp_schema is not None and dp_schema.type == "Integer"
+
+    def as_list(self) -> list[dict]:
+        """Return the schema of the specification for storage."""
+        return [s.as_dict() for s in self.schema.values()] if self.from_specification else []
+
+    @classmethod
+    def from_list(cls, items: list[dict]) -> DecoderTable:
+        """Create a table from a stored schema."""
+        return cls({
+            item["code"]: DpSchema(item["code"], item["type"], item["unit"], item["scale"])
+            for item in items
+        })
+
+
+async def async_fetch_decoders(
+    client: TuyaScaleApiClient,
+    tokens: TuyaScaleTokenManager,
+    device_id: str,
+    timeout: aiohttp.ClientTimeout | None = None,
+) -> DecoderTable:
+    """Fetch a device's specification and compile its decoders."""
+    access_token = await tokens.async_get_access_token()
+    status, result = await client.async_get(
+        SPECIFICATION_PATH.format(device_id=device_id), access_token, timeout=timeout
+    )
+    if status != 200 or not result.get("success", False):
+        if status == 401:
+            tokens.invalidate(access_token)
+        raise TuyaScaleApiError(
+            f"Specification request failed ({status}): {result.get('msg', '')}"
+        )
+
+    statuses = result.get("result", {}).get("status", [])
+    _LOGGER.debug("Specification of %s has %s data points", device_id, len(statuses))
+    return DecoderTable({
+        dp_schema.code: dp_schema
+        for dp_schema in (DpSchema.from_status(s) for s in statuses if "code" in s)
+    })
@@ -6,52 +6,134 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.const import (
+    CONF_NAME,
     UnitOfMass,
 )
+from homeassistant.core import callback
+from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import (
     DOMAIN,
     SENSOR_TYPES,
+    DIAGNOSTIC_SENSOR_TYPES,
+    TREND_SENSOR_TYPES,
     DEFAULT_NAME,
     DEFAULT_MANUFACTURER,
     DEFAULT_MODEL,
 )
+from .profiles import PERSON_CODES, person_key
+from .trends import trend_key
 
 _LOGGER = logging.getLogger(__name__)
 
-async def async_setup_entry(hass, config_entry, async_add_entities):
-    """Set up the Tuya Scale sensors."""
-    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+# Predefined sensors by the property code they show
+PROPERTY_SENSOR_TYPES = {info["key"]: info for info in SENSOR_TYPES.values()}
+
+
+def _property_sensors(coordinator, codes):
+    """Return the sensors of the given property codes that have one."""
+    decoders = coordinator.decoders
     sensors = []
-    
-    for sensor_type, sensor_info in SENSOR_TYPES.items():
-        key = sensor_info["key"]
-        if coordinator.data is not None and key in coordinator.data:
+    for code in sorted(codes):
+        sensor_info = PROPERTY_SENSOR_TYPES.get(code)
+        if sensor_info is not None:
             sensors.append(TuyaScaleSensor(
                 coordinator,
-                key,
+                code,
                 sensor_info["name"],
                 sensor_info.get("unit"),
                 sensor_info.get("icon"),
                 sensor_info.get("device_class"),
-                sensor_info.get("state_class")
+                sensor_info.get("state_class"),
+                sensor_info.get("suggested_unit")
             ))
+        # Data points of the specification without a predefined sensor
+        elif code in decoders.spec_codes:
+            sensors.append(TuyaScaleSensor(
+                coordinator,
+                code,
+                code.replace("_", " ").title(),
+                decoders.unit(code),
+                state_class="measurement" if decoders.is_numeric(code) else None
+            ))
+    return sensors
+
+
+async def async_setup_entry(hass, config_entry, async_add_entities):
+    """Set up the Tuya Scale sensors."""
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    sensors = _property_sensors(coordinator, coordinator.known_codes)
+    added = {sensor._key for sensor in sensors}
+
+    @callback
+    def async_add_property_sensors(codes):
+        """Add the sensors of property codes seen after setup."""
+        new_sensors = _property_sensors(coordinator, codes - added)
+        if new_sensors:
+            added.update(sensor._key for sensor in new_sensors)
+            async_add_entities(new_sensors)
+
+    config_entry.async_on_unload(
+        coordinator.async_add_code_listener(async_add_property_sensors)
+    )
+    
+    # Her kişi için kendi sensör seti
+    if coordinator.persons is not None:
+        for profile_id, profile in coordinator.persons.profiles.items():
+            for code in PERSON_CODES:
+                sensor_info = SENSOR_TYPES[code]
+                sensors.append(TuyaScaleSensor(
+                    coordinator,
+                    person_key(code, profile_id),
+                    f"{profile[CONF_NAME]} {sensor_info['name']}",
+                    sensor_info.get("unit"),
+                    sensor_info.get("icon"),
+                    sensor_info.get("device_class"),
+                    sensor_info.get("state_class")
+                ))
+    
+    # Running weight statistics of the scale and of each person
+    for source, prefix in coordinator.trend_sources.items():
+        for suffix, sensor_info in TREND_SENSOR_TYPES.items():
+            sensors.append(TuyaScaleSensor(
+                coordinator,
+                trend_key(source, suffix),
+                f"{prefix}{sensor_info['name']}",
+                UnitOfMass.KILOGRAMS,
+                sensor_info["icon"],
+                "weight",
+                "measurement",
+                enabled_default=sensor_info["enabled"]
+            ))
+
+    for sensor_info in DIAGNOSTIC_SENSOR_TYPES.values():
+        sensors.append(TuyaScaleDiagnosticSensor(
+            coordinator,
+            sensor_info["key"],
+            sensor_info["name"],
+            sensor_info.get("unit"),
+            sensor_info.get("icon"),
+            sensor_info.get("state_class")
+        ))
     
     async_add_entities(sensors)
 
 class TuyaScaleSensor(CoordinatorEntity, SensorEntity):
     """Representation of a Tuya Scale Sensor."""
 
-    def __init__(self, coordinator, key, name, unit=None, icon=None, device_class=None, state_class=None):
+    def __init__(self, coordinator, key, name, unit=None, icon=None, device_class=None, state_class=None, suggested_unit=None, enabled_default=True):
         """Initialize the sensor."""
         super().__init__(coordinator)
         self._key = key
+        self._last_available = None
         self._attr_name = f"{DEFAULT_NAME} {name}"
         self._attr_native_unit_of_measurement = unit
         self._attr_icon = icon
         self._attr_device_class = device_class
         self._attr_state_class = state_class
+        self._attr_suggested_unit_of_measurement = suggested_unit
+        self._attr_entity_registry_enabled_default = enabled_default
         self._attr_unique_id = f"{coordinator.device_id}_{key}"
         
         self._attr_device_info = {
@@ -67,17 +149,7 @@ class TuyaScaleSensor(CoordinatorEntity, SensorEntity):
         if self.coordinator.data is None or self._key not in self.coordinator.data:
             return None
             
-        data = self.coordinator.data[self._key]
-        if isinstance(data, dict):
-            value = data.get('value')
-        else:
-            value = data
-            
-        # Eğer ağırlık sensörü ise API'den gelen ham değeri döndür
-        if self._key == "weight" and value is not None:
-            return float(value) * 1000  # API'den gelen değeri 1000 ile çarp
-        
-        return value
+        return self.coordinator.data[self._key].value
 
     @property
     def extra_state_attributes(self):
@@ -85,12 +157,69 @@ class TuyaScaleSensor(CoordinatorEntity, SensorEntity):
         if self.coordinator.data is None or self._key not in self.coordinator.data:
             return None
             
-        data = self.coordinator.data[self._key]
-        if not isinstance(data, dict):
-            return None
-            
-        return {
-            "last_update": data.get("last_update"),
-            "timestamp": data.get("timestamp"),
-            "raw_value": data.get("value")
+        record = self.coordinator.data[self._key]
+        attributes = {
+            "last_update": record.last_update,
+            "timestamp": record.timestamp,
+            "raw_value": record.value,
+            "stale": self.coordinator.stale,
         }
+        outliers = self.coordinator.outliers
+        rejected = outliers.last_rejected.get(self._key)
+        if rejected is not None:
+            attributes["rejected"] = outliers.is_rejected(self._key, record.timestamp)
+            attributes["rejected_value"], attributes["rejected_timestamp"] = rejected
+        return attributes
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only when this entity's property or availability changed."""
+        available = self.available
+        if self._key in self.coordinator.changed_codes or available != self._last_available:
+            self._last_available = available
+            self.async_write_ha_state()
+
+
+class TuyaScaleDiagnosticSensor(CoordinatorEntity, SensorEntity):
+    """Representation of a Tuya Scale request metric.
+
+    Disabled by default; the metrics are only read when one is enabled.
+    """
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, coordinator, key, name, unit=None, icon=None, state_class=None):
+        """Initialize the diagnostic sensor."""
+        super().__init__(coordinator)
+        self._key = key
+        self._attr_name = f"{DEFAULT_NAME} {name}"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_icon = icon
+        self._attr_state_class = state_class
+        self._attr_unique_id = f"{coordinator.device_id}_{key}"
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, coordinator.device_id)},
+            "name": DEFAULT_NAME,
+            "manufacturer": DEFAULT_MANUFACTURER,
+            "model": DEFAULT_MODEL,
+        }
+
+    @property
+    def available(self):
+        """Return True, metrics are most useful while polls fail."""
+        return True
+
+    @property
+    def native_value(self):
+        """Return the value of the metric."""
+        metrics = self.coordinator.metrics
+        if self._key == "poll_duration":
+            return round(metrics.phases["poll"].last_ns / 1e6, 1)
+        if self._key == "tokens_minted":
+            return self.coordinator.hub.tokens.tokens_minted
+        if self._key == "rejected_readings":
+            return self.coordinator.outliers.rejected
+        if self._key == "last_error":
+            return metrics.last_error[:255] if metrics.last_error else None
+        return getattr(metrics, self._key)
@@ -0,0 +1,79 @@
+"""Services for the Tuya Scale integration."""
+from __future__ import annotations
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+
+from .const import (
+    ATTR_DEVICE_ID,
+    ATTR_POLLS,
+    ATTR_PROFILE,
+    ATTR_TIMESTAMP,
+    DOMAIN,
+    SERVICE_REASSIGN_MEASUREMENT,
+    SERVICE_TRACE_POLLS,
+    TRACE_MAX_POLLS,
+)
+
+REASSIGN_MEASUREMENT_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_DEVICE_ID): cv.string,
+        vol.Required(ATTR_PROFILE): cv.string,
+        vol.Optional(ATTR_TIMESTAMP): vol.Coerce(int),
+    }
+)
+
+TRACE_POLLS_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_DEVICE_ID): cv.string,
+        vol.Optional(ATTR_POLLS, default=10): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=TRACE_MAX_POLLS)
+        ),
+    }
+)
+
+
+def _get_coordinator(hass: HomeAssistant, device_id: str):
+    """Return the coordinator of a Tuya device id."""
+    for coordinator in hass.data.get(DOMAIN, {}).values():
+        if coordinator.device_id == device_id:
+            return coordinator
+    raise HomeAssistantError(f"Unknown Tuya Scale device: {device_id}")
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration's services once."""
+    if hass.services.has_service(DOMAIN, SERVICE_REASSIGN_MEASUREMENT):
+        return
+
+    @callback
+    def async_reassign_measurement(call: ServiceCall) -> None:
+        """Move a measurement to another person."""
+        coordinator = _get_coordinator(hass, call.data[ATTR_DEVICE_ID])
+        coordinator.async_reassign_measurement(
+            call.data[ATTR_PROFILE], call.data.get(ATTR_TIMESTAMP)
+        )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_REASSIGN_MEASUREMENT,
+        async_reassign_measurement,
+        schema=REASSIGN_MEASUREMENT_SCHEMA,
+    )
+
+    @callback
+    def async_trace_polls(call: ServiceCall) -> None:
+        """Capture every payload of a scale's next polls."""
+        coordinator = _get_coordinator(hass, call.data[ATTR_DEVICE_ID])
+        coordinator.async_trace_polls(call.data[ATTR_POLLS])
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_TRACE_POLLS,
+        async_trace_polls,
+        schema=TRACE_POLLS_SCHEMA,
+    )
@@ -0,0 +1,93 @@
+"""Assembly of the properties of one weigh-in into a single measurement."""
+from __future__ import annotations
+
+from .models import PropertyRecord
+
+# Properties a scale reports for each weigh-in
+SESSION_CODES = frozenset({"weight", "BR", "LResistance", "RHR", "LLR", "RLR", "weightcount"})
+
+
+class MeasurementSession:
+    """Properties collected for one weigh-in."""
+
+    __slots__ = ("start", "count", "values", "deferred", "data")
+
+    def __init__(self, start: int) -> None:
+        """Initialize the session."""
+        self.start = start
+        self.count = None
+        self.values: dict[str, PropertyRecord] = {}
+        # Changed codes whose entities are written once the session completes
+        self.deferred: set[str] = set()
+        self.data: dict[str, PropertyRecord] = {}
+
+    def as_event_data(self) -> dict:
+        """Return the values of the measurement, derived ones included."""
+        return {
+            "timestamp": self.start,
+            "count": self.count,
+            "values": {
+                code: self.data[code].value for code in sorted(self.deferred) if code in self.data
+            },
+        }
+
+
+class SessionAssembler:
+    """Group the properties of a weigh-in arriving over several updates.
+
+    The first changed weigh-in property opens a session. It completes when
+    every weigh-in property the device reports has arrived, or when a new
+    ``weightcount`` shows the next weigh-in started. The coordinator expires
+    sessions that stay incomplete. Until then the changed codes are held
+    back, so the entities of a weigh-in are written together.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the assembler."""
+        self.session: MeasurementSession | None = None
+
+    def feed(
+        self, data: dict, changed_codes: set[str], expected: set[str]
+    ) -> tuple[set[str], list[MeasurementSession]]:
+        """Add an update, return the codes to publish and completed sessions."""
+        release: set[str] = set()
+        completed: list[MeasurementSession] = []
+        measured = {code for code in changed_codes & SESSION_CODES if code in data}
+
+        if measured:
+            count = data["weightcount"].value if "weightcount" in measured else None
+            if (
+                self.session is not None
+                and count is not None
+                and self.session.count is not None
+                and count != self.session.count
+            ):
+                completed.append(self._finish())
+                release |= completed[-1].deferred
+            if self.session is None:
+                self.session = MeasurementSession(
+                    min(data[code].timestamp for code in measured)
+                )
+            for code in measured:
+                self.session.values[code] = data[code]
+            if count is not None:
+                self.session.count = count
+
+        if self.session is None:
+            return release | changed_codes, completed
+
+        self.session.deferred |= changed_codes
+        self.session.data = data
+        if expected <= self.session.values.keys():
+            completed.append(self._finish())
+            release |= completed[-1].deferred
+        return release, completed
+
+    def expire(self) -> MeasurementSession | None:
+        """Complete the open session with whatever it collected."""
+        return self._finish() if self.session is not None else None
+
+    def _finish(self) -> MeasurementSession:
+        """Close the open session and return it."""
+        session, self.session = self.session, None
+        return session
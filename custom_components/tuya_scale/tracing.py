@@ -0,0 +1,110 @@
+"""Redacted, sampled payload logging for the Tuya Scale integration."""
+from __future__ import annotations
+
+import json
+import logging
+import time
+from collections import deque
+from typing import Any
+
+from .const import LOG_MAX_PAYLOAD, LOG_SAMPLE_EVERY, TRACE_CAPTURE_SIZE
+
+REDACTED = "**REDACTED**"
+
+# Keys never written to a log, whatever the level
+SENSITIVE_KEYS = frozenset({
+    "access_id",
+    "access_key",
+    "access_token",
+    "client_id",
+    "ip",
+    "lat",
+    "local_key",
+    "lon",
+    "refresh_token",
+    "sign",
+    "uid",
+})
+
+
+def redact(payload: Any) -> Any:
+    """Return a copy of a payload with sensitive values replaced."""
+    if isinstance(payload, dict):
+        return {
+            key: REDACTED if key in SENSITIVE_KEYS else redact(value)
+            for key, value in payload.items()
+        }
+    if isinstance(payload, (list, tuple)):
+        return [redact(value) for value in payload]
+    return payload
+
+
+class LazyJson:
+    """A payload that is only redacted and serialized when it is formatted.
+
+    Passed as a logging argument, it costs nothing unless a handler actually
+    emits the record.
+    """
+
+    __slots__ = ("_payload", "_max_size")
+
+    def __init__(self, payload: Any, max_size: int | None = LOG_MAX_PAYLOAD) -> None:
+        """Initialize the payload."""
+        self._payload = payload
+        self._max_size = max_size
+
+    def __str__(self) -> str:
+        """Return the redacted payload as JSON, truncated to the maximum size."""
+        text = json.dumps(redact(self._payload), default=str)
+        if self._max_size is not None and len(text) > self._max_size:
+            return f"{text[:self._max_size]}... ({len(text)} chars)"
+        return text
+
+
+class PayloadLogger:
+    """Debug logging of one scale's payloads.
+
+    Outside a trace only one poll in ``sample_every`` is logged, truncated,
+    and only when the logger is enabled for DEBUG. While a trace is running
+    every payload of the traced polls is logged in full and also kept in
+    memory for the diagnostics dump. Sensitive values are always redacted.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        sample_every: int = LOG_SAMPLE_EVERY,
+        max_size: int = LOG_MAX_PAYLOAD,
+    ) -> None:
+        """Initialize the payload logger."""
+        self._logger = logger
+        self._sample_every = sample_every
+        self._max_size = max_size
+        self._polls = 0
+        self._sampled = False
+        self._tracing = False
+        self.trace_remaining = 0
+        self.captures: deque[dict] = deque(maxlen=TRACE_CAPTURE_SIZE)
+
+    def start_trace(self, polls: int) -> None:
+        """Capture every payload of the next polls."""
+        self.trace_remaining = polls
+        self.captures.clear()
+
+    def begin_poll(self) -> None:
+        """Decide whether the payloads of the poll starting now are logged."""
+        self._tracing = self.trace_remaining > 0
+        if self._tracing:
+            self.trace_remaining -= 1
+        self._sampled = self._polls % self._sample_every == 0
+        self._polls += 1
+
+    def log(self, message: str, payload: Any) -> None:
+        """Log a payload of the current poll if it is sampled or traced."""
+        if self._tracing:
+            self.captures.append(
+                {"time": time.time(), "message": message, "payload": redact(payload)}
+            )
+            self._logger.debug("%s: %s", message, LazyJson(payload, None))
+        elif self._sampled and self._logger.isEnabledFor(logging.DEBUG):
+            self._logger.debug("%s: %s", message, LazyJson(payload, self._max_size))
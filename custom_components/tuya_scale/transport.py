@@ -0,0 +1,310 @@
+"""Transports reading a Tuya scale's properties."""
+from __future__ import annotations
+
+import asyncio
+import binascii
+import json
+import logging
+import struct
+import time
+from collections.abc import Callable
+
+import aiohttp
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.padding import PKCS7
+
+from .api import (
+    TuyaScaleApiClient,
+    TuyaScaleApiError,
+    TuyaScaleConnectionError,
+    TuyaScaleTokenManager,
+)
+from .metrics import PHASE_TOKEN, TuyaScaleMetrics
+from .tracing import PayloadLogger
+from .const import (
+    DEVICE_DATA_PATH,
+    ERROR_CODE_TOKEN_INVALID,
+    LOCAL_PORT,
+    LOCAL_TIMEOUT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Tuya LAN protocol framing
+FRAME_PREFIX = 0x000055AA
+FRAME_SUFFIX = 0x0000AA99
+FRAME_HEADER = struct.Struct(">4I")  # prefix, sequence, command, length
+FRAME_TRAILER = struct.Struct(">2I")  # crc32, suffix
+COMMAND_DP_QUERY = 0x0A
+PROTOCOL_VERSION_HEADER = b"3.3"
+PROTOCOL_VERSION_HEADER_LENGTH = 15  # version plus 12 reserved bytes
+
+# Weight of the newest sample in the average latency
+LATENCY_SMOOTHING = 0.2
+
+
+class TransportStats:
+    """Request counters and latency of one transport."""
+
+    __slots__ = ("requests", "failures", "last_latency", "average_latency", "last_error")
+
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self.requests = 0
+        self.failures = 0
+        self.last_latency: float | None = None
+        self.average_latency: float | None = None
+        self.last_error: str | None = None
+
+    def record(self, latency: float, error: Exception | None = None) -> None:
+        """Record the outcome of one request, latency in seconds."""
+        self.requests += 1
+        self.last_latency = latency
+        if self.average_latency is None:
+            self.average_latency = latency
+        else:
+            self.average_latency += LATENCY_SMOOTHING * (latency - self.average_latency)
+        if error is not None:
+            self.failures += 1
+            self.last_error = str(error)
+
+    def as_dict(self) -> dict:
+        """Return the counters as a dictionary."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class TuyaScaleTransport:
+    """Base class of a way to read a scale's properties.
+
+    Properties are returned in the format of the cloud shadow properties
+    endpoint. ``partial`` transports may not report every code and are
+    merged into the existing data instead of replacing it.
+    """
+
+    name = ""
+    partial = False
+
+    def __init__(self) -> None:
+        """Initialize the transport."""
+        self.stats = TransportStats()
+
+    async def async_get_properties(self) -> list:
+        """Read the properties and record the request's latency."""
+        start = time.perf_counter()
+        try:
+            properties = await self._async_get_properties()
+        except Exception as err:
+            self.stats.record(time.perf_counter() - start, err)
+            raise
+        self.stats.record(time.perf_counter() - start)
+        return properties
+
+    async def _async_get_properties(self) -> list:
+        """Read the properties."""
+        raise NotImplementedError
+
+
+class CloudTransport(TuyaScaleTransport):
+    """Read properties from the Tuya cloud device shadow."""
+
+    name = "cloud"
+
+    def __init__(
+        self,
+        client: TuyaScaleApiClient,
+        tokens: TuyaScaleTokenManager,
+        device_id: str,
+        metrics: TuyaScaleMetrics | None = None,
+        timeout: aiohttp.ClientTimeout | None = None,
+        payload_log: PayloadLogger | None = None,
+    ) -> None:
+        """Initialize the cloud transport."""
+        super().__init__()
+        self._metrics = metrics
+        self._payload_log = payload_log
+        # Timeout of the entry, the client is shared with other entries
+        self.timeout = timeout
+        self._client = client
+        self._tokens = tokens
+        self._path = DEVICE_DATA_PATH.format(device_id=device_id)
+        # DP id to code, learned from the shadow for the local transport
+        self.dp_codes: dict[int, str] = {}
+
+    async def _async_get_properties(self) -> list:
+        """Fetch the device's shadow properties.
+
+        A request rejected because of its token is retried once with a fresh
+        token instead of going through a nested refresh of the coordinator.
+        """
+        for attempt in range(2):
+            start = time.perf_counter_ns()
+            access_token = await self._tokens.async_get_access_token()
+            if self._metrics is not None:
+                self._metrics.observe(PHASE_TOKEN, time.perf_counter_ns() - start)
+
+            _LOGGER.debug("Getting device data from %s%s", self._client.endpoint, self._path)
+
+            status, result = await self._client.async_get(
+                self._path, access_token, self._metrics, timeout=self.timeout,
+                payload_log=self._payload_log,
+            )
+
+            token_rejected = status == 401 or (
+                status == 200
+                and not result.get('success', False)
+                and (
+                    result.get('code') == ERROR_CODE_TOKEN_INVALID
+                    or 'token' in result.get('msg', '').lower()
+                )
+            )
+            if token_rejected and attempt == 0:
+                _LOGGER.info("Token invalid, refreshing...")
+                self._tokens.invalidate(access_token)
+                continue
+
+            if status >= 500:
+                raise TuyaScaleConnectionError(f"HTTP error {status}")
+
+            if status != 200:
+                raise TuyaScaleApiError(f"HTTP error {status}")
+
+            if not result.get('success', False):
+                raise TuyaScaleApiError(f"API error: {result.get('msg', '')}")
+
+            properties = result.get('result', {}).get('properties', [])
+            for prop in properties:
+                if 'dp_id' in prop:
+                    self.dp_codes[prop['dp_id']] = prop['code']
+            return properties
+
+
+class LocalTransport(TuyaScaleTransport):
+    """Read properties from the scale over the Tuya LAN protocol (3.3).
+
+    The device answers a DP query with its data points keyed by numeric DP
+    id; they are mapped to property codes with the table the cloud
+    transport learns from the shadow. Local frames carry no per-property
+    time, so a value keeps the time at which it was first seen. With
+    ``last_seen``, which returns the time and raw value of a code last seen
+    by any transport, an unchanged value keeps the time the cloud reported
+    or that was restored, instead of becoming a new reading.
+    """
+
+    name = "local"
+    partial = True
+
+    def __init__(
+        self,
+        host: str,
+        device_id: str,
+        local_key: str,
+        dp_codes: dict[int, str],
+        port: int = LOCAL_PORT,
+        last_seen: Callable[[str], tuple | None] | None = None,
+    ) -> None:
+        """Initialize the local transport."""
+        super().__init__()
+        self._host = host
+        self._port = port
+        self._device_id = device_id
+        self._key = local_key.encode('utf-8')
+        self._dp_codes = dp_codes
+        self._sequence = 0
+        self._seen: dict[str, tuple] = {}
+        self._last_seen = last_seen or self._seen.get
+
+    async def _async_get_properties(self) -> list:
+        """Query the device's data points."""
+        if not self._dp_codes:
+            raise TuyaScaleApiError("DP codes not known yet, waiting for the cloud")
+
+        try:
+            query = self._build_query()
+        except ValueError as err:
+            raise TuyaScaleApiError(f"Invalid local key: {err}") from err
+
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(self._host, self._port), LOCAL_TIMEOUT
+            )
+        except (OSError, asyncio.TimeoutError) as err:
+            raise TuyaScaleConnectionError(f"Local connection failed: {err}") from err
+
+        try:
+            writer.write(query)
+            await writer.drain()
+            payload = await asyncio.wait_for(self._async_read_frame(reader), LOCAL_TIMEOUT)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as err:
+            raise TuyaScaleConnectionError(f"Local request failed: {err}") from err
+        finally:
+            writer.close()
+
+        # A wrong local key shows as bad padding or undecodable JSON
+        try:
+            return self._to_properties(json.loads(self._decrypt(payload)))
+        except ValueError as err:
+            raise TuyaScaleApiError(f"Invalid local reply: {err}") from err
+
+    def _build_query(self) -> bytes:
+        """Build an encrypted DP query frame."""
+        self._sequence += 1
+        t = str(int(time.time()))
+        body = json.dumps(
+            {'gwId': self._device_id, 'devId': self._device_id, 'uid': self._device_id, 't': t},
+            separators=(',', ':'),
+        ).encode('utf-8')
+        payload = self._encrypt(body)
+        header = FRAME_HEADER.pack(
+            FRAME_PREFIX, self._sequence, COMMAND_DP_QUERY, len(payload) + FRAME_TRAILER.size
+        )
+        crc = binascii.crc32(header + payload) & 0xFFFFFFFF
+        return header + payload + FRAME_TRAILER.pack(crc, FRAME_SUFFIX)
+
+    async def _async_read_frame(self, reader: asyncio.StreamReader) -> bytes:
+        """Read one reply frame and return its payload."""
+        while True:
+            prefix, _sequence, command, length = FRAME_HEADER.unpack(
+                await reader.readexactly(FRAME_HEADER.size)
+            )
+            if prefix != FRAME_PREFIX:
+                raise TuyaScaleApiError("Invalid frame prefix")
+            body = await reader.readexactly(length)
+            # Skip heartbeats and other frames the device may interleave
+            if command == COMMAND_DP_QUERY:
+                break
+
+        # Replies start with a 4 byte return code
+        payload = body[4:-FRAME_TRAILER.size]
+        if payload.startswith(PROTOCOL_VERSION_HEADER):
+            payload = payload[PROTOCOL_VERSION_HEADER_LENGTH:]
+        return payload
+
+    def _encrypt(self, data: bytes) -> bytes:
+        """Encrypt data with the device's local key."""
+        padder = PKCS7(128).padder()
+        padded = padder.update(data) + padder.finalize()
+        encryptor = Cipher(algorithms.AES(self._key), modes.ECB()).encryptor()
+        return encryptor.update(padded) + encryptor.finalize()
+
+    def _decrypt(self, data: bytes) -> bytes:
+        """Decrypt data with the device's local key."""
+        decryptor = Cipher(algorithms.AES(self._key), modes.ECB()).decryptor()
+        padded = decryptor.update(data) + decryptor.finalize()
+        unpadder = PKCS7(128).unpadder()
+        return unpadder.update(padded) + unpadder.finalize()
+
+    def _to_properties(self, reply: dict) -> list:
+        """Convert the reply's data points into shadow properties."""
+        now = int(time.time() * 1000)
+        properties = []
+        for dp_id, value in reply.get('dps', {}).items():
+            code = self._dp_codes.get(int(dp_id))
+            if code is None:
+                continue
+            seen = self._last_seen(code)
+            timestamp = seen[0] if seen is not None and seen[1] == value else now
+            self._seen[code] = (timestamp, value)
+            properties.append(
+                {'code': code, 'value': value, 'time': timestamp, 'dp_id': int(dp_id)}
+            )
+        return properties
@@ -0,0 +1,215 @@
+"""Running weight trend statistics for the Tuya Scale integration."""
+from __future__ import annotations
+
+from collections import deque
+
+from .const import (
+    TREND_MEASUREMENT_NOISE,
+    TREND_PROCESS_NOISE,
+    TREND_WINDOWS,
+)
+from .models import PropertyRecord
+
+DAY_MS = 24 * 3600 * 1000
+WEEK_MS = 7 * DAY_MS
+
+# Key suffixes of the statistics of one weight code
+TREND_SUFFIXES = ("trend", "change_7d") + tuple(
+    f"{stat}_{days}d" for days in TREND_WINDOWS for stat in ("mean", "min", "max")
+)
+
+
+class RollingWindow:
+    """Mean, minimum and maximum of the values of the last ``span`` ms.
+
+    The sum is kept running and the extremes in monotonic deques, so adding
+    a value and dropping the expired ones costs O(1) amortized.
+    """
+
+    __slots__ = ("span", "_values", "_sum", "_min", "_max")
+
+    def __init__(self, span: int) -> None:
+        """Initialize an empty window."""
+        self.span = span
+        self._values: deque[tuple[int, float]] = deque()
+        self._sum = 0.0
+        self._min: deque[tuple[int, float]] = deque()
+        self._max: deque[tuple[int, float]] = deque()
+
+    @property
+    def count(self) -> int:
+        """Return the number of values in the window."""
+        return len(self._values)
+
+    @property
+    def total(self) -> float:
+        """Return the sum of the values in the window."""
+        return self._sum
+
+    @property
+    def mean(self) -> float | None:
+        """Return the mean of the window."""
+        return self._sum / len(self._values) if self._values else None
+
+    @property
+    def minimum(self) -> float | None:
+        """Return the smallest value of the window."""
+        return self._min[0][1] if self._min else None
+
+    @property
+    def maximum(self) -> float | None:
+        """Return the largest value of the window."""
+        return self._max[0][1] if self._max else None
+
+    def add(self, timestamp: int, value: float) -> None:
+        """Add a value and drop those older than the span."""
+        item = (timestamp, value)
+        self._values.append(item)
+        self._sum += value
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append(item)
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append(item)
+
+        cutoff = timestamp - self.span
+        while self._values[0][0] <= cutoff:
+            old = self._values.popleft()
+            self._sum -= old[1]
+            if self._min[0] is old:
+                self._min.popleft()
+            if self._max[0] is old:
+                self._max.popleft()
+
+    def samples(self) -> list[tuple[int, float]]:
+        """Return the values of the window, oldest first."""
+        return list(self._values)
+
+
+class WeightTrend:
+    """Smoothed weight and rolling statistics of one person or scale.
+
+    The smoothed weight is a one dimensional Kalman filter of a random walk:
+    the longer the gap since the last weigh-in, the more a new one moves it.
+    Every measurement updates the filter and each window in O(1).
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty trend."""
+        self.level: float | None = None
+        self.variance = TREND_MEASUREMENT_NOISE
+        self.last_timestamp = 0
+        self.windows = {days: RollingWindow(days * DAY_MS) for days in TREND_WINDOWS}
+        # Two weeks of values for the week over week change
+        self._fortnight = RollingWindow(2 * WEEK_MS)
+        self._week = RollingWindow(WEEK_MS)
+
+    def add(self, timestamp: int, weight: float) -> bool:
+        """Add a weigh-in, return False if it is not newer than the last one."""
+        if timestamp <= self.last_timestamp:
+            return False
+
+        if self.level is None:
+            self.level = weight
+        else:
+            days = (timestamp - self.last_timestamp) / DAY_MS
+            predicted = self.variance + TREND_PROCESS_NOISE * days
+            gain = predicted / (predicted + TREND_MEASUREMENT_NOISE)
+            self.level += gain * (weight - self.level)
+            self.variance = (1 - gain) * predicted
+        self.last_timestamp = timestamp
+
+        self._add_to_windows(timestamp, weight)
+        return True
+
+    def _add_to_windows(self, timestamp: int, weight: float) -> None:
+        """Add a weigh-in to the rolling windows."""
+        for window in self.windows.values():
+            window.add(timestamp, weight)
+        self._fortnight.add(timestamp, weight)
+        self._week.add(timestamp, weight)
+
+    @property
+    def weekly_change(self) -> float | None:
+        """Return the mean of the last week minus the mean of the week before."""
+        earlier = self._fortnight.count - self._week.count
+        if not earlier or not self._week.count:
+            return None
+        return self._week.mean - (self._fortnight.total - self._week.total) / earlier
+
+    def statistics(self) -> dict[str, float | None]:
+        """Return every statistic by its key suffix."""
+        stats = {"trend": self.level, "change_7d": self.weekly_change}
+        for days, window in self.windows.items():
+            stats[f"mean_{days}d"] = window.mean
+            stats[f"min_{days}d"] = window.minimum
+            stats[f"max_{days}d"] = window.maximum
+        return stats
+
+    def as_dict(self) -> dict:
+        """Return the state to persist."""
+        longest = max(self.windows.values(), key=lambda window: window.span)
+        return {
+            "level": self.level,
+            "variance": self.variance,
+            "last_timestamp": self.last_timestamp,
+            "samples": longest.samples(),
+        }
+
+    @classmethod
+    def from_dict(cls, stored: dict) -> WeightTrend:
+        """Restore a persisted trend."""
+        trend = cls()
+        for timestamp, weight in stored["samples"]:
+            trend._add_to_windows(timestamp, weight)
+        trend.level = stored["level"]
+        trend.variance = stored["variance"]
+        trend.last_timestamp = stored["last_timestamp"]
+        return trend
+
+
+def trend_key(source: str, suffix: str) -> str:
+    """Return the data key of a statistic of a weight code."""
+    return f"{source}_{suffix}"
+
+
+class TrendTracker:
+    """Keep the weight trends of the scale and of each person using it."""
+
+    def __init__(self, sources: list[str], stored: dict | None = None) -> None:
+        """Initialize the tracker for the given weight codes."""
+        stored = stored or {}
+        self.trends = {
+            source: WeightTrend.from_dict(stored[source]) if source in stored else WeightTrend()
+            for source in sources
+        }
+
+    def update(self, data: dict, previous: dict, changed_codes: set[str]) -> None:
+        """Add new weigh-ins and write every statistic into data."""
+        for source, trend in self.trends.items():
+            record = data.get(source)
+            if (
+                source in changed_codes
+                and record is not None
+                and record.value
+                and trend.add(record.timestamp, float(record.value))
+            ):
+                for suffix, value in trend.statistics().items():
+                    key = trend_key(source, suffix)
+                    if value is None:
+                        data.pop(key, None)
+                    else:
+                        data[key] = PropertyRecord(round(value, 2), record.timestamp, 'derived')
+                    changed_codes.add(key)
+                continue
+
+            # Nothing new, keep the previous statistics
+            for suffix in TREND_SUFFIXES:
+                key = trend_key(source, suffix)
+                if key in previous:
+                    data[key] = previous[key]
+
+    def as_dict(self) -> dict:
+        """Return the state to persist."""
+        return {source: trend.as_dict() for source, trend in self.trends.items()}
@@ -0,0 +1,79 @@
+"""Fixtures for the Tuya Scale tests."""
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.tuya_scale.api import TuyaScaleApiClient, TuyaScaleTokenManager
+from custom_components.tuya_scale.const import (
+    CONF_ACCESS_ID,
+    CONF_ACCESS_KEY,
+    CONF_DEVICE_ID,
+    CONF_REGION,
+    DOMAIN,
+    REGIONS,
+)
+
+from .fake_tuya import DEVICE_ID, FakeTuyaCloud, scale_properties
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Enable loading the integration from custom_components."""
+    yield
+
+
+@pytest.fixture
+async def cloud(socket_enabled):
+    """Return a running fake Tuya cloud with one scale."""
+    fake = FakeTuyaCloud(devices={DEVICE_ID: scale_properties()})
+    await fake.start()
+    yield fake
+    await fake.stop()
+
+
+@pytest.fixture
+async def client(cloud):
+    """Return an API client of the fake cloud's project."""
+    async with aiohttp.ClientSession() as session:
+        yield TuyaScaleApiClient(
+            session, cloud.endpoint, cloud.access_id, cloud.access_key,
+            connect_timeout=1, read_timeout=1,
+        )
+
+
+@pytest.fixture
+def tokens(client):
+    """Return a token manager of the fake cloud's project."""
+    return TuyaScaleTokenManager(client)
+
+
+@pytest.fixture
+def entry_options() -> dict:
+    """Return the options of the config entry."""
+    return {}
+
+
+@pytest.fixture
+def entry(hass: HomeAssistant, cloud, entry_options) -> MockConfigEntry:
+    """Return a config entry of the fake cloud's scale."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title=f"Tuya Scale ({DEVICE_ID})",
+        data={
+            CONF_ACCESS_ID: cloud.access_id,
+            CONF_ACCESS_KEY: cloud.access_key,
+            CONF_REGION: "EU",
+            CONF_DEVICE_ID: DEVICE_ID,
+        },
+        options=entry_options,
+        unique_id=DEVICE_ID,
+    )
+    entry.add_to_hass(hass)
+    with patch.dict(REGIONS, {"EU": cloud.endpoint}):
+        yield entry
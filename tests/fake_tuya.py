@@ -0,0 +1,337 @@
+"""Local stand-ins for the Tuya cloud and a scale on the LAN."""
+from __future__ import annotations
+
+import asyncio
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.padding import PKCS7
+
+from custom_components.tuya_scale.transport import (
+    COMMAND_DP_QUERY,
+    FRAME_HEADER,
+    FRAME_PREFIX,
+    FRAME_SUFFIX,
+    FRAME_TRAILER,
+    PROTOCOL_VERSION_HEADER,
+    PROTOCOL_VERSION_HEADER_LENGTH,
+    TuyaScaleTransport,
+)
+
+ACCESS_ID = "fakeaccessid"
+ACCESS_KEY = "fakeaccesskey"
+DEVICE_ID = "bf0123456789abcdef"
+LOCAL_KEY = "0123456789abcdef"
+
+# Errors that can be injected into the next responses
+ERROR_UNAUTHORIZED = "401"
+ERROR_TOKEN_INVALID = "token_invalid"
+ERROR_SERVER = "500"
+ERROR_TIMEOUT = "timeout"
+ERROR_RATE_LIMIT = "rate_limit"
+
+CODE_SIGN_INVALID = 1004
+CODE_TOKEN_INVALID = 1010
+CODE_RATE_LIMIT = 40000309
+
+
+def scale_properties(weight: int = 80100, timestamp: int | None = None, count: int = 1) -> list:
+    """Return shadow properties of a weigh-in, the weight in grams."""
+    timestamp = timestamp or int(time.time() * 1000)
+    return [
+        {"code": "weight", "dp_id": 101, "value": weight, "time": timestamp, "type": "value"},
+        {"code": "BR", "dp_id": 102, "value": 520, "time": timestamp, "type": "value"},
+        {"code": "weightcount", "dp_id": 103, "value": count, "time": timestamp, "type": "value"},
+        {"code": "battery", "dp_id": 104, "value": False, "time": timestamp, "type": "bool"},
+    ]
+
+
+@dataclass
+class FakeTuyaCloud:
+    """Tuya OpenAPI endpoints of one project, verifying every signature.
+
+    ``listed`` are the devices of the project's device list, ``latency``
+    delays each response, ``errors`` is a queue of errors the next responses
+    return, and ``rate_limit`` is the number of requests allowed per second
+    before the quota error is returned.
+    """
+
+    access_id: str = ACCESS_ID
+    access_key: str = ACCESS_KEY
+    devices: dict[str, list] = field(default_factory=dict)
+    specifications: dict[str, list] = field(default_factory=dict)
+    report_logs: dict[str, list] = field(default_factory=dict)
+    listed: list[dict] = field(default_factory=list)
+    latency: float = 0.0
+    rate_limit: int | None = None
+    token_lifetime: int = 7200
+    errors: deque = field(default_factory=deque)
+    requests: list[str] = field(default_factory=list)
+    tokens_issued: int = 0
+    _tokens: set[str] = field(default_factory=set)
+    _window: deque = field(default_factory=deque)
+    server: TestServer | None = None
+
+    @property
+    def endpoint(self) -> str:
+        """Return the base URL of the running server."""
+        return str(self.server.make_url("")).rstrip("/")
+
+    async def start(self) -> FakeTuyaCloud:
+        """Start serving on a free local port."""
+        app = web.Application()
+        app.router.add_get("/v1.0/token", self._handle_token)
+        app.router.add_get("/v1.0/token/{refresh_token}", self._handle_token)
+        app.router.add_get(
+            "/v2.0/cloud/thing/{device_id}/shadow/properties", self._handle_properties
+        )
+        app.router.add_get(
+            "/v1.2/iot-03/devices/{device_id}/specification", self._handle_specification
+        )
+        app.router.add_get(
+            "/v2.0/cloud/thing/{device_id}/report-logs", self._handle_report_logs
+        )
+        app.router.add_get("/v1.0/iot-01/associated-users/devices", self._handle_device_list)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        return self
+
+    async def stop(self) -> None:
+        """Stop the server."""
+        await self.server.close()
+
+    def _signature(self, request: web.Request, access_token: str) -> str:
+        """Return the signature the request should carry."""
+        str_to_sign = "\n".join(
+            [request.method, hashlib.sha256(b"").hexdigest(), "", request.raw_path]
+        )
+        message = f"{self.access_id}{access_token}{request.headers.get('t', '')}{str_to_sign}"
+        return hmac.new(
+            self.access_key.encode(), message.encode(), hashlib.sha256
+        ).hexdigest().upper()
+
+    async def _check(self, request: web.Request, needs_token: bool) -> web.Response | None:
+        """Return the error response of a request, None if it is served."""
+        self.requests.append(request.raw_path)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if self.rate_limit is not None:
+            now = time.monotonic()
+            while self._window and now - self._window[0] >= 1:
+                self._window.popleft()
+            self._window.append(now)
+            if len(self._window) > self.rate_limit:
+                return _error(CODE_RATE_LIMIT, "request frequency exceeded")
+
+        if self.errors:
+            error = self.errors.popleft()
+            if error == ERROR_UNAUTHORIZED:
+                return web.json_response({"success": False, "msg": "unauthorized"}, status=401)
+            if error == ERROR_TOKEN_INVALID:
+                return _error(CODE_TOKEN_INVALID, "token invalid")
+            if error == ERROR_SERVER:
+                return web.json_response({"success": False}, status=500)
+            if error == ERROR_TIMEOUT:
+                await asyncio.sleep(3600)
+            if error == ERROR_RATE_LIMIT:
+                return web.json_response(
+                    {"success": False}, status=429, headers={"Retry-After": "60"}
+                )
+
+        access_token = request.headers.get("access_token", "")
+        if request.headers.get("client_id") != self.access_id or request.headers.get(
+            "sign"
+        ) != self._signature(request, access_token):
+            return _error(CODE_SIGN_INVALID, "sign invalid")
+        if needs_token and access_token not in self._tokens:
+            return _error(CODE_TOKEN_INVALID, "token invalid")
+        return None
+
+    async def _handle_token(self, request: web.Request) -> web.Response:
+        """Issue an access token."""
+        if (error := await self._check(request, needs_token=False)) is not None:
+            return error
+        self.tokens_issued += 1
+        access_token = f"token{self.tokens_issued}"
+        self._tokens = {access_token}
+        return _result({
+            "access_token": access_token,
+            "refresh_token": f"refresh{self.tokens_issued}",
+            "expire_time": self.token_lifetime,
+            "uid": "fakeuid",
+        })
+
+    async def _handle_properties(self, request: web.Request) -> web.Response:
+        """Return the shadow properties of a device."""
+        if (error := await self._check(request, needs_token=True)) is not None:
+            return error
+        device_id = request.match_info["device_id"]
+        if device_id not in self.devices:
+            return _error(2001, "device is offline")
+        return _result({"properties": self.devices[device_id]})
+
+    async def _handle_specification(self, request: web.Request) -> web.Response:
+        """Return the DP specification of a device."""
+        if (error := await self._check(request, needs_token=True)) is not None:
+            return error
+        device_id = request.match_info["device_id"]
+        if device_id not in self.specifications:
+            return _error(2009, "not support this device")
+        return _result({"category": "tzc1", "status": self.specifications[device_id]})
+
+    async def _handle_device_list(self, request: web.Request) -> web.Response:
+        """Return every listed device in a single page."""
+        if (error := await self._check(request, needs_token=True)) is not None:
+            return error
+        return _result({"devices": self.listed, "has_more": False, "last_row_key": None})
+
+    async def _handle_report_logs(self, request: web.Request) -> web.Response:
+        """Return a page of the report log, the row key being an offset."""
+        if (error := await self._check(request, needs_token=True)) is not None:
+            return error
+        logs = [
+            log
+            for log in self.report_logs.get(request.match_info["device_id"], [])
+            if int(request.query["start_time"]) <= log["event_time"] <= int(request.query["end_time"])
+            and log["code"] in request.query["codes"].split(",")
+        ]
+        offset = int(request.query.get("last_row_key", 0))
+        size = int(request.query["size"])
+        has_more = offset + size < len(logs)
+        return _result({
+            "logs": logs[offset:offset + size],
+            "has_more": has_more,
+            "last_row_key": str(offset + size) if has_more else None,
+        })
+
+
+def _result(result: dict) -> web.Response:
+    """Return a successful OpenAPI response."""
+    return web.json_response({"success": True, "t": int(time.time() * 1000), "result": result})
+
+
+def _error(code: int, msg: str) -> web.Response:
+    """Return a failed OpenAPI response, sent with HTTP 200 like Tuya does."""
+    return web.json_response({"success": False, "code": code, "msg": msg})
+
+
+class FakeTransport(TuyaScaleTransport):
+    """Transport returning scripted properties or raising scripted errors."""
+
+    name = "cloud"
+
+    def __init__(self, *replies) -> None:
+        """Initialize with the replies of the next requests."""
+        super().__init__()
+        self.replies = deque(replies)
+        self.dp_codes: dict[int, str] = {}
+
+    async def _async_get_properties(self) -> list:
+        """Return the next reply."""
+        reply = self.replies.popleft() if len(self.replies) > 1 else self.replies[0]
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+
+def push_message(access_key: str, message_id: str, event: object) -> str:
+    """Return a message of the Tuya message service carrying an event."""
+    data = aes_encrypt(access_key[8:24].encode(), json.dumps(event).encode())
+    payload = json.dumps({"data": base64.b64encode(data).decode()}).encode()
+    return json.dumps({
+        "messageId": message_id,
+        "payload": base64.b64encode(payload).decode(),
+        "properties": {"em": "aes_ecb"},
+    })
+
+
+def aes_encrypt(key: bytes, data: bytes) -> bytes:
+    """Encrypt data the way a 3.3 device does."""
+    padder = PKCS7(128).padder()
+    encryptor = Cipher(algorithms.AES(key), modes.ECB()).encryptor()
+    return encryptor.update(padder.update(data) + padder.finalize()) + encryptor.finalize()
+
+
+def aes_decrypt(key: bytes, data: bytes) -> bytes:
+    """Decrypt data the way a 3.3 device does."""
+    decryptor = Cipher(algorithms.AES(key), modes.ECB()).decryptor()
+    unpadder = PKCS7(128).unpadder()
+    padded = decryptor.update(data) + decryptor.finalize()
+    return unpadder.update(padded) + unpadder.finalize()
+
+
+def build_frame(sequence: int, command: int, body: bytes) -> bytes:
+    """Frame a body with its header, CRC and suffix."""
+    header = FRAME_HEADER.pack(FRAME_PREFIX, sequence, command, len(body) + FRAME_TRAILER.size)
+    crc = binascii.crc32(header + body) & 0xFFFFFFFF
+    return header + body + FRAME_TRAILER.pack(crc, FRAME_SUFFIX)
+
+
+class FakeTuyaDevice:
+    """Scale answering DP queries over the Tuya LAN protocol 3.3.
+
+    ``heartbeat`` sends a heartbeat frame before each reply and ``garbled``
+    replies with a payload that does not decrypt.
+    """
+
+    def __init__(self, dps: dict[str, object], local_key: str = LOCAL_KEY) -> None:
+        """Initialize the device."""
+        self.dps = dps
+        self.key = local_key.encode()
+        self.heartbeat = False
+        self.garbled = False
+        self.queries: list[dict] = []
+        self.server: asyncio.AbstractServer | None = None
+
+    @property
+    def port(self) -> int:
+        """Return the port the device listens on."""
+        return self.server.sockets[0].getsockname()[1]
+
+    async def start(self) -> FakeTuyaDevice:
+        """Start listening on a free local port."""
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self
+
+    async def stop(self) -> None:
+        """Stop listening."""
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answer one DP query."""
+        prefix, sequence, command, length = FRAME_HEADER.unpack(
+            await reader.readexactly(FRAME_HEADER.size)
+        )
+        body = await reader.readexactly(length)
+        assert prefix == FRAME_PREFIX and command == COMMAND_DP_QUERY
+        crc, suffix = FRAME_TRAILER.unpack(body[-FRAME_TRAILER.size:])
+        header = FRAME_HEADER.pack(prefix, sequence, command, length)
+        assert crc == binascii.crc32(header + body[:-FRAME_TRAILER.size]) & 0xFFFFFFFF
+        assert suffix == FRAME_SUFFIX
+        try:
+            self.queries.append(json.loads(aes_decrypt(self.key, body[:-FRAME_TRAILER.size])))
+        except ValueError:
+            # Queried with another key, the device answers all the same
+            self.queries.append(None)
+
+        if self.heartbeat:
+            writer.write(build_frame(0, 0x09, b"\x00\x00\x00\x00"))
+        if self.garbled:
+            payload = b"\x01" * 32
+        else:
+            payload = aes_encrypt(self.key, json.dumps({"dps": self.dps}).encode())
+        version = PROTOCOL_VERSION_HEADER.ljust(PROTOCOL_VERSION_HEADER_LENGTH, b"\x00")
+        writer.write(build_frame(sequence, COMMAND_DP_QUERY, b"\x00\x00\x00\x00" + version + payload))
+        await writer.drain()
+        writer.close()
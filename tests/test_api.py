@@ -0,0 +1,238 @@
+"""Tests for the Tuya OpenAPI client against the fake cloud."""
+from __future__ import annotations
+
+import asyncio
+import logging
+
+import pytest
+
+from custom_components.tuya_scale.api import (
+    TuyaScaleApiClient,
+    TuyaScaleApiError,
+    TuyaScaleAuthError,
+    TuyaScaleConnectionError,
+    TuyaScaleRateLimitError,
+    TuyaScaleSigner,
+    TuyaScaleTokenManager,
+    build_path,
+    client_timeout,
+)
+from custom_components.tuya_scale.breaker import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+)
+from custom_components.tuya_scale.budget import RequestBudget
+from custom_components.tuya_scale.const import DEVICE_DATA_PATH, TOKEN_PATH
+from custom_components.tuya_scale.tracing import PayloadLogger
+
+from .fake_tuya import (
+    DEVICE_ID,
+    ERROR_RATE_LIMIT,
+    ERROR_SERVER,
+    ERROR_TIMEOUT,
+    ERROR_UNAUTHORIZED,
+    FakeTuyaCloud,
+)
+
+PATH = DEVICE_DATA_PATH.format(device_id=DEVICE_ID)
+
+
+def test_query_is_sorted_into_the_signed_path():
+    """Query parameters are signed in sorted order."""
+    assert build_path("/p", {"b": 2, "a": 1}) == "/p?a=1&b=2"
+    assert build_path("/p", {"codes": "weight,BR"}) == "/p?codes=weight,BR"
+    assert build_path("/p") == "/p"
+
+
+async def test_list_parameters_are_signed_as_sent(cloud, client, tokens):
+    """A comma separated query value passes the signature check."""
+    access_token = await tokens.async_get_access_token()
+    _status, result = await client.async_get(
+        "/v2.0/cloud/thing/unknown/shadow/properties", access_token, params={"codes": "a,b"}
+    )
+    assert result["msg"] == "device is offline"
+
+
+def test_signature_depends_on_token_and_body():
+    """The signature covers the access token and the body."""
+    signer = TuyaScaleSigner("id", "key")
+    plain = signer.sign("1", "GET", "/p")
+    assert plain == signer.sign("1", "GET", "/p")
+    assert plain != signer.sign("1", "GET", "/p", "token")
+    assert signer.sign("1", "POST", "/p", body=b"{}") != signer.sign("1", "POST", "/p")
+
+
+async def test_signed_requests_are_accepted(cloud, client, tokens):
+    """The fake cloud verifies the signature of every request."""
+    access_token = await tokens.async_get_access_token()
+    status, result = await client.async_get(PATH, access_token)
+    assert status == 200 and result["success"]
+
+
+async def test_response_body_is_only_logged_when_traced(cloud, client, tokens, caplog):
+    """Response bodies reach the log through a payload logger only."""
+    caplog.set_level(logging.DEBUG)
+    access_token = await tokens.async_get_access_token()
+    await client.async_get(PATH, access_token)
+    assert "API response (200)" in caplog.text
+    assert '"success"' not in caplog.text
+
+    payload_log = PayloadLogger(logging.getLogger("test"), sample_every=1000)
+    payload_log.begin_poll()
+    payload_log.begin_poll()
+    await client.async_get(PATH, access_token, payload_log=payload_log)
+    assert '"success"' not in caplog.text
+
+    payload_log.start_trace(1)
+    payload_log.begin_poll()
+    await client.async_get(PATH, access_token, payload_log=payload_log)
+    assert '"success"' in caplog.text
+    assert payload_log.captures[0]["message"] == "API response"
+
+
+async def test_wrong_key_is_rejected(cloud, client):
+    """A request signed with another key fails the signature check."""
+    other = TuyaScaleApiClient(client._session, cloud.endpoint, cloud.access_id, "wrong")
+    _status, result = await other.async_get(TOKEN_PATH)
+    assert not result["success"] and result["code"] == 1004
+
+
+async def test_concurrent_callers_share_one_token(cloud, tokens):
+    """Callers waiting for a token reuse the one minted first."""
+    results = await asyncio.gather(*(tokens.async_get_access_token() for _ in range(10)))
+    assert set(results) == {"token1"}
+    assert cloud.tokens_issued == 1
+
+
+async def test_expiring_token_is_refreshed(cloud, tokens):
+    """A token close to expiry is refreshed with the refresh token grant."""
+    cloud.token_lifetime = 1
+    await tokens.async_get_access_token()
+    assert await tokens.async_get_access_token() == "token2"
+    assert cloud.requests[-1] == "/v1.0/token/refresh1"
+
+
+async def test_refresh_token_is_not_logged(cloud, tokens, caplog):
+    """The refresh token in the path of its request is redacted in the log."""
+    caplog.set_level(logging.DEBUG, logger="custom_components.tuya_scale")
+    cloud.token_lifetime = 1
+    await tokens.async_get_access_token()
+    await tokens.async_get_access_token()
+    assert cloud.requests[-1] == "/v1.0/token/refresh1"
+    # The fake cloud's access log has the token, the integration's must not
+    logged = "\n".join(
+        record.getMessage()
+        for record in caplog.records
+        if record.name.startswith("custom_components.tuya_scale")
+    )
+    assert "refresh1" not in logged
+    assert "/v1.0/token/**REDACTED**" in logged
+
+
+async def test_wrong_key_is_an_auth_error(cloud, client):
+    """A credential error code of the token endpoint is an auth error."""
+    client.signer = TuyaScaleSigner(cloud.access_id, "wrong")
+    with pytest.raises(TuyaScaleAuthError):
+        await TuyaScaleTokenManager(client).async_get_access_token()
+
+
+@pytest.mark.parametrize(
+    ("error", "raised"),
+    [
+        (ERROR_SERVER, TuyaScaleConnectionError),
+        (ERROR_RATE_LIMIT, TuyaScaleConnectionError),
+        (ERROR_UNAUTHORIZED, TuyaScaleApiError),
+    ],
+)
+async def test_token_failures_are_no_auth_error(cloud, tokens, error, raised):
+    """Failed token requests without a credential error code never ask for reauth."""
+    cloud.errors.append(error)
+    with pytest.raises(raised) as excinfo:
+        await tokens.async_get_access_token()
+    assert not isinstance(excinfo.value, TuyaScaleAuthError)
+
+
+async def test_unauthorized_status_is_returned(cloud, client, tokens):
+    """A 401 is handed to the caller, who invalidates its token."""
+    access_token = await tokens.async_get_access_token()
+    cloud.errors.append(ERROR_UNAUTHORIZED)
+    status, _result = await client.async_get(PATH, access_token)
+    assert status == 401
+
+
+async def test_timeout_raises_connection_error(cloud, client, tokens):
+    """A response slower than the read timeout is a connection error."""
+    access_token = await tokens.async_get_access_token()
+    cloud.errors.append(ERROR_TIMEOUT)
+    with pytest.raises(TuyaScaleConnectionError):
+        await client.async_get(PATH, access_token, timeout=client_timeout(1, 0.1))
+
+
+async def test_server_errors_open_the_breaker(cloud, client, tokens):
+    """Consecutive server errors open the region's breaker."""
+    access_token = await tokens.async_get_access_token()
+    client.breaker = CircuitBreaker(threshold=2)
+    cloud.errors.extend([ERROR_SERVER, ERROR_SERVER])
+    for _ in range(2):
+        status, _result = await client.async_get(PATH, access_token)
+        assert status == 500
+    assert client.breaker.state == STATE_OPEN
+    with pytest.raises(TuyaScaleConnectionError):
+        await client.async_get(PATH, access_token)
+    assert len(cloud.requests) == 3
+
+
+async def test_rate_limit_honours_retry_after(cloud, client, tokens):
+    """A 429 pauses the project for Retry-After, the region's breaker stays closed."""
+    access_token = await tokens.async_get_access_token()
+    client.breaker = CircuitBreaker(threshold=1)
+    client.budget = RequestBudget()
+    cloud.errors.append(ERROR_RATE_LIMIT)
+    with pytest.raises(TuyaScaleRateLimitError):
+        await client.async_get(PATH, access_token)
+    assert client.budget.retry_in > 59
+    assert client.breaker.state == STATE_CLOSED
+
+    # Paused requests are refused without reaching the server
+    with pytest.raises(TuyaScaleRateLimitError):
+        await client.async_get(PATH, access_token)
+    assert len(cloud.requests) == 2
+
+
+async def test_cancelled_probe_is_released(cloud, client, tokens):
+    """A probe cancelled while it waits lets the next request probe."""
+    access_token = await tokens.async_get_access_token()
+    client.breaker = CircuitBreaker(threshold=1, base_backoff=0.01, max_backoff=0.01)
+    client.budget = RequestBudget(rate=1, burst=1)
+    client.breaker.record_failure()
+    await client.budget.async_acquire()
+    await asyncio.sleep(0.02)
+
+    # The probe waits on the empty budget and is cancelled there
+    probe = asyncio.create_task(client.async_get(PATH, access_token))
+    await asyncio.sleep(0.01)
+    assert client.breaker.state == STATE_HALF_OPEN
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+
+    client.budget = None
+    status, _result = await client.async_get(PATH, access_token)
+    assert status == 200
+    assert client.breaker.state == STATE_CLOSED
+
+
+async def test_quota_error_code_is_a_rate_limit(client, tokens):
+    """The quota error code of a 200 response is a rate limit too."""
+    cloud = FakeTuyaCloud(rate_limit=2)
+    await cloud.start()
+    try:
+        client.endpoint = cloud.endpoint
+        await tokens.async_get_access_token()
+        with pytest.raises(TuyaScaleRateLimitError):
+            for _ in range(3):
+                await client.async_get(PATH, tokens._access_token)
+    finally:
+        await cloud.stop()
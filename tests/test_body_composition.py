@@ -0,0 +1,118 @@
+"""Tests for the body composition estimates."""
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.tuya_scale.body_composition import body_composition
+from custom_components.tuya_scale.const import (
+    BODY_COMPOSITION_CODES,
+    CONF_AGE,
+    CONF_HEIGHT,
+    CONF_SEX,
+    DOMAIN,
+    SEX_FEMALE,
+)
+
+from .fake_tuya import DEVICE_ID, scale_properties
+
+# Reference values worked out by hand from the published equations
+MALE_80KG_500OHM_180CM_30Y = {
+    "body_fat": 22.2,
+    "muscle_mass": 59.62592,
+    "body_water": 55.95,
+    "bone_mass": 2.61408,
+    "visceral_fat": 8.622222,
+    "bmr": 1714.384,
+    "metabolic_age": 43.1232,
+}
+FEMALE_60KG_600OHM_165CM_40Y = {
+    "body_fat": 26.702083,
+    "muscle_mass": 42.131642,
+    "body_water": 51.28125,
+    "bone_mass": 1.847108,
+    "visceral_fat": 6.673232,
+    "bmr": 1319.941,
+    "metabolic_age": 30.0618,
+}
+
+
+@pytest.fixture
+def entry_options() -> dict:
+    """Return options with a profile for the body composition estimates."""
+    return {CONF_HEIGHT: 180, CONF_AGE: 30}
+
+
+@pytest.mark.parametrize(
+    ("weight", "impedance", "height", "age", "male", "expected"),
+    [
+        (80.0, 500.0, 180, 30, True, MALE_80KG_500OHM_180CM_30Y),
+        (60.0, 600.0, 165, 40, False, FEMALE_60KG_600OHM_165CM_40Y),
+    ],
+)
+def test_reference_values(weight, impedance, height, age, male, expected) -> None:
+    """The estimates match values computed by hand."""
+    result = body_composition([weight], [impedance], height, age, male)
+    assert set(result) == set(expected)
+    for code, value in expected.items():
+        assert result[code][0] == pytest.approx(value, abs=1e-5), code
+
+
+def test_arrays_match_single_measurements() -> None:
+    """A whole history gives the same estimates as one weigh-in at a time."""
+    weights = np.array([80.0, 79.2, 81.5, 78.9])
+    impedances = np.array([500.0, 512.0, 495.0, 530.0])
+    history = body_composition(weights, impedances, 180, 30, True)
+    for index, (weight, impedance) in enumerate(zip(weights, impedances)):
+        single = body_composition([weight], [impedance], 180, 30, True)
+        for code, values in single.items():
+            assert history[code][index] == pytest.approx(values[0]), code
+    assert history["body_fat"][0] == pytest.approx(22.2)
+
+
+def test_implausible_estimates_are_clipped() -> None:
+    """Estimates stay within physiological limits for odd impedances."""
+    # A very low impedance predicts more fat-free mass than the body weighs
+    result = body_composition([50.0], [100.0], 200, 30, True)
+    assert result["body_fat"][0] == 0.0
+    assert result["muscle_mass"][0] == pytest.approx(50.0 * (1 - 0.042))
+    assert result["body_water"][0] == 100.0
+    assert result["visceral_fat"][0] == 1.0
+    assert result["metabolic_age"][0] == pytest.approx(61.0)
+
+
+async def test_coordinator_estimates(hass: HomeAssistant, cloud, entry) -> None:
+    """A weigh-in gets rounded estimates, one without impedance gets none."""
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    # 80.1 kg at 520 ohm, worked out like the references above
+    assert coordinator.data["body_fat"].value == 23.8
+    assert coordinator.data["bmr"].value == 1688.6
+    assert coordinator.data["body_fat"].timestamp == coordinator.data["weight"].timestamp
+
+    # Weighed with socks on, the scale reports an impedance of 0
+    timestamp = coordinator.data["weight"].timestamp + 60_000
+    properties = scale_properties(weight=79500, timestamp=timestamp, count=2)
+    properties[1]["value"] = 0
+    cloud.devices[DEVICE_ID] = properties
+    await coordinator.async_refresh()
+    assert coordinator.data["weight"].value == 79.5
+    assert not set(BODY_COMPOSITION_CODES) & set(coordinator.data)
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_female_profile(hass: HomeAssistant, cloud, entry) -> None:
+    """The female equations are used for a female profile."""
+    hass.config_entries.async_update_entry(
+        entry, options={**entry.options, CONF_SEX: SEX_FEMALE}
+    )
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    assert coordinator.data["body_fat"].value == 28.2
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
@@ -0,0 +1,58 @@
+"""Tests for the circuit breaker."""
+from __future__ import annotations
+
+from unittest.mock import patch
+
+from custom_components.tuya_scale.breaker import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+    jittered_backoff,
+)
+
+
+def test_backoff_grows_and_is_capped():
+    """The delay doubles per attempt, half of it jittered, up to the maximum."""
+    for attempt in range(8):
+        delay = min(100, 10 * 2 ** attempt)
+        assert delay / 2 <= jittered_backoff(attempt, 10, 100) <= delay
+
+
+def test_opens_after_threshold_and_probes_once():
+    """The breaker opens after consecutive failures and lets one probe through."""
+    breaker = CircuitBreaker(threshold=3, base_backoff=10, max_backoff=100)
+    with patch("custom_components.tuya_scale.breaker.time.monotonic", return_value=0):
+        for _ in range(2):
+            breaker.record_failure()
+        assert breaker.state == STATE_CLOSED and breaker.allow_request()
+        breaker.record_failure()
+        assert breaker.state == STATE_OPEN
+        assert not breaker.allow_request()
+
+    with patch("custom_components.tuya_scale.breaker.time.monotonic", return_value=11):
+        assert breaker.allow_request()
+        assert breaker.state == STATE_HALF_OPEN
+        assert not breaker.allow_request()
+        breaker.record_success()
+        assert breaker.state == STATE_CLOSED and breaker.allow_request()
+
+
+def test_failed_probe_opens_again_for_longer():
+    """A failing probe reopens the breaker with a longer backoff."""
+    breaker = CircuitBreaker(threshold=1, base_backoff=10, max_backoff=1000)
+    with patch("custom_components.tuya_scale.breaker.time.monotonic", return_value=0):
+        breaker.record_failure()
+    with patch("custom_components.tuya_scale.breaker.time.monotonic", return_value=11):
+        assert breaker.allow_request()
+        breaker.record_failure()
+        assert breaker.opened == 2
+        assert 10 <= breaker.retry_in <= 20
+
+
+def test_retry_after_opens_right_away():
+    """A Retry-After from the server opens the breaker for at least that long."""
+    breaker = CircuitBreaker(threshold=5, base_backoff=1, max_backoff=10)
+    breaker.record_failure(retry_after=60)
+    assert breaker.state == STATE_OPEN
+    assert breaker.retry_in > 59
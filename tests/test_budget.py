@@ -0,0 +1,52 @@
+"""Tests for the request budget."""
+from __future__ import annotations
+
+import asyncio
+import time
+from unittest.mock import patch
+
+from custom_components.tuya_scale.budget import RequestBudget
+
+
+async def test_burst_then_rate():
+    """A burst goes out at once, then requests are paced to the rate."""
+    budget = RequestBudget(rate=50, burst=5)
+    start = time.monotonic()
+    for _ in range(5):
+        await budget.async_acquire()
+    assert time.monotonic() - start < 0.05
+    assert budget.throttled == 0
+
+    await asyncio.gather(*(budget.async_acquire() for _ in range(5)))
+    assert time.monotonic() - start >= 5 / 50 * 0.9
+    assert budget.throttled == 5
+    assert budget.as_dict()["waiting"] == 0
+
+
+async def test_callers_are_served_in_order():
+    """Callers waiting on the budget are served first come, first served."""
+    budget = RequestBudget(rate=100, burst=1)
+    served = []
+
+    async def acquire(index: int) -> None:
+        await budget.async_acquire()
+        served.append(index)
+
+    await asyncio.gather(*(acquire(index) for index in range(5)))
+    assert served == list(range(5))
+
+
+def test_rate_limits_pause_with_growing_backoff():
+    """Consecutive rate limits pause the project for longer, a success resets it."""
+    budget = RequestBudget()
+    with patch("custom_components.tuya_scale.budget.time.monotonic", return_value=0):
+        budget.record_rate_limit()
+        assert 15 <= budget.retry_in <= 30
+        budget.record_rate_limit()
+        assert 30 <= budget.retry_in <= 60
+        budget.record_rate_limit(retry_after=600)
+        assert budget.retry_in == 600
+        budget.record_success()
+        budget.record_rate_limit()
+        assert budget.retry_in <= 30
+    assert budget.rate_limited == 4
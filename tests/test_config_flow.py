@@ -0,0 +1,123 @@
+"""Tests for the config and options flows."""
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant import config_entries
+from homeassistant.core import HomeAssistant
+from homeassistant.data_entry_flow import FlowResultType
+
+from custom_components.tuya_scale.config_flow import SOURCE_PROJECT_DEVICE
+from custom_components.tuya_scale.const import (
+    CONF_ACCESS_ID,
+    CONF_ACCESS_KEY,
+    CONF_DEVICE_ID,
+    CONF_DEVICES,
+    CONF_LOCAL_KEY,
+    CONF_PROFILES,
+    CONF_REGION,
+    DOMAIN,
+    REGIONS,
+)
+
+from .fake_tuya import ACCESS_ID, ACCESS_KEY, DEVICE_ID, LOCAL_KEY
+
+
+@pytest.fixture
+def entry(hass: HomeAssistant) -> MockConfigEntry:
+    """Return a config entry that is not set up."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_ACCESS_ID: ACCESS_ID,
+            CONF_ACCESS_KEY: ACCESS_KEY,
+            CONF_REGION: "EU",
+            CONF_DEVICE_ID: DEVICE_ID,
+        },
+        options={CONF_PROFILES: [{"id": "a1b2c3d4", "name": "Ada", "weight": 62}]},
+        unique_id=DEVICE_ID,
+    )
+    entry.add_to_hass(hass)
+    return entry
+
+
+async def _settings(hass: HomeAssistant, entry: MockConfigEntry) -> dict:
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    return await hass.config_entries.options.async_configure(
+        result["flow_id"], {"next_step_id": "settings"}
+    )
+
+
+async def test_local_key_must_be_16_bytes(hass: HomeAssistant, entry) -> None:
+    """A local key that is no AES-128 key is refused, the input kept."""
+    result = await _settings(hass, entry)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {CONF_LOCAL_KEY: "tooshort"}
+    )
+    assert result["type"] == FlowResultType.FORM
+    assert result["errors"] == {CONF_LOCAL_KEY: "invalid_local_key"}
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {CONF_LOCAL_KEY: LOCAL_KEY}
+    )
+    assert result["type"] == FlowResultType.CREATE_ENTRY
+    assert entry.options[CONF_LOCAL_KEY] == LOCAL_KEY
+    # People are managed in their own steps and survive the settings
+    assert entry.options[CONF_PROFILES][0]["name"] == "Ada"
+
+
+async def test_project_flow_reports_skipped_scales(hass: HomeAssistant, cloud) -> None:
+    """Each chosen scale is validated by its own flow, unreachable ones are listed."""
+    offline = "bf00000000000000ff"
+    cloud.listed = [
+        {"id": DEVICE_ID, "name": "Bathroom", "category": "tzc1"},
+        {"id": offline, "name": "Gym", "category": "tzc1"},
+    ]
+
+    with patch.dict(REGIONS, {"EU": cloud.endpoint}):
+        result = await hass.config_entries.flow.async_init(
+            DOMAIN, context={"source": config_entries.SOURCE_USER}
+        )
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {"next_step_id": "project"}
+        )
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"],
+            {CONF_ACCESS_ID: cloud.access_id, CONF_ACCESS_KEY: cloud.access_key, CONF_REGION: "EU"},
+        )
+        assert result["step_id"] == "select_devices"
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {CONF_DEVICES: [DEVICE_ID, offline]}
+        )
+        await hass.async_block_till_done()
+
+        assert result["type"] == FlowResultType.ABORT
+        assert result["reason"] == "devices_skipped"
+        assert result["description_placeholders"] == {"skipped": f"Gym ({offline})"}
+        entries = hass.config_entries.async_entries(DOMAIN)
+        assert [entry.unique_id for entry in entries] == [DEVICE_ID]
+
+        for entry in entries:
+            await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_project_device_flow_validates(hass: HomeAssistant, cloud) -> None:
+    """A scale handed to its own flow is not added without being reached."""
+    with patch.dict(REGIONS, {"EU": cloud.endpoint}):
+        result = await hass.config_entries.flow.async_init(
+            DOMAIN,
+            context={"source": SOURCE_PROJECT_DEVICE},
+            data={
+                CONF_ACCESS_ID: cloud.access_id,
+                CONF_ACCESS_KEY: cloud.access_key,
+                CONF_REGION: "EU",
+                CONF_DEVICE_ID: "bf00000000000000ff",
+            },
+        )
+
+    assert result["type"] == FlowResultType.ABORT
+    assert result["reason"] == "cannot_connect"
+    assert not hass.config_entries.async_entries(DOMAIN)
@@ -0,0 +1,61 @@
+"""Tests for the data update coordinator."""
+from __future__ import annotations
+
+import pytest
+from pytest_homeassistant_custom_component.common import async_capture_events
+
+from homeassistant.const import CONF_HOST
+from homeassistant.core import HomeAssistant
+
+from custom_components.tuya_scale.const import CONF_LOCAL_KEY, DOMAIN, EVENT_MEASUREMENT
+
+from .fake_tuya import LOCAL_KEY, FakeTuyaDevice
+
+
+@pytest.fixture
+def entry_options() -> dict:
+    """Return options reading the scale over the LAN first."""
+    return {CONF_HOST: "127.0.0.1", CONF_LOCAL_KEY: LOCAL_KEY}
+
+
+@pytest.fixture
+async def device(socket_enabled):
+    """Return a fake scale on the LAN reporting what the fake cloud reports."""
+    fake = FakeTuyaDevice({"101": 80100, "102": 520, "103": 1, "104": False})
+    await fake.start()
+    yield fake
+    await fake.stop()
+
+
+async def test_switching_transports_makes_no_reading(
+    hass: HomeAssistant, cloud, entry, device
+) -> None:
+    """Unchanged values keep their times from cloud to local and back."""
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    # The first poll learned the DP ids from the cloud
+    assert coordinator.active_transport == "cloud"
+    local = coordinator.transports[0]
+    local._port = device.port
+    data = dict(coordinator.data)
+    outliers = coordinator.outliers.as_dict()
+    events = async_capture_events(hass, EVENT_MEASUREMENT)
+
+    coordinator._local_retry_at = 0
+    await coordinator.async_refresh()
+    assert coordinator.active_transport == "local"
+    assert coordinator.changed_codes == set()
+    assert coordinator.data == data
+
+    await device.stop()
+    await coordinator.async_refresh()
+    assert coordinator.active_transport == "cloud"
+    assert coordinator.changed_codes == set()
+    assert coordinator.data == data
+
+    await hass.async_block_till_done()
+    assert not events
+    assert coordinator.outliers.as_dict() == outliers
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
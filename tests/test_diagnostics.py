@@ -0,0 +1,61 @@
+"""Tests for the diagnostics of a config entry."""
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from homeassistant.components.diagnostics import REDACTED
+from homeassistant.const import CONF_HOST
+from homeassistant.core import HomeAssistant
+
+from custom_components.tuya_scale.const import (
+    CONF_ACCESS_ID,
+    CONF_ACCESS_KEY,
+    CONF_LOCAL_KEY,
+    DOMAIN,
+)
+from custom_components.tuya_scale.diagnostics import async_get_config_entry_diagnostics
+from custom_components.tuya_scale.metrics import PHASE_HTTP, PHASE_POLL, PHASES
+
+from .fake_tuya import ACCESS_ID, ACCESS_KEY, LOCAL_KEY
+
+
+@pytest.fixture
+def entry_options() -> dict:
+    """Return options with the local key of a scale on the LAN."""
+    return {CONF_HOST: "127.0.0.1", CONF_LOCAL_KEY: LOCAL_KEY}
+
+
+async def test_diagnostics(hass: HomeAssistant, cloud, entry) -> None:
+    """Credentials and tokens are redacted, request phases are measured."""
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    coordinator.async_trace_polls(1)
+    await coordinator.async_refresh()
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+    assert diagnostics["entry"]["data"][CONF_ACCESS_ID] == REDACTED
+    assert diagnostics["entry"]["data"][CONF_ACCESS_KEY] == REDACTED
+    assert diagnostics["entry"]["options"][CONF_LOCAL_KEY] == REDACTED
+    assert diagnostics["entry"]["options"][CONF_HOST] == REDACTED
+    assert diagnostics["trace"]
+    # No secret shows up anywhere, not even in a traced payload
+    dump = json.dumps(diagnostics, default=str)
+    assert cloud.tokens_issued == 1
+    for secret in (ACCESS_ID, ACCESS_KEY, LOCAL_KEY, "token1", "refresh1", "fakeuid"):
+        assert json.dumps(secret) not in dump
+
+    # Both polls went through the instrumented retry loop
+    metrics = diagnostics["metrics"]
+    assert metrics["polls"] == 2
+    assert metrics["failures"] == 0
+    assert metrics["phases"][PHASE_POLL]["count"] == 2
+    assert metrics["phases"][PHASE_HTTP]["count"] >= 2
+    for phase in PHASES:
+        assert metrics["phases"][phase]["count"], phase
+        assert metrics["phases"][phase]["max_ms"] > 0, phase
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
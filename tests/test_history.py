@@ -0,0 +1,83 @@
+"""Tests for the measurement history backfill."""
+from __future__ import annotations
+
+import os
+import time
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import STORAGE_DIR
+
+from custom_components.tuya_scale.const import CONF_BACKFILL, DOMAIN
+from custom_components.tuya_scale.history import store_path
+
+from .fake_tuya import DEVICE_ID
+
+HOUR_MS = 3600 * 1000
+
+
+@pytest.fixture
+def entry_options() -> dict:
+    """Enable the backfill."""
+    return {CONF_BACKFILL: True}
+
+
+@pytest.fixture(autouse=True)
+def config_dir(hass: HomeAssistant, tmp_path) -> None:
+    """Keep the measurement databases in a temporary config directory."""
+    hass.config.config_dir = str(tmp_path)
+    (tmp_path / STORAGE_DIR).mkdir()
+
+
+@pytest.fixture(autouse=True)
+def report_logs(cloud) -> None:
+    """Fill the report log with a weigh-in a day for the last six days."""
+    now = int(time.time() * 1000)
+    cloud.report_logs[DEVICE_ID] = [
+        {"code": "weight", "value": str(80000 + day * 100), "event_time": now - day * 24 * HOUR_MS}
+        for day in range(1, 7)
+    ]
+
+
+async def test_backfill_imports_the_report_log(hass: HomeAssistant, cloud, entry) -> None:
+    """Measurements of the report log end up in the store."""
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    backfill = hass.data[DOMAIN][entry.entry_id].backfill
+    rows = await hass.async_add_executor_job(
+        backfill._store.hourly, "weight", 0, int(time.time() * 1000)
+    )
+    assert len(rows) == 6
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.config_entries.async_remove(entry.entry_id)
+
+
+async def test_unload_cancels_a_running_backfill(hass: HomeAssistant, cloud, entry) -> None:
+    """Unloading does not wait for a slow backfill run to finish."""
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    backfill = hass.data[DOMAIN][entry.entry_id].backfill
+
+    cloud.latency = 30
+    backfill._async_start_run()
+    task = backfill._task
+    start = time.monotonic()
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    assert time.monotonic() - start < 5
+    assert task.cancelled()
+    await hass.config_entries.async_remove(entry.entry_id)
+
+
+async def test_remove_deletes_the_store(hass: HomeAssistant, entry) -> None:
+    """Removing the entry deletes its measurement database."""
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    path = store_path(hass, DEVICE_ID)
+    assert os.path.exists(path)
+
+    await hass.config_entries.async_remove(entry.entry_id)
+    await hass.async_block_till_done()
+    assert not os.path.exists(path)
@@ -0,0 +1,83 @@
+"""Tests for the polling hub shared by the entries of a project."""
+from __future__ import annotations
+
+import asyncio
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.tuya_scale.hub import TuyaScaleHub
+
+from .fake_tuya import ACCESS_ID, ACCESS_KEY
+
+
+class FakeCoordinator:
+    """Coordinator counting its refreshes, optionally blocking in them."""
+
+    push_mode = False
+
+    def __init__(self, device_id: str, poll_interval: float) -> None:
+        self.device_id = device_id
+        self.poll_interval = poll_interval
+        self.refreshes = 0
+        self.running = 0
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def async_refresh(self) -> None:
+        self.refreshes += 1
+        self.running += 1
+        try:
+            await self.release.wait()
+        finally:
+            self.running -= 1
+
+
+async def test_slow_device_does_not_delay_others(hass: HomeAssistant) -> None:
+    """Each device polls on its own, a hanging refresh blocks only its device."""
+    hub = TuyaScaleHub(hass, ACCESS_ID, ACCESS_KEY, "EU")
+    slow, fast = FakeCoordinator("slow", 0.01), FakeCoordinator("fast", 0.01)
+    slow.release.clear()
+    hub.async_add_coordinator(slow, refresh=True)
+    hub.async_add_coordinator(fast, refresh=True)
+    hub._next_poll = dict.fromkeys(hub._next_poll, 0.0)
+    hub._async_schedule()
+
+    for _ in range(200):
+        if fast.refreshes >= 5:
+            break
+        await asyncio.sleep(0.01)
+    assert fast.refreshes >= 5
+    # The hanging device is not refreshed again while its refresh runs
+    assert slow.refreshes == 1 and slow.running == 1
+
+    slow.release.set()
+    for _ in range(200):
+        if slow.refreshes >= 2:
+            break
+        await asyncio.sleep(0.01)
+    assert slow.refreshes >= 2
+
+    hub.async_remove_coordinator(slow)
+    hub.async_remove_coordinator(fast)
+    await hass.async_block_till_done()
+    assert not hub._polls and hub._unsub_timer is None
+
+
+async def test_removing_a_device_cancels_its_refresh(hass: HomeAssistant) -> None:
+    """A refresh still running when its entry is removed is cancelled."""
+    hub = TuyaScaleHub(hass, ACCESS_ID, ACCESS_KEY, "EU")
+    slow = FakeCoordinator("slow", 60)
+    slow.release.clear()
+    hub.async_add_coordinator(slow, refresh=True)
+    hub._next_poll["slow"] = 0.0
+    hub._async_schedule()
+    for _ in range(200):
+        if slow.running:
+            break
+        await asyncio.sleep(0.01)
+    assert slow.running == 1
+
+    hub.async_remove_coordinator(slow)
+    await hass.async_block_till_done()
+    assert slow.running == 0
+    assert hub.is_empty and not hub._polls
@@ -0,0 +1,188 @@
+"""Tests for setting up the integration against the fake cloud."""
+from __future__ import annotations
+
+from unittest.mock import patch
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from custom_components.tuya_scale.api import TuyaScaleApiClient
+from custom_components.tuya_scale.const import (
+    CONF_BACKFILL,
+    CONF_READ_TIMEOUT,
+    CONF_SCAN_INTERVAL,
+    DATA_HUBS,
+    DOMAIN,
+)
+from custom_components.tuya_scale.hub import async_get_token_manager
+
+from .fake_tuya import DEVICE_ID, scale_properties
+
+
+async def test_setup_and_unload(hass: HomeAssistant, cloud, entry) -> None:
+    """An entry polls its scale through the hub and unloads cleanly."""
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    assert entry.state is ConfigEntryState.LOADED
+
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    assert coordinator.data["weight"].value == 80.1
+    assert cloud.tokens_issued == 1
+    assert hass.states.get("sensor.tuya_smart_scale_weight") is not None
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert entry.state is ConfigEntryState.NOT_LOADED
+    assert not hass.data[DATA_HUBS]
+
+
+async def test_hub_adopts_the_config_flow_token(hass: HomeAssistant, cloud, entry) -> None:
+    """The token minted by a config flow is reused through the hub's client."""
+    session = async_get_clientsession(hass)
+    flow_client = TuyaScaleApiClient(session, cloud.endpoint, cloud.access_id, cloud.access_key)
+    tokens = async_get_token_manager(hass, "EU", flow_client)
+    await tokens.async_get_access_token()
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    hub = hass.data[DOMAIN][entry.entry_id].hub
+    assert hub.tokens is tokens
+    assert tokens.client is hub.client
+    assert hub.client.breaker is not None and hub.client.budget is not None
+    assert cloud.tokens_issued == 1
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_timeouts_are_per_entry(hass: HomeAssistant, cloud, entry) -> None:
+    """A changed timeout applies to the entry's requests, not the shared client."""
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    default = coordinator.hub.client._timeout
+
+    hass.config_entries.async_update_entry(entry, options={CONF_READ_TIMEOUT: 42})
+    await hass.async_block_till_done()
+
+    assert hass.data[DOMAIN][entry.entry_id] is coordinator
+    assert coordinator.transports[-1].timeout.sock_read == 42
+    assert coordinator.hub.client._timeout is default
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_first_options_save_does_not_reload(hass: HomeAssistant, cloud, entry) -> None:
+    """Saving the settings form with defaults only applies the changed interval."""
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {"next_step_id": "settings"}
+    )
+    await hass.config_entries.options.async_configure(
+        result["flow_id"], {CONF_SCAN_INTERVAL: 3}
+    )
+    await hass.async_block_till_done()
+
+    # The form wrote every option, the backfill at its default among them
+    assert entry.options[CONF_BACKFILL] is False
+    assert hass.data[DOMAIN][entry.entry_id] is coordinator
+    assert coordinator.poll_interval == 180
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_failed_first_poll_leaves_no_hub(hass: HomeAssistant, cloud, entry) -> None:
+    """An entry whose first poll fails is retried later and keeps no hub."""
+    cloud.devices = {}
+    with patch("custom_components.tuya_scale.coordinator.RETRY_BASE_DELAY", 0):
+        assert not await hass.config_entries.async_setup(entry.entry_id)
+    assert entry.state is ConfigEntryState.SETUP_RETRY
+    assert not hass.data.get(DATA_HUBS)
+    assert entry.entry_id not in hass.data.get(DOMAIN, {})
+
+    await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_failed_platform_setup_stops_polling(hass: HomeAssistant, cloud, entry) -> None:
+    """A coordinator whose platforms failed to set up is not polled."""
+    with patch(
+        "homeassistant.config_entries.ConfigEntries.async_forward_entry_setups",
+        side_effect=HomeAssistantError("platform failed"),
+    ):
+        assert not await hass.config_entries.async_setup(entry.entry_id)
+    assert entry.state is ConfigEntryState.SETUP_ERROR
+    assert not hass.data.get(DATA_HUBS)
+    assert entry.entry_id not in hass.data.get(DOMAIN, {})
+
+
+async def test_entities_are_restored_before_the_first_poll(
+    hass: HomeAssistant, cloud, entry
+) -> None:
+    """Cached data sets up the entities while the cloud cannot be reached."""
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    await coordinator._store.async_save(coordinator._data_to_store())
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+    cloud.devices = {}
+    requests = len(cloud.requests)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert entry.state is ConfigEntryState.LOADED
+    assert len(cloud.requests) == requests
+    restored = hass.data[DOMAIN][entry.entry_id]
+    assert restored is not coordinator
+    assert restored.data["weight"].value == 80.1
+    # The sensor suggests grams
+    assert float(hass.states.get("sensor.tuya_smart_scale_weight").state) == 80100
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_new_property_adds_one_sensor(
+    hass: HomeAssistant, cloud, entry, caplog
+) -> None:
+    """A property reported after setup gets one sensor, kept once over a reload."""
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    registry = er.async_get(hass)
+    unique_id = f"{DEVICE_ID}_LResistance"
+
+    def sensors() -> list[er.RegistryEntry]:
+        return [
+            registry_entry
+            for registry_entry in er.async_entries_for_config_entry(registry, entry.entry_id)
+            if registry_entry.unique_id == unique_id
+        ]
+
+    assert not sensors()
+    timestamp = coordinator.data["weight"].timestamp
+    cloud.devices[DEVICE_ID] = [
+        *scale_properties(timestamp=timestamp),
+        {"code": "LResistance", "dp_id": 105, "value": 480, "time": timestamp + 1000},
+    ]
+    for _ in range(2):
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+    assert len(sensors()) == 1
+    entity_id = sensors()[0].entity_id
+    assert hass.states.get(entity_id).state == "480"
+
+    assert await hass.config_entries.async_reload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert len(sensors()) == 1
+    assert hass.states.get(entity_id).state == "480"
+    assert "does not generate unique IDs" not in caplog.text
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
@@ -0,0 +1,120 @@
+"""Tests for the outlier filter."""
+from __future__ import annotations
+
+import statistics
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.tuya_scale.const import DOMAIN
+from custom_components.tuya_scale.history import _to_rows
+from custom_components.tuya_scale.outliers import HampelWindow, OutlierFilter
+from custom_components.tuya_scale.schema import DecoderTable
+
+WEIGHTS = [80.1, 80.4, 79.9, 80.2, 80.0, 80.3]
+
+
+def test_window_median_and_mad_match_reference():
+    """The window's median and MAD agree with a direct computation."""
+    window = HampelWindow(size=7)
+    values = [3.0, 9.5, 1.0, 4.0, 4.0, 12.0, 7.5, 2.0, 6.0, 8.0]
+    for count, value in enumerate(values, 1):
+        window.add(value)
+        kept = values[max(0, count - 7):count]
+        median = statistics.median(kept)
+        assert window.median == median
+        assert window.mad(median) == statistics.median(abs(v - median) for v in kept)
+
+
+def test_weight_without_person_is_not_judged():
+    """A weight matched to nobody is accepted and does not enter a window."""
+    outliers = OutlierFilter()
+    for weight in WEIGHTS:
+        assert outliers.accept("weight", weight, 1, "person_1")
+    assert outliers.accept("weight", 6.0, 2)
+    assert outliers.windows.keys() == {"person_1"}
+    assert outliers.rejected == 0
+
+
+def test_weight_windows_are_per_person():
+    """A weight is only compared with the person it was matched to."""
+    outliers = OutlierFilter()
+    for weight in WEIGHTS:
+        outliers.accept("weight", weight, 1, "person_1")
+    assert outliers.accept("weight", 55.0, 2, "person_2")
+    assert not outliers.accept("weight", 55.0, 3, "person_1")
+    assert outliers.is_rejected("weight", 3)
+    assert not outliers.is_rejected("weight", 2)
+
+
+def test_level_shift_is_accepted():
+    """Rejected weights that agree with each other become the new level."""
+    outliers = OutlierFilter()
+    for weight in WEIGHTS:
+        outliers.accept("weight", weight, 1, "person_1")
+    accepted = [outliers.accept("weight", 88.0 + i / 10, i, "person_1") for i in range(3)]
+    assert accepted == [False, False, True]
+    assert outliers.windows["person_1"].median == pytest.approx(88.1)
+    assert outliers.accept("weight", 88.4, 4, "person_1")
+
+
+def test_scattered_rejections_are_no_level_shift():
+    """Rejected weights that disagree keep being rejected."""
+    outliers = OutlierFilter()
+    for weight in WEIGHTS:
+        outliers.accept("weight", weight, 1, "person_1")
+    for i, weight in enumerate((6.0, 55.0, 120.0, 30.0)):
+        assert not outliers.accept("weight", weight, i, "person_1")
+
+
+@pytest.mark.parametrize(("value", "accepted"), [(0, True), (50, False), (520, True), (4000, False)])
+def test_impedance_bounds(value, accepted):
+    """Impedances outside a human body's range are rejected, zero passes."""
+    assert OutlierFilter().accept("BR", value, 1) is accepted
+
+
+def test_state_round_trip():
+    """The filter restores its windows and rejections from storage."""
+    outliers = OutlierFilter()
+    for weight in WEIGHTS:
+        outliers.accept("weight", weight, 1, "person_1")
+    outliers.accept("weight", 95.0, 2, "person_1")
+
+    restored = OutlierFilter(outliers.as_dict())
+    assert restored.as_dict() == outliers.as_dict()
+    assert restored.is_rejected("weight", 2)
+    # The stored rejection counts towards a level shift
+    assert not restored.accept("weight", 95.1, 3, "person_1")
+    assert restored.accept("weight", 95.0, 4, "person_1")
+
+
+async def test_single_user_scale_filters_its_weights(hass: HomeAssistant, cloud, entry) -> None:
+    """Without people the weights are judged against the scale's own window."""
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    assert coordinator.persons is None
+
+    timestamp = coordinator.data["weight"].timestamp
+    for weight in [*WEIGHTS, 6.0]:
+        timestamp += 60000
+        coordinator.async_handle_push(
+            [{"code": "weight", "value": int(weight * 1000), "time": timestamp}]
+        )
+    assert coordinator.outliers.windows.keys() == {"weight"}
+    assert coordinator.outliers.is_rejected("weight", timestamp)
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+def test_backfill_rows_use_the_scale_window():
+    """Backfilled weights without people are judged like live ones."""
+    logs = [
+        {"event_time": index, "code": "weight", "value": int(weight * 1000)}
+        for index, weight in enumerate([*WEIGHTS, 6.0])
+    ]
+    outliers = OutlierFilter()
+    rows = _to_rows(logs, DecoderTable(), outliers)
+    assert [value for _ts, _code, value in rows] == WEIGHTS
+    assert outliers.windows.keys() == {"weight"}
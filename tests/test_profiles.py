@@ -0,0 +1,53 @@
+"""Tests for attributing measurements to the people sharing a scale."""
+from __future__ import annotations
+
+from custom_components.tuya_scale.models import PropertyRecord
+from custom_components.tuya_scale.profiles import PersonTracker, person_key
+
+PROFILES = [
+    {"id": "ada", "name": "Ada", "weight": 62, "height": 168, "age": 36},
+    {"id": "bob", "name": "Bob", "weight": 85},
+]
+
+
+def _weigh(tracker: PersonTracker, weight: float, impedance: float, timestamp: int) -> dict:
+    data = {
+        "weight": PropertyRecord(weight, timestamp, "value"),
+        "BR": PropertyRecord(impedance, timestamp, "value"),
+    }
+    tracker.update(data, {}, {"weight", "BR"})
+    return data
+
+
+def test_measurements_go_to_the_closest_person():
+    """Each weigh-in is attributed to the person it matches best."""
+    tracker = PersonTracker(PROFILES)
+    assert _weigh(tracker, 61.5, 520, 1)[person_key("weight", "ada")].value == 61.5
+    data = _weigh(tracker, 86.0, 480, 2)
+    assert data[person_key("weight", "bob")].value == 86.0
+    assert person_key("weight", "ada") not in data
+
+
+def test_state_round_trip():
+    """Matcher statistics and assignments survive a restart."""
+    tracker = PersonTracker(PROFILES)
+    for timestamp, weight in enumerate((61.5, 62.2, 86.0, 61.8)):
+        _weigh(tracker, weight, 500, timestamp)
+
+    restored = PersonTracker(PROFILES, tracker.as_dict())
+    assert restored.as_dict() == tracker.as_dict()
+    # The latest measurement can still be moved after the restart
+    data, changed = {}, set()
+    assert restored.reassign("bob", 3, data, changed)
+    assert data[person_key("weight", "bob")].value == 61.8
+
+
+def test_removed_person_is_dropped_on_restore():
+    """State of a person removed since it was saved is not restored."""
+    tracker = PersonTracker(PROFILES)
+    _weigh(tracker, 86.0, 480, 1)
+    restored = PersonTracker(PROFILES[:1], tracker.as_dict())
+    assert restored.as_dict() == {
+        "matcher": {"ada": {"weights": [62.0], "impedances": []}},
+        "history": [],
+    }
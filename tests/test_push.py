@@ -0,0 +1,85 @@
+"""Tests for the Tuya message service subscriber."""
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from custom_components.tuya_scale.push import TuyaMessageQueueSource
+
+from .fake_tuya import ACCESS_ID, DEVICE_ID, push_message
+
+ACCESS_KEY = "0123456789abcdef0123456789abcdef"
+
+
+@pytest.fixture
+async def message_service(socket_enabled):
+    """Return a message service sending queued messages to each connection."""
+    connections: asyncio.Queue[list[str]] = asyncio.Queue()
+    acks = []
+
+    async def handle(request: web.Request) -> web.WebSocketResponse:
+        websocket = web.WebSocketResponse()
+        await websocket.prepare(request)
+        for message in await connections.get():
+            await websocket.send_str(message)
+            reply = await websocket.receive()
+            if reply.type != aiohttp.WSMsgType.TEXT:
+                break
+            acks.append(reply.json()["messageId"])
+        await websocket.close()
+        return websocket
+
+    app = web.Application()
+    app.router.add_get("/{path:.*}", handle)
+    server = TestServer(app)
+    await server.start_server()
+    server.connections, server.acks = connections, acks
+    yield server
+    await server.close()
+
+
+async def test_subscriber_survives_bad_reports_and_callback_errors(message_service):
+    """A failing callback or malformed status does not end the subscriber."""
+    received = []
+    connected = []
+
+    def on_properties(device_id: str, properties: list) -> None:
+        received.append((device_id, properties))
+        if len(received) == 1:
+            raise RuntimeError("coordinator bug")
+
+    event = {"devId": DEVICE_ID, "status": ["garbage", {"code": "weight", "value": 80100, "t": 1}]}
+    await message_service.connections.put([
+        push_message(ACCESS_KEY, "m1", event),
+        push_message(ACCESS_KEY, "m2", event),
+    ])
+    await message_service.connections.put([push_message(ACCESS_KEY, "m3", ["not an event"])])
+    await message_service.connections.put([push_message(ACCESS_KEY, "m4", event)])
+
+    async with aiohttp.ClientSession() as session:
+        source = TuyaMessageQueueSource(
+            session,
+            str(message_service.make_url("/")),
+            ACCESS_ID,
+            ACCESS_KEY,
+            on_properties,
+            connected.append,
+        )
+        with patch("custom_components.tuya_scale.push.PUSH_RECONNECT_MIN", 0.01):
+            task = asyncio.create_task(source.async_run())
+            for _ in range(500):
+                if len(received) == 2:
+                    break
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+    assert received[-1] == (DEVICE_ID, [{"code": "weight", "value": 80100, "time": 1000}])
+    assert message_service.acks == ["m1", "m3", "m4"]
+    assert connected[:2] == [True, False]
@@ -0,0 +1,107 @@
+"""Tests for the adaptive poll scheduler."""
+from __future__ import annotations
+
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.tuya_scale.const import (
+    ADAPTIVE_BURST_DURATION,
+    ADAPTIVE_BURST_INTERVAL,
+    CONF_ADAPTIVE_POLLING,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_SCAN_INTERVAL,
+    DOMAIN,
+)
+from custom_components.tuya_scale.scheduler import AdaptivePollScheduler
+
+MONOTONIC = "custom_components.tuya_scale.scheduler.time.monotonic"
+NOW = "custom_components.tuya_scale.scheduler.dt_util.now"
+MEASURED_AT = 1700000000000
+
+
+def test_weigh_in_starts_a_burst():
+    """A new weight count polls fast for the burst duration."""
+    scheduler = AdaptivePollScheduler(60, 1800)
+    with patch(MONOTONIC, return_value=0):
+        assert not scheduler.observe(1, MEASURED_AT)
+        assert scheduler.interval == 120
+        assert scheduler.observe(2, MEASURED_AT + 1000)
+        assert scheduler.interval == ADAPTIVE_BURST_INTERVAL
+    with patch(MONOTONIC, return_value=ADAPTIVE_BURST_DURATION - 1):
+        assert not scheduler.observe(2, MEASURED_AT + 1000)
+        assert scheduler.interval == ADAPTIVE_BURST_INTERVAL
+
+
+def test_idle_polls_back_off_to_the_ceiling():
+    """After the burst the interval doubles per idle poll up to the maximum."""
+    scheduler = AdaptivePollScheduler(60, 1800)
+    with patch(MONOTONIC, return_value=0):
+        scheduler.observe(1, MEASURED_AT)
+        scheduler.observe(2, MEASURED_AT + 1000)
+    intervals = []
+    with patch(MONOTONIC, return_value=ADAPTIVE_BURST_DURATION + 1):
+        for _ in range(6):
+            scheduler.observe(2, MEASURED_AT + 1000)
+            intervals.append(scheduler.interval)
+        assert intervals == [120, 240, 480, 960, 1800, 1800]
+
+        # The next weigh-in starts over from the scan interval
+        scheduler.observe(3, MEASURED_AT + 2000)
+    with patch(MONOTONIC, return_value=2 * ADAPTIVE_BURST_DURATION + 2):
+        scheduler.observe(3, MEASURED_AT + 2000)
+        assert scheduler.interval == 120
+
+
+def test_habit_hours_keep_the_scan_interval():
+    """During the usual weigh-in hour idle polls do not back off."""
+    scheduler = AdaptivePollScheduler(60, 1800)
+    day = 24 * 3600 * 1000
+    with patch(MONOTONIC, return_value=0):
+        scheduler.observe(0, MEASURED_AT)
+        for count in range(1, 5):
+            scheduler.observe(count, MEASURED_AT + count * day)
+    usual = dt_util.as_local(dt_util.utc_from_timestamp(MEASURED_AT / 1000))
+    with patch(MONOTONIC, return_value=ADAPTIVE_BURST_DURATION + 1):
+        for _ in range(4):
+            scheduler.observe(4, MEASURED_AT + 4 * day)
+        with patch(NOW, return_value=usual):
+            assert scheduler.interval == 60
+        with patch(NOW, return_value=usual + timedelta(hours=12)):
+            assert scheduler.interval == 960
+
+
+@pytest.fixture
+def entry_options() -> dict:
+    """Return options polling adaptively every 5 minutes at best."""
+    return {CONF_ADAPTIVE_POLLING: True, CONF_SCAN_INTERVAL: 5}
+
+
+async def test_burst_survives_an_options_update(hass: HomeAssistant, cloud, entry) -> None:
+    """The hub polls at the burst interval after a weigh-in and an options change."""
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    hub = coordinator.hub
+    assert coordinator.poll_interval == 600
+
+    timestamp = coordinator.data["weightcount"].timestamp + 60000
+    coordinator.async_handle_push(
+        [{"code": "weightcount", "value": 2, "time": timestamp}]
+    )
+    assert coordinator.poll_interval == ADAPTIVE_BURST_INTERVAL
+
+    hass.config_entries.async_update_entry(
+        entry, options={**entry.options, CONF_MAX_SCAN_INTERVAL: 60}
+    )
+    await hass.async_block_till_done()
+    assert hass.data[DOMAIN][entry.entry_id] is coordinator
+    assert hub._next_poll[coordinator.device_id] <= time.monotonic() + ADAPTIVE_BURST_INTERVAL
+    assert coordinator._scheduler.max_interval == 3600
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
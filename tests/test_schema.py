@@ -0,0 +1,49 @@
+"""Tests for decoding properties with the device's schema."""
+from __future__ import annotations
+
+from custom_components.tuya_scale.schema import DecoderTable, DpSchema
+
+
+def test_default_schema_decodes_grams():
+    """Without a specification the weight is read in grams."""
+    decoders = DecoderTable()
+    assert decoders.decode("weight", 80100, 0) == 80.1
+    assert decoders.decode("battery", 0, 0) is False
+    assert decoders.decode("unknown", 5, 0) == 5
+    assert decoders.decode("weight", None, 0) is None
+
+
+def test_specification_scale_and_unit():
+    """Scaled integers are decoded exactly to the digits of their scale."""
+    decoders = DecoderTable({
+        "weight": DpSchema("weight", "Integer", "kg", 1),
+        "body_r": DpSchema("body_r", "Integer", "Ω", 2),
+    })
+    assert decoders.decode("weight", 801, 0) == 80.1
+    assert decoders.decode("body_r", 12345, 0) == 123.45
+    assert decoders.unit("weight") == "kg"
+    assert decoders.is_numeric("body_r")
+    assert decoders.spec_codes == {"weight", "body_r"}
+
+
+def test_pounds_are_converted():
+    """A weight reported in pounds is decoded to kilograms."""
+    decoders = DecoderTable({"weight": DpSchema("weight", "Integer", "lb", 1)})
+    assert decoders.decode("weight", 1766, 0) == 80.1044
+
+
+def test_status_values_as_json_string():
+    """The specification may give a data point's values as a JSON string."""
+    dp_schema = DpSchema.from_status(
+        {"code": "weight", "type": "Integer", "values": '{"unit":"g","scale":0}'}
+    )
+    assert (dp_schema.unit, dp_schema.scale) == ("g", 0)
+    assert DpSchema.from_status({"code": "x", "values": "not json"}).scale == 0
+
+
+def test_stored_schema_round_trip():
+    """A stored schema compiles to the same decoders."""
+    decoders = DecoderTable({"weight": DpSchema("weight", "Integer", "kg", 2)})
+    restored = DecoderTable.from_list(decoders.as_list())
+    assert restored.decode("weight", 8010, 0) == decoders.decode("weight", 8010, 0) == 80.1
+    assert DecoderTable().as_list() == []
@@ -0,0 +1,42 @@
+"""Tests for the sensor platform."""
+from __future__ import annotations
+
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.tuya_scale.const import DOMAIN
+from custom_components.tuya_scale.sensor import TuyaScaleSensor
+
+from .fake_tuya import DEVICE_ID, scale_properties
+
+
+async def test_unchanged_poll_writes_no_state(hass: HomeAssistant, cloud, entry) -> None:
+    """A sensor is written for a new reading, not for a poll repeating it."""
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    cloud.devices[DEVICE_ID] = scale_properties(
+        weight=81000, timestamp=coordinator.data["weight"].timestamp + 60000, count=2
+    )
+
+    writes = []
+    original = TuyaScaleSensor.async_write_ha_state
+
+    def record_write(sensor: TuyaScaleSensor) -> None:
+        writes.append(sensor.unique_id)
+        original(sensor)
+
+    with patch.object(TuyaScaleSensor, "async_write_ha_state", record_write):
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+        assert writes.count(f"{DEVICE_ID}_weight") == 1
+
+        writes.clear()
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+        assert not writes
+
+    assert float(hass.states.get("sensor.tuya_smart_scale_weight").state) == 81000
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
@@ -0,0 +1,53 @@
+"""Tests for the assembly of weigh-in sessions."""
+from __future__ import annotations
+
+from custom_components.tuya_scale.models import PropertyRecord
+from custom_components.tuya_scale.session import SessionAssembler
+
+EXPECTED = {"weight", "BR", "weightcount"}
+
+
+def _data(**values) -> dict:
+    return {code: PropertyRecord(value, 1000, "value") for code, value in values.items()}
+
+
+def test_session_completes_when_all_properties_arrived():
+    """Changed codes are held back until every weigh-in property arrived."""
+    assembler = SessionAssembler()
+    release, completed = assembler.feed(_data(weight=80.1), {"weight"}, EXPECTED)
+    assert release == set() and completed == []
+
+    data = _data(weight=80.1, BR=520, weightcount=7, battery=False)
+    release, completed = assembler.feed(data, {"BR", "weightcount", "battery"}, EXPECTED)
+    assert release == {"weight", "BR", "weightcount", "battery"}
+    assert len(completed) == 1
+    assert completed[0].count == 7
+    assert completed[0].as_event_data()["values"]["weight"] == 80.1
+    assert assembler.session is None
+
+
+def test_new_count_completes_the_open_session():
+    """A new weightcount completes the open session and starts the next."""
+    assembler = SessionAssembler()
+    assembler.feed(_data(weight=80.1, weightcount=7), {"weight", "weightcount"}, EXPECTED)
+    release, completed = assembler.feed(
+        _data(weight=62.0, weightcount=8), {"weight", "weightcount"}, EXPECTED
+    )
+    assert [session.count for session in completed] == [7]
+    assert release == {"weight", "weightcount"}
+    assert assembler.session.count == 8
+
+
+def test_other_codes_pass_without_a_session():
+    """Codes that are not part of a weigh-in are released right away."""
+    release, completed = SessionAssembler().feed(_data(battery=True), {"battery"}, EXPECTED)
+    assert release == {"battery"} and completed == []
+
+
+def test_expire_returns_partial_session():
+    """An incomplete session can be expired with what it collected."""
+    assembler = SessionAssembler()
+    assembler.feed(_data(weight=80.1), {"weight"}, EXPECTED)
+    session = assembler.expire()
+    assert session.values.keys() == {"weight"}
+    assert assembler.expire() is None
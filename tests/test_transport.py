@@ -0,0 +1,114 @@
+"""Tests for the cloud and local transports."""
+from __future__ import annotations
+
+import pytest
+
+from custom_components.tuya_scale.api import TuyaScaleApiError, TuyaScaleConnectionError
+from custom_components.tuya_scale.transport import CloudTransport, LocalTransport
+
+from .fake_tuya import DEVICE_ID, ERROR_SERVER, ERROR_TOKEN_INVALID, LOCAL_KEY, FakeTuyaDevice
+
+DP_CODES = {101: "weight", 102: "BR", 104: "battery"}
+
+
+@pytest.fixture
+async def device(socket_enabled):
+    """Return a running fake scale on the LAN."""
+    fake = FakeTuyaDevice({"101": 80100, "102": 520, "104": False, "199": 1})
+    await fake.start()
+    yield fake
+    await fake.stop()
+
+
+def _local(device: FakeTuyaDevice) -> LocalTransport:
+    return LocalTransport("127.0.0.1", DEVICE_ID, LOCAL_KEY, dict(DP_CODES), device.port)
+
+
+async def test_cloud_properties(cloud, client, tokens):
+    """The shadow properties are returned and their DP ids learned."""
+    transport = CloudTransport(client, tokens, DEVICE_ID)
+    properties = await transport.async_get_properties()
+    assert {prop["code"] for prop in properties} == {"weight", "BR", "weightcount", "battery"}
+    assert transport.dp_codes[101] == "weight"
+    assert transport.stats.as_dict()["requests"] == 1
+
+
+async def test_cloud_retries_rejected_token(cloud, client, tokens):
+    """A request rejected for its token is retried once with a new token."""
+    transport = CloudTransport(client, tokens, DEVICE_ID)
+    await transport.async_get_properties()
+    cloud.errors.append(ERROR_TOKEN_INVALID)
+    await transport.async_get_properties()
+    assert cloud.tokens_issued == 2
+
+
+async def test_cloud_server_error(cloud, client, tokens):
+    """A server error of the shadow endpoint is a connection error."""
+    transport = CloudTransport(client, tokens, DEVICE_ID)
+    await tokens.async_get_access_token()
+    cloud.errors.append(ERROR_SERVER)
+    with pytest.raises(TuyaScaleConnectionError):
+        await transport.async_get_properties()
+
+
+async def test_cloud_unknown_device(cloud, client, tokens):
+    """An API error of the shadow endpoint is raised."""
+    with pytest.raises(TuyaScaleApiError, match="offline"):
+        await CloudTransport(client, tokens, "unknown").async_get_properties()
+
+
+async def test_local_frame_round_trip(device):
+    """A DP query is framed, encrypted and answered with mapped properties."""
+    transport = _local(device)
+    properties = await transport.async_get_properties()
+
+    assert device.queries[0]["devId"] == DEVICE_ID
+    assert {prop["code"]: prop["value"] for prop in properties} == {
+        "weight": 80100, "BR": 520, "battery": False,
+    }
+
+    # Unchanged values keep the time they were first seen at
+    device.heartbeat = True
+    again = await transport.async_get_properties()
+    assert [prop["time"] for prop in again] == [prop["time"] for prop in properties]
+
+
+async def test_local_garbled_reply(device):
+    """A reply that does not decrypt is an API error, so the cloud takes over."""
+    device.garbled = True
+    with pytest.raises(TuyaScaleApiError) as excinfo:
+        await _local(device).async_get_properties()
+    assert not isinstance(excinfo.value, TuyaScaleConnectionError)
+
+
+async def test_local_wrong_key(device):
+    """A reply encrypted with another key is an API error."""
+    transport = LocalTransport(
+        "127.0.0.1", DEVICE_ID, "fedcba9876543210", dict(DP_CODES), device.port
+    )
+    with pytest.raises(TuyaScaleApiError) as excinfo:
+        await transport.async_get_properties()
+    assert not isinstance(excinfo.value, TuyaScaleConnectionError)
+
+
+async def test_local_key_of_wrong_length():
+    """A local key that is no AES-128 key fails before connecting."""
+    transport = LocalTransport("127.0.0.1", DEVICE_ID, "short", dict(DP_CODES), 1)
+    with pytest.raises(TuyaScaleApiError, match="local key"):
+        await transport.async_get_properties()
+
+
+async def test_local_needs_dp_codes(device):
+    """Without DP codes from the cloud the local transport cannot map values."""
+    transport = LocalTransport("127.0.0.1", DEVICE_ID, LOCAL_KEY, {}, device.port)
+    with pytest.raises(TuyaScaleApiError):
+        await transport.async_get_properties()
+
+
+async def test_local_connection_refused(device):
+    """A device that cannot be reached raises a connection error."""
+    port = device.port
+    await device.stop()
+    transport = LocalTransport("127.0.0.1", DEVICE_ID, LOCAL_KEY, dict(DP_CODES), port)
+    with pytest.raises(TuyaScaleConnectionError):
+        await transport.async_get_properties()
@@ -0,0 +1,108 @@
+"""Tests for the weight trend statistics."""
+from __future__ import annotations
+
+import pytest
+
+from custom_components.tuya_scale.trends import (
+    DAY_MS,
+    RollingWindow,
+    TrendTracker,
+    WeightTrend,
+)
+
+START = 1_700_000_000_000
+
+
+def test_rolling_window() -> None:
+    """The window keeps the values of its span and their statistics."""
+    window = RollingWindow(3 * DAY_MS)
+    assert window.mean is None and window.minimum is None and window.maximum is None
+
+    for day, value in enumerate([5.0, 1.0, 4.0, 4.0, 2.0, 3.0]):
+        window.add(START + day * DAY_MS, value)
+
+    # Exactly three days back is outside the window
+    assert window.samples() == [
+        (START + 3 * DAY_MS, 4.0),
+        (START + 4 * DAY_MS, 2.0),
+        (START + 5 * DAY_MS, 3.0),
+    ]
+    assert window.count == 3
+    assert window.total == 9.0
+    assert window.mean == 3.0
+    assert window.minimum == 2.0
+    assert window.maximum == 4.0
+
+    # The extremes move on once they expire
+    window.add(START + 7 * DAY_MS, 2.5)
+    assert window.samples() == [(START + 5 * DAY_MS, 3.0), (START + 7 * DAY_MS, 2.5)]
+    assert window.mean == 2.75
+    assert window.minimum == 2.5
+    assert window.maximum == 3.0
+
+
+def test_kalman_steps() -> None:
+    """The first weigh-ins move the trend by the Kalman gain."""
+    trend = WeightTrend()
+    assert trend.add(START, 80.0)
+    assert trend.level == 80.0
+
+    # One day: predicted variance 0.5 + 0.01, gain 0.51 / 1.01
+    assert trend.add(START + DAY_MS, 81.0)
+    assert trend.level == pytest.approx(80.504950495)
+    assert trend.variance == pytest.approx(0.252475248)
+
+    # Two days later the gain is 0.272475 / 0.772475
+    assert trend.add(START + 3 * DAY_MS, 80.0)
+    assert trend.level == pytest.approx(80.326839272)
+    assert trend.variance == pytest.approx(0.176365035)
+
+    # A weigh-in that is not newer is ignored
+    assert not trend.add(START + 3 * DAY_MS, 70.0)
+    assert trend.level == pytest.approx(80.326839272)
+
+
+def test_steady_loss() -> None:
+    """A daily loss of 100 g gives the expected slope, lag and window statistics."""
+    trend = WeightTrend()
+    for day in range(120):
+        trend.add(START + day * DAY_MS, 90.0 - 0.1 * day)
+    stats = trend.statistics()
+
+    # Last week's mean is 7 days times 100 g below the week before
+    assert stats["change_7d"] == pytest.approx(-0.7)
+    # In the steady state the gain is 0.131774 and the trend lags the ramp
+    # by 0.1 * (1 - gain) / gain above the last weight of 78.1 kg
+    assert stats["trend"] == pytest.approx(78.1 + 0.658875, abs=1e-5)
+    assert stats["mean_7d"] == pytest.approx(78.4)
+    assert stats["min_7d"] == pytest.approx(78.1)
+    assert stats["max_7d"] == pytest.approx(78.7)
+    assert stats["mean_30d"] == pytest.approx(79.55)
+    assert stats["max_30d"] == pytest.approx(81.0)
+    assert stats["mean_90d"] == pytest.approx(82.55)
+    assert stats["max_90d"] == pytest.approx(87.0)
+
+
+def test_weekly_change_needs_two_weeks() -> None:
+    """Without a weigh-in in the week before there is no weekly change."""
+    trend = WeightTrend()
+    for day in range(7):
+        trend.add(START + day * DAY_MS, 80.0)
+    assert trend.weekly_change is None
+    trend.add(START + 7 * DAY_MS, 79.0)
+    # 79.0 and six times 80.0 against the first weigh-in
+    assert trend.weekly_change == pytest.approx(-1 / 7)
+
+
+def test_restored_trend_continues() -> None:
+    """A persisted trend carries on exactly like one that was never stored."""
+    weights = [80.0, 80.4, 79.8, 79.9, 79.5, 79.6, 79.1, 79.3, 78.8, 78.9]
+    kept = WeightTrend()
+    for day, weight in enumerate(weights[:6]):
+        kept.add(START + day * DAY_MS, weight)
+    tracker = TrendTracker(["weight"], {"weight": kept.as_dict()})
+    restored = tracker.trends["weight"]
+    for day, weight in enumerate(weights[6:], 6):
+        kept.add(START + day * DAY_MS, weight)
+        restored.add(START + day * DAY_MS, weight)
+    assert restored.statistics() == pytest.approx(kept.statistics())